@@ -0,0 +1,146 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import { SafeCast } from '@aave-v3/contracts/dependencies/openzeppelin/contracts/SafeCast.sol';
+import { IDynamicRateStrategy } from '../interfaces/IDynamicRateStrategy.sol';
+import { IVariableRateUpdater } from '../interfaces/IVariableRateUpdater.sol';
+import { DynamicRateStrategyClone } from './DynamicRateStrategyClone.sol';
+import { Clones } from './libraries/Clones.sol';
+
+/**
+ * @title DynamicRateFactory
+ * @author Khaled G.
+ * @notice Deploys DynamicRateStrategy/VariableRateUpdater pairs as minimal proxy clones at deterministic addresses.
+ * The pair is initialized and wired (the updater is the ward of the strategy) in the deployment transaction,
+ * the pool configurator still has to set the strategy on the reserve.
+ * @dev The curve parameters of a strategy are immutable args of its clone (see DynamicRateStrategyClone), so the
+ * pool doesn't pay storage reads for them in calculateInterestRates. They are part of the clone code, hence of its
+ * address.
+ */
+contract DynamicRateFactory {
+    using SafeCast for uint256;
+
+    /// Implementation the strategy clones delegate to, a DynamicRateStrategyClone
+    address public immutable STRATEGY_IMPLEMENTATION;
+
+    /// Implementation the updater clones delegate to
+    address public immutable UPDATER_IMPLEMENTATION;
+
+    struct ReserveDeployment {
+        address asset;
+        // allows deploying a new pair for an asset that already has one
+        bytes32 salt;
+        // variableRateUpdater is ignored, it is set to the updater clone. The curve parameters are capped to uint128.
+        IDynamicRateStrategy.InitializationParams strategyParams;
+        uint256[] utilizationHistory;
+    }
+
+    event DynamicRateDeployed(
+        address indexed asset,
+        address indexed deployer,
+        address strategy,
+        address updater
+    );
+
+    constructor(address strategyImplementation, address updaterImplementation) {
+        STRATEGY_IMPLEMENTATION = strategyImplementation;
+        UPDATER_IMPLEMENTATION = updaterImplementation;
+    }
+
+    /**
+     * @notice Deploys and initializes a strategy/updater pair for a reserve
+     * @param deployment The reserve and its parameters
+     * @return strategy The address of the strategy clone
+     * @return updater The address of the updater clone
+     */
+    function deploy(
+        ReserveDeployment calldata deployment
+    ) external returns (address strategy, address updater) {
+        return _deploy(deployment);
+    }
+
+    /**
+     * @notice Deploys and initializes a strategy/updater pair for each reserve, in a single transaction
+     * @param deployments The reserves and their parameters
+     * @return strategies The addresses of the strategy clones
+     * @return updaters The addresses of the updater clones
+     */
+    function deployBatch(
+        ReserveDeployment[] calldata deployments
+    ) external returns (address[] memory strategies, address[] memory updaters) {
+        strategies = new address[](deployments.length);
+        updaters = new address[](deployments.length);
+        for (uint256 k = 0; k < deployments.length; k++) {
+            (strategies[k], updaters[k]) = _deploy(deployments[k]);
+        }
+    }
+
+    /**
+     * @notice Returns the addresses at which a deployment would land
+     * @param deployer The account calling `deploy` or `deployBatch`
+     * @param deployment The reserve and its parameters, the strategy address depends on its curve parameters
+     * @return strategy The address of the strategy clone
+     * @return updater The address of the updater clone
+     */
+    function predictAddresses(
+        address deployer,
+        ReserveDeployment calldata deployment
+    ) external view returns (address strategy, address updater) {
+        bytes32 cloneSalt = _cloneSalt(deployer, deployment.asset, deployment.salt);
+        strategy = Clones.predictDeterministicAddress(
+            STRATEGY_IMPLEMENTATION,
+            _strategyArgs(deployment.strategyParams),
+            cloneSalt,
+            address(this)
+        );
+        updater = Clones.predictDeterministicAddress(UPDATER_IMPLEMENTATION, cloneSalt, address(this));
+    }
+
+    function _deploy(
+        ReserveDeployment calldata deployment
+    ) internal returns (address strategy, address updater) {
+        // the deployer is part of the salt so nobody can squat the addresses of another deployer
+        bytes32 cloneSalt = _cloneSalt(msg.sender, deployment.asset, deployment.salt);
+        IDynamicRateStrategy.InitializationParams calldata params = deployment.strategyParams;
+        strategy = Clones.cloneDeterministic(STRATEGY_IMPLEMENTATION, _strategyArgs(params), cloneSalt);
+        updater = Clones.cloneDeterministic(UPDATER_IMPLEMENTATION, cloneSalt);
+
+        DynamicRateStrategyClone(strategy).initialize(params.variableRateSlope1, params.mPlus, params.mMinus, updater);
+        IVariableRateUpdater(updater).initialize(
+            address(params.provider),
+            deployment.asset,
+            deployment.utilizationHistory
+        );
+
+        emit DynamicRateDeployed(deployment.asset, msg.sender, strategy, updater);
+    }
+
+    /**
+     * @dev Immutable args of a strategy clone, in the layout read by DynamicRateStrategyClone
+     */
+    function _strategyArgs(
+        IDynamicRateStrategy.InitializationParams calldata params
+    ) internal pure returns (bytes memory) {
+        // in two halves to keep the stack shallow
+        return abi.encodePacked(
+            abi.encodePacked(
+                address(params.provider),
+                params.optimalUsageRatio.toUint128(),
+                params.optimalStableToTotalDebtRatio.toUint128(),
+                params.epsilon.toUint128(),
+                params.baseVariableBorrowRate.toUint128()
+            ),
+            abi.encodePacked(
+                params.variableRateSlope2.toUint128(),
+                params.stableRateSlope1.toUint128(),
+                params.stableRateSlope2.toUint128(),
+                params.baseStableRateOffset.toUint128(),
+                params.stableRateExcessOffset.toUint128()
+            )
+        );
+    }
+
+    function _cloneSalt(address deployer, address asset, bytes32 salt) internal pure returns (bytes32) {
+        return keccak256(abi.encode(deployer, asset, salt));
+    }
+}
@@ -0,0 +1,95 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import { DataTypes } from '@aave-v3/contracts/protocol/libraries/types/DataTypes.sol';
+import { IReserveInterestRateStrategy } from '@aave-v3/contracts/interfaces/IReserveInterestRateStrategy.sol';
+
+/**
+ * @title DynamicRateLens
+ * @author Khaled G.
+ * @notice Read-only quotes of the rate curves of interest rate strategies, many strategies and many points in a single
+ * eth_call, for front-ends and risk tooling.
+ * @dev The lens stands in for the underlying of the reserve: its balanceOf always returns 0 and the available liquidity
+ * of a point is passed as liquidityAdded, so the quotes don't depend on any token balance.
+ */
+contract DynamicRateLens {
+
+    struct Point {
+        uint256 availableLiquidity;
+        uint256 totalStableDebt;
+        uint256 totalVariableDebt;
+        uint256 averageStableBorrowRate;
+    }
+
+    /**
+     * @notice Balance of the synthetic underlying, read by calculateInterestRates
+     * @return Always 0
+     */
+    function balanceOf(address) external pure returns (uint256) {
+        return 0;
+    }
+
+    /**
+     * @notice Returns the rates of every strategy at every point, with the current state of the strategies
+     * @param strategies The interest rate strategies
+     * @param points The synthetic reserve states
+     * @param reserveFactor The reserve factor, expressed in percentage
+     * @return ok Whether the quotes of a strategy succeeded, the rates of a failed strategy are left to 0
+     * @return rates (liquidityRate, stableBorrowRate, variableBorrowRate) for strategy s and point p at
+     * s * points.length + p, expressed in ray
+     */
+    function quote(
+        address[] calldata strategies,
+        Point[] calldata points,
+        uint256 reserveFactor
+    ) external view returns (bool[] memory ok, uint256[3][] memory rates) {
+        ok = new bool[](strategies.length);
+        rates = new uint256[3][](strategies.length * points.length);
+
+        DataTypes.CalculateInterestRatesParams memory params;
+        params.reserveFactor = reserveFactor;
+        params.reserve = address(this);
+
+        for (uint256 s = 0; s < strategies.length; s++) {
+            // a call to an address without code can't be caught
+            if (strategies[s].code.length == 0) {
+                continue;
+            }
+            ok[s] = _quoteStrategy(
+                IReserveInterestRateStrategy(strategies[s]),
+                points,
+                params,
+                rates,
+                s * points.length
+            );
+        }
+    }
+
+    function _quoteStrategy(
+        IReserveInterestRateStrategy strategy,
+        Point[] calldata points,
+        DataTypes.CalculateInterestRatesParams memory params,
+        uint256[3][] memory rates,
+        uint256 offset
+    ) internal view returns (bool) {
+        for (uint256 p = 0; p < points.length; p++) {
+            params.liquidityAdded = points[p].availableLiquidity;
+            params.totalStableDebt = points[p].totalStableDebt;
+            params.totalVariableDebt = points[p].totalVariableDebt;
+            params.averageStableBorrowRate = points[p].averageStableBorrowRate;
+            try strategy.calculateInterestRates(params) returns (
+                uint256 liquidityRate,
+                uint256 stableBorrowRate,
+                uint256 variableBorrowRate
+            ) {
+                rates[offset + p] = [liquidityRate, stableBorrowRate, variableBorrowRate];
+            } catch {
+                for (uint256 k = offset; k < offset + p; k++) {
+                    delete rates[k];
+                }
+                return false;
+            }
+        }
+        return true;
+    }
+}
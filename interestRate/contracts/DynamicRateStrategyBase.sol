@@ -0,0 +1,387 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import {IERC20} from '@aave-v3/contracts/dependencies/openzeppelin/contracts/IERC20.sol';
+import {SafeCast} from '@aave-v3/contracts/dependencies/openzeppelin/contracts/SafeCast.sol';
+import {WadRayMath} from '@aave-v3/contracts/protocol/libraries/math/WadRayMath.sol';
+import {PercentageMath} from '@aave-v3/contracts/protocol/libraries/math/PercentageMath.sol';
+import {DataTypes} from '@aave-v3/contracts/protocol/libraries/types/DataTypes.sol';
+import {Errors} from '@aave-v3/contracts/protocol/libraries/helpers/Errors.sol';
+import {IDefaultInterestRateStrategy} from '@aave-v3/contracts/interfaces/IDefaultInterestRateStrategy.sol';
+import {IReserveInterestRateStrategy} from '@aave-v3/contracts/interfaces/IReserveInterestRateStrategy.sol';
+import {IPoolAddressesProvider} from '@aave-v3/contracts/interfaces/IPoolAddressesProvider.sol';
+import { IDynamicRateStrategy } from '../interfaces/IDynamicRateStrategy.sol';
+
+/**
+ * @title DynamicRateStrategyBase
+ * @author Khaled G.
+ * @notice Logic of the DynamicRateStrategy, shared by the contract deployed with its constructor (DynamicRateStrategy)
+ * and the minimal proxy clones of the factory (DynamicRateStrategyClone). They only differ in where the curve
+ * parameters are read from: immutables, or arguments appended to the calldata by the clone.
+ */
+abstract contract DynamicRateStrategyBase is IDynamicRateStrategy {
+  using WadRayMath for uint256;
+  using PercentageMath for uint256;
+  using SafeCast for uint256;
+
+  /// @inheritdoc IDynamicRateStrategy
+  mapping(address => bool) public wards;
+
+  // Only the parameters the keeper and the pool configurator change are in storage, packed so that
+  // `calculateInterestRates` and `getUpkeepParameters` read a single slot.
+
+  // Slope of the variable interest curve when usage ratio > 0 and <= OPTIMAL_USAGE_RATIO. Expressed in ray
+  uint128 internal _variableRateSlope1;
+
+  /// Multiplier when average utilization in the sweet spot, this is expressed in percentage factor
+  uint16 internal _mPlus;
+
+  /// Multiplier when average utilization is not in the sweet spot, this is exepressed in percentage factor
+  uint16 internal _mMinus;
+
+  /// Variable rate updater address
+  address internal _variableRateUpdater;
+
+  /// Whether a clone has been initialized, the implementation is initialized by its constructor
+  bool internal _initialized;
+
+
+  modifier auth {
+    require(wards[msg.sender], "DRS/not-authorized");
+    _;
+  }
+
+  /**
+   * @dev Only pool configurator can call functions marked by this modifier.
+   */
+  modifier onlyPoolConfigurator() {
+    _onlyPoolConfigurator();
+    _;
+  }
+
+  function _getAddressesProvider() internal view virtual returns (IPoolAddressesProvider);
+
+  function _getOptimalUsageRatio() internal view virtual returns (uint256);
+
+  function _getOptimalStableToTotalDebtRatio() internal view virtual returns (uint256);
+
+  function _getEpsilon() internal view virtual returns (uint256);
+
+  function _getBaseVariableBorrowRate() internal view virtual returns (uint256);
+
+  function _getVariableRateSlope2() internal view virtual returns (uint256);
+
+  function _getStableRateSlope1() internal view virtual returns (uint256);
+
+  function _getStableRateSlope2() internal view virtual returns (uint256);
+
+  function _getBaseStableRateOffset() internal view virtual returns (uint256);
+
+  function _getStableRateExcessOffset() internal view virtual returns (uint256);
+
+  /**
+   * @dev Checks the curve parameters, shared by the constructor and the initialization of the clones.
+   * @param optimalUsageRatio The optimal usage ratio
+   * @param optimalStableToTotalDebtRatio The optimal stable debt to total debt ratio of the reserve
+   * @param epsilon The half width of the sweet spot below the optimal usage ratio
+   */
+  function _checkCurve(
+    uint256 optimalUsageRatio,
+    uint256 optimalStableToTotalDebtRatio,
+    uint256 epsilon
+  ) internal pure {
+    require(WadRayMath.RAY >= optimalUsageRatio, Errors.INVALID_OPTIMAL_USAGE_RATIO);
+    require(
+      WadRayMath.RAY >= optimalStableToTotalDebtRatio,
+      Errors.INVALID_OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO
+    );
+    // the lower bound of the sweet spot, OPTIMAL_USAGE_RATIO - EPSILON, must not underflow
+    require(optimalUsageRatio >= epsilon, "DRS/epsilon");
+  }
+
+  /**
+   * @dev Sets the keeper parameters and the updater, shared by the constructor and the initialization of the clones.
+   * @param variableRateSlope1 The variable rate slope below optimal usage ratio
+   * @param mPlus The m+ parameter, checked by the caller or zero
+   * @param mMinus The m- parameter, checked by the caller or zero
+   * @param variableRateUpdater The variable rate updater, the ward of the strategy
+   */
+  function _initializeKeeper(
+    uint256 variableRateSlope1,
+    uint256 mPlus,
+    uint256 mMinus,
+    address variableRateUpdater
+  ) internal {
+    _variableRateSlope1 = variableRateSlope1.toUint128();
+    _mPlus = uint16(mPlus);
+    _mMinus = uint16(mMinus);
+    wards[variableRateUpdater] = true;
+    _variableRateUpdater = variableRateUpdater;
+    _initialized = true;
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function EPSILON() external view returns (uint256) {
+    return _getEpsilon();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function OPTIMAL_USAGE_RATIO() external view returns (uint256) {
+    return _getOptimalUsageRatio();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO() external view returns (uint256) {
+    return _getOptimalStableToTotalDebtRatio();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function MAX_EXCESS_USAGE_RATIO() external view returns (uint256) {
+    return WadRayMath.RAY - _getOptimalUsageRatio();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function MAX_EXCESS_STABLE_TO_TOTAL_DEBT_RATIO() external view returns (uint256) {
+    return WadRayMath.RAY - _getOptimalStableToTotalDebtRatio();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function ADDRESSES_PROVIDER() external view returns (IPoolAddressesProvider) {
+    return _getAddressesProvider();
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function getUpkeepParameters() external view returns (
+    uint256 optimalUsageRatio,
+    uint256 epsilon,
+    uint256 variableRateSlope1,
+    uint256 mPlus,
+    uint256 mMinus
+  ) {
+    return (_getOptimalUsageRatio(), _getEpsilon(), _variableRateSlope1, _mPlus, _mMinus);
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function getMPlus() external view returns (uint256) {
+    return _mPlus;
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function getMMinus() external view returns (uint256) {
+    return _mMinus;
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function getVariableRateUpdater() external view returns (address) {
+    return _variableRateUpdater;
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function setVariableRateUpdater(address variableRateUpdater) external onlyPoolConfigurator {
+    address oldVariableRateUpdater = _variableRateUpdater;
+    wards[oldVariableRateUpdater] = false;
+    wards[variableRateUpdater] = true;
+    _variableRateUpdater = variableRateUpdater;
+    emit VariableRateUpdaterUpdated(oldVariableRateUpdater, variableRateUpdater);
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function setVariableRateSlope1(
+    uint256 variableRateSlope1
+  ) external auth {
+    emit VariableRateSlope1Updated(_variableRateSlope1, variableRateSlope1);
+    _variableRateSlope1 = variableRateSlope1.toUint128();
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function setMPlus(
+    uint256 mPlus
+  ) external onlyPoolConfigurator {
+    _checkMPlus(mPlus);
+    emit MPlusUpdated(_mPlus, mPlus);
+    _mPlus = uint16(mPlus);
+  }
+
+  /// @inheritdoc IDynamicRateStrategy
+  function setMMinus(
+    uint256 mMinus
+  ) external onlyPoolConfigurator {
+    _checkMMinus(mMinus);
+    emit MMinusUpdated(_mMinus, mMinus);
+    _mMinus = uint16(mMinus);
+  }
+
+  function _checkMPlus(uint256 mPlus) internal pure {
+    require(mPlus > PercentageMath.PERCENTAGE_FACTOR && mPlus <= type(uint16).max, "DRS/mPlus");
+  }
+
+  function _checkMMinus(uint256 mMinus) internal pure {
+    require(mMinus < PercentageMath.PERCENTAGE_FACTOR, "DRS/mMinus");
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getVariableRateSlope1() external view returns (uint256) {
+    return _variableRateSlope1;
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getVariableRateSlope2() external view returns (uint256) {
+    return _getVariableRateSlope2();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getStableRateSlope1() external view returns (uint256) {
+    return _getStableRateSlope1();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getStableRateSlope2() external view returns (uint256) {
+    return _getStableRateSlope2();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getStableRateExcessOffset() external view returns (uint256) {
+    return _getStableRateExcessOffset();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getBaseStableBorrowRate() public view returns (uint256) {
+    return uint256(_variableRateSlope1) + _getBaseStableRateOffset();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getBaseVariableBorrowRate() external view override returns (uint256) {
+    return _getBaseVariableBorrowRate();
+  }
+
+  /// @inheritdoc IDefaultInterestRateStrategy
+  function getMaxVariableBorrowRate() external view override returns (uint256) {
+    return _getBaseVariableBorrowRate() + _variableRateSlope1 + _getVariableRateSlope2();
+  }
+
+  struct CalcInterestRatesLocalVars {
+    uint256 availableLiquidity;
+    uint256 totalDebt;
+    uint256 currentVariableBorrowRate;
+    uint256 currentStableBorrowRate;
+    uint256 currentLiquidityRate;
+    uint256 borrowUsageRatio;
+    uint256 supplyUsageRatio;
+    uint256 stableToTotalDebtRatio;
+    uint256 availableLiquidityPlusDebt;
+  }
+
+  /// @inheritdoc IReserveInterestRateStrategy
+  function calculateInterestRates(
+    DataTypes.CalculateInterestRatesParams memory params
+  ) public view override returns (uint256, uint256, uint256) {
+    CalcInterestRatesLocalVars memory vars;
+
+    // the only storage read
+    uint256 variableRateSlope1 = _variableRateSlope1;
+
+    vars.totalDebt = params.totalStableDebt + params.totalVariableDebt;
+
+    vars.currentLiquidityRate = 0;
+    vars.currentVariableBorrowRate = _getBaseVariableBorrowRate();
+    vars.currentStableBorrowRate = variableRateSlope1 + _getBaseStableRateOffset();
+
+    if (vars.totalDebt != 0) {
+      vars.stableToTotalDebtRatio = params.totalStableDebt.rayDiv(vars.totalDebt);
+      vars.availableLiquidity =
+        IERC20(params.reserve).balanceOf(params.aToken) +
+        params.liquidityAdded -
+        params.liquidityTaken;
+
+      vars.availableLiquidityPlusDebt = vars.availableLiquidity + vars.totalDebt;
+      vars.borrowUsageRatio = vars.totalDebt.rayDiv(vars.availableLiquidityPlusDebt);
+      vars.supplyUsageRatio = vars.totalDebt.rayDiv(
+        vars.availableLiquidityPlusDebt + params.unbacked
+      );
+    }
+
+    uint256 optimalUsageRatio = _getOptimalUsageRatio();
+
+    if (vars.borrowUsageRatio > optimalUsageRatio) {
+      uint256 excessBorrowUsageRatio = (vars.borrowUsageRatio - optimalUsageRatio).rayDiv(
+        WadRayMath.RAY - optimalUsageRatio
+      );
+
+      vars.currentStableBorrowRate +=
+        _getStableRateSlope1() +
+        _getStableRateSlope2().rayMul(excessBorrowUsageRatio);
+
+      vars.currentVariableBorrowRate +=
+        variableRateSlope1 +
+        _getVariableRateSlope2().rayMul(excessBorrowUsageRatio);
+    } else {
+      vars.currentStableBorrowRate += _getStableRateSlope1().rayMul(vars.borrowUsageRatio).rayDiv(
+        optimalUsageRatio
+      );
+
+      vars.currentVariableBorrowRate += variableRateSlope1.rayMul(vars.borrowUsageRatio).rayDiv(
+        optimalUsageRatio
+      );
+    }
+
+    uint256 optimalStableToTotalDebtRatio = _getOptimalStableToTotalDebtRatio();
+
+    if (vars.stableToTotalDebtRatio > optimalStableToTotalDebtRatio) {
+      uint256 excessStableDebtRatio = (vars.stableToTotalDebtRatio -
+        optimalStableToTotalDebtRatio).rayDiv(WadRayMath.RAY - optimalStableToTotalDebtRatio);
+      vars.currentStableBorrowRate += _getStableRateExcessOffset().rayMul(excessStableDebtRatio);
+    }
+
+    vars.currentLiquidityRate = _getOverallBorrowRate(
+      params.totalStableDebt,
+      params.totalVariableDebt,
+      vars.currentVariableBorrowRate,
+      params.averageStableBorrowRate
+    ).rayMul(vars.supplyUsageRatio).percentMul(
+        PercentageMath.PERCENTAGE_FACTOR - params.reserveFactor
+      );
+
+    return (
+      vars.currentLiquidityRate,
+      vars.currentStableBorrowRate,
+      vars.currentVariableBorrowRate
+    );
+  }
+
+  /**
+   * @dev Calculates the overall borrow rate as the weighted average between the total variable debt and total stable
+   * debt
+   * @param totalStableDebt The total borrowed from the reserve at a stable rate
+   * @param totalVariableDebt The total borrowed from the reserve at a variable rate
+   * @param currentVariableBorrowRate The current variable borrow rate of the reserve
+   * @param currentAverageStableBorrowRate The current weighted average of all the stable rate loans
+   * @return The weighted averaged borrow rate
+   */
+  function _getOverallBorrowRate(
+    uint256 totalStableDebt,
+    uint256 totalVariableDebt,
+    uint256 currentVariableBorrowRate,
+    uint256 currentAverageStableBorrowRate
+  ) internal pure returns (uint256) {
+    uint256 totalDebt = totalStableDebt + totalVariableDebt;
+
+    if (totalDebt == 0) return 0;
+
+    uint256 weightedVariableRate = totalVariableDebt.wadToRay().rayMul(currentVariableBorrowRate);
+
+    uint256 weightedStableRate = totalStableDebt.wadToRay().rayMul(currentAverageStableBorrowRate);
+
+    uint256 overallBorrowRate = (weightedVariableRate + weightedStableRate).rayDiv(
+      totalDebt.wadToRay()
+    );
+
+    return overallBorrowRate;
+  }
+
+  function _onlyPoolConfigurator() internal view virtual {
+    require(
+      _getAddressesProvider().getPoolConfigurator() == msg.sender,
+      Errors.CALLER_NOT_POOL_CONFIGURATOR
+    );
+  }
+}
@@ -0,0 +1,112 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import {IPoolAddressesProvider} from '@aave-v3/contracts/interfaces/IPoolAddressesProvider.sol';
+import { DynamicRateStrategyBase } from './DynamicRateStrategyBase.sol';
+
+/**
+ * @title DynamicRateStrategyClone
+ * @author Khaled G.
+ * @notice Implementation of the DynamicRateStrategy clones deployed by DynamicRateFactory.
+ * @dev The curve parameters are embedded in the code of the clone, which appends them to the calldata of every call
+ * (Clones.cloneDeterministic with immutable args), so reading them costs a calldataload instead of a storage read.
+ * The arguments are packed: the provider (20 bytes), then the other parameters as uint128 in the order of the
+ * offsets below, followed by their total length + 2 as an uint16.
+ */
+contract DynamicRateStrategyClone is DynamicRateStrategyBase {
+
+  uint256 internal constant PROVIDER_ARG = 0;
+  uint256 internal constant OPTIMAL_USAGE_RATIO_ARG = 20;
+  uint256 internal constant OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO_ARG = 36;
+  uint256 internal constant EPSILON_ARG = 52;
+  uint256 internal constant BASE_VARIABLE_BORROW_RATE_ARG = 68;
+  uint256 internal constant VARIABLE_RATE_SLOPE_2_ARG = 84;
+  uint256 internal constant STABLE_RATE_SLOPE_1_ARG = 100;
+  uint256 internal constant STABLE_RATE_SLOPE_2_ARG = 116;
+  uint256 internal constant BASE_STABLE_RATE_OFFSET_ARG = 132;
+  uint256 internal constant STABLE_RATE_EXCESS_OFFSET_ARG = 148;
+
+  constructor() {
+    // only the clones can be initialized
+    _initialized = true;
+  }
+
+  /**
+   * @notice Sets the keeper parameters of a clone and checks its curve parameters, can only be called once
+   * @param variableRateSlope1 The initial variable rate slope below optimal usage ratio
+   * @param mPlus The m+ parameter, checked like in its setter
+   * @param mMinus The m- parameter, checked like in its setter
+   * @param variableRateUpdater The variable rate updater, the ward of the strategy
+   */
+  function initialize(
+    uint256 variableRateSlope1,
+    uint256 mPlus,
+    uint256 mMinus,
+    address variableRateUpdater
+  ) external {
+    require(!_initialized, "DRS/initialized");
+    _checkCurve(_getOptimalUsageRatio(), _getOptimalStableToTotalDebtRatio(), _getEpsilon());
+    _checkMPlus(mPlus);
+    _checkMMinus(mMinus);
+    _initializeKeeper(variableRateSlope1, mPlus, mMinus, variableRateUpdater);
+  }
+
+  /**
+   * @dev Start of the immutable args in the calldata, the last 2 bytes of the calldata hold their length
+   */
+  function _getImmutableArgsOffset() internal pure returns (uint256 offset) {
+    assembly {
+      offset := sub(calldatasize(), shr(240, calldataload(sub(calldatasize(), 2))))
+    }
+  }
+
+  function _getArgUint128(uint256 argOffset) internal pure returns (uint256 arg) {
+    uint256 offset = _getImmutableArgsOffset();
+    assembly {
+      arg := shr(128, calldataload(add(offset, argOffset)))
+    }
+  }
+
+  function _getAddressesProvider() internal pure override returns (IPoolAddressesProvider provider) {
+    uint256 offset = _getImmutableArgsOffset() + PROVIDER_ARG;
+    assembly {
+      provider := shr(96, calldataload(offset))
+    }
+  }
+
+  function _getOptimalUsageRatio() internal pure override returns (uint256) {
+    return _getArgUint128(OPTIMAL_USAGE_RATIO_ARG);
+  }
+
+  function _getOptimalStableToTotalDebtRatio() internal pure override returns (uint256) {
+    return _getArgUint128(OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO_ARG);
+  }
+
+  function _getEpsilon() internal pure override returns (uint256) {
+    return _getArgUint128(EPSILON_ARG);
+  }
+
+  function _getBaseVariableBorrowRate() internal pure override returns (uint256) {
+    return _getArgUint128(BASE_VARIABLE_BORROW_RATE_ARG);
+  }
+
+  function _getVariableRateSlope2() internal pure override returns (uint256) {
+    return _getArgUint128(VARIABLE_RATE_SLOPE_2_ARG);
+  }
+
+  function _getStableRateSlope1() internal pure override returns (uint256) {
+    return _getArgUint128(STABLE_RATE_SLOPE_1_ARG);
+  }
+
+  function _getStableRateSlope2() internal pure override returns (uint256) {
+    return _getArgUint128(STABLE_RATE_SLOPE_2_ARG);
+  }
+
+  function _getBaseStableRateOffset() internal pure override returns (uint256) {
+    return _getArgUint128(BASE_STABLE_RATE_OFFSET_ARG);
+  }
+
+  function _getStableRateExcessOffset() internal pure override returns (uint256) {
+    return _getArgUint128(STABLE_RATE_EXCESS_OFFSET_ARG);
+  }
+}
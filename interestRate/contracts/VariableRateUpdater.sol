@@ -7,6 +7,7 @@ import { IPool } from '@aave-v3/contracts/interfaces/IPool.sol';
 import { WadRayMath } from '@aave-v3/contracts/protocol/libraries/math/WadRayMath.sol';
 import { PercentageMath } from '@aave-v3/contracts/protocol/libraries/math/PercentageMath.sol';
 import { DataTypes } from '@aave-v3/contracts/protocol/libraries/types/DataTypes.sol';
+import { Errors } from '@aave-v3/contracts/protocol/libraries/helpers/Errors.sol';
 
 
 interface DebtTokenLike {
@@ -32,9 +33,27 @@ contract VariableRateUpdater is AutomationCompatibleInterface {
     uint public constant INTERVAL = 12 hours;
     uint public constant WINDOW = 60; // 60 days
 
-    IPoolAddressesProvider public immutable ADDRESSES_PROVIDER;
-    IPool public immutable POOL;
-    address public immutable ASSET;
+    /// How checkUpkeep aggregates the utilization history, the median and the trimmed mean can't be moved by a few
+    /// extreme samples
+    enum Aggregation { Mean, Median, TrimmedMean }
+
+    event AggregationUpdated(Aggregation aggregation, uint8 trim);
+    event EarlyAdjustmentUpdated(uint8 shortHorizon, uint16 earlyAdjustmentThreshold);
+
+    // Held in storage rather than immutables so that the contract can be used behind minimal proxy clones
+    IPoolAddressesProvider public ADDRESSES_PROVIDER;
+    IPool public POOL;
+    address public ASSET;
+    bool internal _initialized;
+    /// Aggregation of the utilization history, set by the pool configurator
+    Aggregation public aggregation;
+    /// Number of samples dropped at each end of the sorted window by the trimmed mean
+    uint8 public trim;
+    /// Number of samples averaged by the short horizon of the early adjustment rule
+    uint8 public shortHorizon;
+    /// Deviation of the short horizon average from the aggregated utilization above which checkUpkeep uses the short
+    /// horizon average, expressed in bps of utilization, 0 disables the rule
+    uint16 public earlyAdjustmentThreshold;
 
     uint[] public utilizationHistory;
 
@@ -42,12 +61,72 @@ contract VariableRateUpdater is AutomationCompatibleInterface {
 
     uint public lastTimeStamp;
 
+    // Time-weighted accumulator, samples are weighted by the time elapsed between them so late or skipped upkeeps
+    // don't skew the average
+    struct Observation {
+        uint32 blockTimestamp;
+        // sum of utilization (ray) * seconds since deployment, allowed to wrap
+        uint224 utilizationCumulative;
+    }
+
+    /// Observation taken at each sample, indexed like utilizationHistory, the genesis observation sits at WINDOW - 1
+    Observation[60] public observations;
+
+    /// Utilization recorded at the last sample, it holds until the next sample
+    uint public lastUtilization;
+
+    // Indices of utilizationHistory sorted by utilization, one byte per index and 32 indices per word. Only maintained
+    // when the aggregation isn't the mean: a write costs a binary search (O(log n) storage reads) and two word writes,
+    // the shifting is done in memory.
+    uint256[2] internal _sortedIndices;
+
+    // Prefix sums of the samples, seed history included, modulo 2**128: entry m % 61 holds the sum of the first m
+    // samples, so the mean of any of the last 60 horizons is two reads away. 61 entries packed 2 per word.
+    uint128[61] internal _prefixSums;
+
+    // Sum of the samples ranked between trim and 60 - trim, only maintained when the aggregation is the trimmed mean:
+    // a write moves the samples between the old and the new rank of the sample by one rank, so the sum changes by the
+    // samples crossing the trimmed bounds (at most 3 reads) instead of being summed again in checkUpkeep.
+    uint256 internal _trimmedSum;
+
+    // A sample moving in the sorted indices, see _reinsertSorted
+    struct SampleMove {
+        uint256 oldRank;
+        uint256 newRank;
+        uint256 previous;
+        uint256 utilization;
+    }
+
     constructor(
         IPoolAddressesProvider _provider,
         address _asset, 
         uint256[] memory _utilizationHistory
     ) {
+        _initialize(_provider, _asset, _utilizationHistory);
+    }
+
+    /**
+     * @notice Initializes an updater deployed as a minimal proxy clone, can only be called once
+     * @param _provider The address of the PoolAddressesProvider contract
+     * @param _asset The asset of the reserve
+     * @param _utilizationHistory The seed utilization history, of length WINDOW
+     */
+    function initialize(
+        IPoolAddressesProvider _provider,
+        address _asset,
+        uint256[] calldata _utilizationHistory
+    ) external {
+        _initialize(_provider, _asset, _utilizationHistory);
+    }
+
+    function _initialize(
+        IPoolAddressesProvider _provider,
+        address _asset,
+        uint256[] memory _utilizationHistory
+    ) internal {
+        require(!_initialized, "VariableRateUpdate/initialized");
         require(_utilizationHistory.length == 60, "VariableRateUpdate/length");
+        _initialized = true;
         utilizationHistory = _utilizationHistory;
 
         ADDRESSES_PROVIDER = _provider;
@@ -56,6 +135,396 @@ contract VariableRateUpdater is AutomationCompatibleInterface {
 
         lastTimeStamp = block.timestamp;
         counter = 0;
+
+        // the most recent entry of the seed history stands for the current utilization
+        lastUtilization = _utilizationHistory[59];
+        observations[59] = Observation(uint32(block.timestamp), 0);
+
+        uint128 prefixSum;
+        for (uint256 k = 0; k < 60; k++) {
+            unchecked {
+                prefixSum += uint128(_utilizationHistory[k]);
+            }
+            _prefixSums[k + 1] = prefixSum;
+        }
+    }
+
+    /**
+     * @dev Writes the observation of a sample. The utilization of a sample holds until the next one, the same rule as
+     * currentUtilizationCumulative, so an average up to the current block doesn't change when the next sample lands
+     * @param _counter The number of samples written before, the latest observation is the one of sample _counter - 1
+     * @param index The index of the sample in utilizationHistory
+     * @param utilization The sampled utilization, expressed in ray
+     * @param timestamp The time of the sample
+     */
+    function _observe(uint256 _counter, uint256 index, uint256 utilization, uint32 timestamp) internal {
+        Observation memory last = observations[(_counter + 59) % 60];
+        unchecked {
+            observations[index] = Observation(
+                timestamp,
+                last.utilizationCumulative + uint224(lastUtilization * (timestamp - last.blockTimestamp))
+            );
+        }
+        lastUtilization = utilization;
+    }
+
+    /**
+     * @dev Writes a sample to the history, the prefix sums, the sorted indices and the accumulator. The caller updates
+     * counter
+     * @param _counter The number of samples written before, the value of counter
+     * @param position The number of samples before this one, seed history included: _counter + 60 for a new sample,
+     * _counter + 59 to overwrite the latest one
+     * @param utilization The sampled utilization, expressed in ray
+     * @param timestamp The time of the sample
+     */
+    function _writeSample(uint256 _counter, uint256 position, uint256 utilization, uint32 timestamp) internal {
+        uint256 index = position % 60;
+        bool sorted = aggregation != Aggregation.Mean;
+        uint256 previous = sorted ? utilizationHistory[index] : 0;
+        _observe(_counter, index, utilization, timestamp);
+        utilizationHistory[index] = utilization;
+        unchecked {
+            _prefixSums[(position + 1) % 61] = _prefixSums[position % 61] + uint128(utilization);
+        }
+        if (sorted) {
+            _reinsertSorted(index, previous, utilization);
+        }
+    }
+
+    /**
+     * @dev Utilization of the reserve, the last sample when the reserve has no supply
+     */
+    function _utilization(DataTypes.ReserveData memory reserve) internal view returns (uint256) {
+        uint256 totalReserve = ATokenLike(reserve.aTokenAddress).totalSupply();
+        if (totalReserve == 0) {
+            return lastUtilization;
+        }
+        uint256 totalDebt = DebtTokenLike(reserve.stableDebtTokenAddress).totalSupply() +
+            DebtTokenLike(reserve.variableDebtTokenAddress).totalSupply();
+        return totalDebt.rayDiv(totalReserve);
+    }
+
+    /**
+     * @notice Returns the utilization accumulator extrapolated to the current block
+     * @return utilizationCumulative Sum of utilization (ray) times seconds, modulo 2**224
+     */
+    function currentUtilizationCumulative() public view returns (uint224 utilizationCumulative) {
+        Observation memory last = observations[(counter + 59) % 60];
+        unchecked {
+            utilizationCumulative = last.utilizationCumulative +
+                uint224(lastUtilization * (uint32(block.timestamp) - last.blockTimestamp));
+        }
+    }
+
+    /**
+     * @notice Returns the time-weighted average utilization between an observation and the current block, in O(1)
+     * @param observationsAgo Number of samples to look back, 0 is the latest sample
+     * @return twau The time-weighted average utilization, expressed in ray
+     * @return period The number of seconds the average covers
+     */
+    function timeWeightedAverageUtilization(
+        uint256 observationsAgo
+    ) external view returns (uint256 twau, uint256 period) {
+        require(observationsAgo < 60 && observationsAgo <= counter, "VariableRateUpdate/lookback");
+        Observation memory start = observations[(counter + 59 - observationsAgo) % 60];
+        unchecked {
+            period = uint32(block.timestamp) - start.blockTimestamp;
+            require(period > 0, "VariableRateUpdate/period");
+            twau = uint224(currentUtilizationCumulative() - start.utilizationCumulative) / period;
+        }
+    }
+
+    /**
+     * @notice Sets how the utilization history is aggregated by checkUpkeep
+     * @dev Only callable by the pool configurator, the sorted indices are rebuilt when leaving the mean and the
+     * trimmed sum is summed again for the trimmed mean
+     * @param _aggregation The aggregation
+     * @param _trim The number of samples dropped at each end by the trimmed mean, must be 0 for the other aggregations
+     */
+    function setAggregation(Aggregation _aggregation, uint8 _trim) external {
+        require(ADDRESSES_PROVIDER.getPoolConfigurator() == msg.sender, Errors.CALLER_NOT_POOL_CONFIGURATOR);
+        require(
+            _aggregation == Aggregation.TrimmedMean ? 2 * uint256(_trim) < 60 : _trim == 0,
+            "VariableRateUpdate/trim"
+        );
+        if (aggregation == Aggregation.Mean && _aggregation != Aggregation.Mean) {
+            _storeSortedIndices(_sortHistory());
+        }
+        aggregation = _aggregation;
+        trim = _trim;
+        if (_aggregation == Aggregation.TrimmedMean) {
+            uint8[60] memory indices = _loadSortedIndices();
+            uint256 trimmedSum;
+            for (uint256 k = _trim; k < 60 - uint256(_trim); k++) {
+                trimmedSum += utilizationHistory[indices[k]];
+            }
+            _trimmedSum = trimmedSum;
+        }
+        emit AggregationUpdated(_aggregation, _trim);
+    }
+
+    /**
+     * @notice Sets the early adjustment rule: when the mean of the last `_shortHorizon` samples deviates from the
+     * aggregated utilization by more than `_threshold`, checkUpkeep adjusts the slope on the short horizon mean. When
+     * the current utilization breaches it between two samples, the upkeep is due early, at most once per interval
+     * @dev Only callable by the pool configurator
+     * @param _shortHorizon The number of samples of the short horizon, between 1 and 59
+     * @param _threshold The deviation threshold, expressed in bps of utilization, 0 disables the rule
+     */
+    function setEarlyAdjustment(uint8 _shortHorizon, uint16 _threshold) external {
+        require(ADDRESSES_PROVIDER.getPoolConfigurator() == msg.sender, Errors.CALLER_NOT_POOL_CONFIGURATOR);
+        require(
+            _threshold == 0 ? _shortHorizon == 0 : _shortHorizon > 0 && _shortHorizon < 60,
+            "VariableRateUpdate/horizon"
+        );
+        require(_threshold <= PercentageMath.PERCENTAGE_FACTOR, "VariableRateUpdate/threshold");
+        shortHorizon = _shortHorizon;
+        earlyAdjustmentThreshold = _threshold;
+        emit EarlyAdjustmentUpdated(_shortHorizon, _threshold);
+    }
+
+    /**
+     * @notice Returns the mean of the last `samples` samples in O(1), from the prefix sums
+     * @param samples The horizon, in samples of INTERVAL, between 1 and WINDOW
+     * @return The mean utilization over the horizon, expressed in ray
+     */
+    function horizonAverage(uint256 samples) public view returns (uint256) {
+        require(samples > 0 && samples <= 60, "VariableRateUpdate/horizon");
+        uint256 sampleCount = counter + 60;
+        unchecked {
+            return uint128(_prefixSums[sampleCount % 61] - _prefixSums[(sampleCount - samples) % 61]) / samples;
+        }
+    }
+
+    /**
+     * @notice Returns the utilization checkUpkeep adjusts the slope on: the aggregated utilization, or the short horizon
+     * mean when the early adjustment rule triggers
+     * @return utilization The utilization, expressed in ray
+     * @return early Whether the early adjustment rule triggered
+     */
+    function upkeepUtilization() public view returns (uint256 utilization, bool early) {
+        utilization = aggregatedUtilization();
+        uint256 threshold = uint256(earlyAdjustmentThreshold) * (WadRayMath.RAY / PercentageMath.PERCENTAGE_FACTOR);
+        if (threshold != 0) {
+            uint256 shortAverage = horizonAverage(shortHorizon);
+            if (shortAverage > utilization + threshold || shortAverage + threshold < utilization) {
+                return (shortAverage, true);
+            }
+        }
+    }
+
+    /**
+     * @notice Returns what checkUpkeep reads and decides: the current utilization of the reserve, the utilization the
+     * performData slope is computed on and whether an upkeep is due. Between two samples, the early adjustment rule
+     * replaces upkeepUtilization with the short horizon mean refreshed to the current utilization
+     * @return currentUtilization The utilization of the reserve, expressed in ray
+     * @return utilization The utilization checkUpkeep adjusts the slope on, expressed in ray
+     * @return due Whether an upkeep is due
+     */
+    function upkeepDue() external view returns (uint256 currentUtilization, uint256 utilization, bool due) {
+        DataTypes.ReserveData memory reserve = POOL.getReserveData(ASSET);
+        currentUtilization = _utilization(reserve);
+        (utilization, ) = upkeepUtilization();
+        (due, utilization) = _upkeepDue(reserve, utilization);
+    }
+
+    /**
+     * @notice Returns the utilization history aggregated as set by the pool configurator
+     * @dev The mean reads 2 prefix sums, the median reads the sorted indices and 2 samples, the trimmed mean reads the
+     * trimmed sum
+     * @return The aggregated utilization, expressed in ray
+     */
+    function aggregatedUtilization() public view returns (uint256) {
+        Aggregation _aggregation = aggregation;
+        if (_aggregation == Aggregation.Mean) {
+            return horizonAverage(60);
+        }
+        if (_aggregation == Aggregation.TrimmedMean) {
+            return _trimmedSum / (60 - 2 * uint256(trim));
+        }
+
+        uint8[60] memory indices = _loadSortedIndices();
+        return (utilizationHistory[indices[29]] + utilizationHistory[indices[30]]) / 2;
+    }
+
+    /**
+     * @notice Returns the index of utilizationHistory holding the sample of a given rank
+     * @dev Only meaningful when the aggregation isn't the mean
+     * @param rank The rank, 0 is the lowest utilization
+     * @return The index in utilizationHistory
+     */
+    function sortedIndex(uint256 rank) external view returns (uint256) {
+        require(rank < 60, "VariableRateUpdate/rank");
+        return uint8(_sortedIndices[rank / 32] >> (8 * (rank % 32)));
+    }
+
+    function _loadSortedIndices() internal view returns (uint8[60] memory indices) {
+        uint256[2] memory words = _sortedIndices;
+        unchecked {
+            for (uint256 k = 0; k < 60; k++) {
+                indices[k] = uint8(words[k / 32] >> (8 * (k % 32)));
+            }
+        }
+    }
+
+    function _storeSortedIndices(uint8[60] memory indices) internal {
+        uint256[2] memory words;
+        unchecked {
+            for (uint256 k = 0; k < 60; k++) {
+                words[k / 32] |= uint256(indices[k]) << (8 * (k % 32));
+            }
+        }
+        _sortedIndices = words;
+    }
+
+    /**
+     * @dev Insertion sort of the whole history in memory, only used when the sorted indices are (re)built
+     */
+    function _sortHistory() internal view returns (uint8[60] memory indices) {
+        uint256[] memory history = utilizationHistory;
+        unchecked {
+            for (uint256 k = 0; k < 60; k++) {
+                uint256 value = history[k];
+                uint256 position = k;
+                while (position > 0 && history[indices[position - 1]] > value) {
+                    indices[position] = indices[position - 1];
+                    position--;
+                }
+                indices[position] = uint8(k);
+            }
+        }
+    }
+
+    /**
+     * @dev Moves `index`, whose sample `previous` was just overwritten with `utilization`, to its new rank and updates
+     * the trimmed sum
+     */
+    function _reinsertSorted(uint256 index, uint256 previous, uint256 utilization) internal {
+        uint8[60] memory indices = _loadSortedIndices();
+        uint256 removed;
+        uint256 low;
+        unchecked {
+            while (indices[removed] != index) {
+                removed++;
+            }
+            for (uint256 k = removed; k < 59; k++) {
+                indices[k] = indices[k + 1];
+            }
+
+            // binary search among the 59 other samples, ties are inserted after the equal samples
+            uint256 high = 59;
+            while (low < high) {
+                uint256 mid = (low + high) / 2;
+                if (utilizationHistory[indices[mid]] <= utilization) {
+                    low = mid + 1;
+                } else {
+                    high = mid;
+                }
+            }
+            for (uint256 k = 59; k > low; k--) {
+                indices[k] = indices[k - 1];
+            }
+            indices[low] = uint8(index);
+        }
+        _storeSortedIndices(indices);
+        if (aggregation == Aggregation.TrimmedMean) {
+            _trimmedSum = _movedTrimmedSum(indices, SampleMove(removed, low, previous, utilization));
+        }
+    }
+
+    /**
+     * @dev Sample of a given rank before `move`, read from the sorted indices after it: the ranks between the old and
+     * the new rank of the moved sample are shifted by one
+     */
+    function _rankedBefore(
+        uint8[60] memory indices,
+        SampleMove memory move,
+        uint256 rank
+    ) internal view returns (uint256) {
+        if (rank == move.oldRank) {
+            return move.previous;
+        }
+        if (move.oldRank < rank && rank <= move.newRank) {
+            return utilizationHistory[indices[rank - 1]];
+        }
+        if (move.newRank <= rank && rank < move.oldRank) {
+            return utilizationHistory[indices[rank + 1]];
+        }
+        return utilizationHistory[indices[rank]];
+    }
+
+    /**
+     * @dev Trimmed sum after `move`. Between the two ranks every sample takes the rank of its neighbour, so the sum
+     * over the kept ranks telescopes to the samples at the bounds of the shifted ranks, plus the moved sample when it
+     * lands among the kept ranks.
+     */
+    function _movedTrimmedSum(
+        uint8[60] memory indices,
+        SampleMove memory move
+    ) internal view returns (uint256 trimmedSum) {
+        uint256 low = trim;
+        uint256 high = 60 - low;
+        trimmedSum = _trimmedSum;
+        // the sum never goes negative, the intermediate wraps cancel out
+        unchecked {
+            if (move.newRank >= move.oldRank) {
+                // ranks [oldRank, newRank) now hold the sample ranked one above
+                uint256 start = move.oldRank > low ? move.oldRank : low;
+                uint256 end = move.newRank < high ? move.newRank : high;
+                if (start < end) {
+                    trimmedSum += _rankedBefore(indices, move, end) - _rankedBefore(indices, move, start);
+                }
+            } else {
+                // ranks (newRank, oldRank] now hold the sample ranked one below
+                uint256 start = move.newRank + 1 > low ? move.newRank + 1 : low;
+                uint256 end = move.oldRank < high - 1 ? move.oldRank : high - 1;
+                if (start <= end) {
+                    trimmedSum += _rankedBefore(indices, move, start - 1) - _rankedBefore(indices, move, end);
+                }
+            }
+            if (low <= move.newRank && move.newRank < high) {
+                trimmedSum += move.utilization - _rankedBefore(indices, move, move.newRank);
+            }
+        }
+    }
+
+    /**
+     * @dev Whether an upkeep is due and the utilization it adjusts the slope on. An upkeep is due once INTERVAL has
+     * elapsed since the last sample, or earlier when the early adjustment rule triggers on the current utilization,
+     * see _earlyAdjustment
+     */
+    function _upkeepDue(
+        DataTypes.ReserveData memory reserve,
+        uint256 upkeepUtilization_
+    ) internal view returns (bool, uint256) {
+        if ((block.timestamp - lastTimeStamp) > INTERVAL) { //every 12 hours an upkeep is needed
+            return (true, upkeepUtilization_);
+        }
+        (bool early, uint256 shortAverage) = _earlyAdjustment(_utilization(reserve));
+        return early ? (true, shortAverage) : (false, upkeepUtilization_);
+    }
+
+    /**
+     * @dev Early adjustment between two samples: the short horizon mean with the latest
+     * sample refreshed to the current utilization, and whether it deviates from the aggregated utilization by more
+     * than the threshold. The upkeep it triggers refreshes the latest sample, so it happens at most once per interval
+     * (the latest observation is then newer than lastTimeStamp).
+     * @param utilization The current utilization of the reserve, expressed in ray
+     */
+    function _earlyAdjustment(uint256 utilization) internal view returns (bool early, uint256 shortAverage) {
+        uint256 threshold = uint256(earlyAdjustmentThreshold) * (WadRayMath.RAY / PercentageMath.PERCENTAGE_FACTOR);
+        uint256 latest = (counter + 59) % 60;
+        if (threshold == 0 || observations[latest].blockTimestamp != lastTimeStamp) {
+            return (false, 0);
+        }
+        uint256 samples = shortHorizon;
+        uint256 sampleCount = counter + 60;
+        unchecked {
+            uint256 sum = uint128(_prefixSums[sampleCount % 61] - _prefixSums[(sampleCount - samples) % 61]);
+            shortAverage = (sum - utilizationHistory[latest] + utilization) / samples;
+        }
+        uint256 aggregated = aggregatedUtilization();
+        early = shortAverage > aggregated + threshold || shortAverage + threshold < aggregated;
     }
 
     function checkUpkeep(
@@ -66,20 +535,20 @@ contract VariableRateUpdater is AutomationCompatibleInterface {
         override
         returns (bool upkeepNeeded, bytes memory performData)
     {
-        upkeepNeeded = (block.timestamp - lastTimeStamp) > INTERVAL; //every 6 hours an upkeep is need
-        uint _avgUtilization;
-        for(uint k = 0; k < 60; k ++) {
-            _avgUtilization += utilizationHistory[k];
-        }
-        _avgUtilization = _avgUtilization / 60;
+        (uint _avgUtilization, ) = upkeepUtilization();
 
-        IDynamicRateStrategy rateStrategy = IDynamicRateStrategy(POOL.getReserveData(ASSET).interestRateStrategyAddress);
+        DataTypes.ReserveData memory reserve = POOL.getReserveData(ASSET);
+        IDynamicRateStrategy rateStrategy = IDynamicRateStrategy(reserve.interestRateStrategyAddress);
 
-        uint optimalUtilization = rateStrategy.OPTIMAL_USAGE_RATIO();
-        uint epsilon = rateStrategy.EPSILON();
-        uint variableRateSlope1 = rateStrategy.getVariableRateSlope1();
-        uint mPlus = rateStrategy.getMPlus();
-        uint mMinus = rateStrategy.getMMinus();
+        (
+            uint optimalUtilization,
+            uint epsilon,
+            uint variableRateSlope1,
+            uint mPlus,
+            uint mMinus
+        ) = rateStrategy.getUpkeepParameters();
+
+        (upkeepNeeded, _avgUtilization) = _upkeepDue(reserve, _avgUtilization);
 
         if (_avgUtilization < optimalUtilization - epsilon) {
             variableRateSlope1 = variableRateSlope1.percentMul(mMinus);
@@ -106,9 +575,15 @@ contract VariableRateUpdater is AutomationCompatibleInterface {
         uint256 utilizationRatio = totalDebt.rayDiv(totalReserve);
 
         if ((block.timestamp - lastTimeStamp) > INTERVAL) {
+            _writeSample(counter, counter + 60, utilizationRatio, uint32(block.timestamp));
             lastTimeStamp = block.timestamp;
-            utilizationHistory[counter % 60] = utilizationRatio;
             counter = counter + 1;
+        } else {
+            (bool early, ) = _earlyAdjustment(utilizationRatio);
+            if (early) {
+                // early upkeep, the latest sample takes the current utilization and the interval keeps counting
+                _writeSample(counter, counter + 59, utilizationRatio, uint32(block.timestamp));
+            }
         }
         
         uint256 variableRateSlope1 = abi.decode(performData, (uint256));
@@ -0,0 +1,119 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+/**
+ * @title Clones
+ * @notice EIP-1167 minimal proxies deployed with CREATE2, same bytecode as OpenZeppelin's Clones (v4.9), and minimal
+ * proxies with immutable args.
+ * @dev A clone is 45 bytes of runtime code delegating every call to the implementation. A clone with immutable args
+ * is 56 bytes of runtime code followed by the args and their length + 2 as an uint16: it appends both to the calldata
+ * of every call it delegates, the implementation reads them at calldatasize() - length.
+ */
+library Clones {
+    /**
+     * @notice Deploys a clone of `implementation` at a deterministic address
+     * @param implementation The contract the clone delegates to
+     * @param salt The CREATE2 salt, the same salt can't be used twice for the same implementation
+     * @return instance The address of the clone
+     */
+    function cloneDeterministic(address implementation, bytes32 salt) internal returns (address instance) {
+        /// @solidity memory-safe-assembly
+        assembly {
+            // Cleans the upper 96 bits of the `implementation` word, then packs the first 3 bytes
+            // of the `implementation` address with the bytecode before the address.
+            mstore(0x00, or(shr(0xe8, shl(0x60, implementation)), 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000))
+            // Packs the remaining 17 bytes of `implementation` with the bytecode after the address.
+            mstore(0x20, or(shl(0x78, implementation), 0x5af43d82803e903d91602b57fd5bf3))
+            instance := create2(0, 0x09, 0x37, salt)
+        }
+        require(instance != address(0), "Clones/create2-failed");
+    }
+
+    /**
+     * @notice Computes the address of a clone deployed with `cloneDeterministic`
+     * @param implementation The contract the clone delegates to
+     * @param salt The CREATE2 salt
+     * @param deployer The contract calling `cloneDeterministic`
+     * @return predicted The address of the clone
+     */
+    function predictDeterministicAddress(
+        address implementation,
+        bytes32 salt,
+        address deployer
+    ) internal pure returns (address predicted) {
+        /// @solidity memory-safe-assembly
+        assembly {
+            let ptr := mload(0x40)
+            mstore(add(ptr, 0x38), deployer)
+            mstore(add(ptr, 0x24), 0x5af43d82803e903d91602b57fd5bf3ff)
+            mstore(add(ptr, 0x14), implementation)
+            mstore(ptr, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73)
+            mstore(add(ptr, 0x58), salt)
+            mstore(add(ptr, 0x78), keccak256(add(ptr, 0x0c), 0x37))
+            predicted := keccak256(add(ptr, 0x43), 0x55)
+        }
+    }
+
+    /**
+     * @notice Deploys a clone of `implementation` with immutable args at a deterministic address
+     * @param implementation The contract the clone delegates to
+     * @param args The immutable args, appended to the calldata of every call
+     * @param salt The CREATE2 salt, the same salt can't be used twice for the same implementation and args
+     * @return instance The address of the clone
+     */
+    function cloneDeterministic(
+        address implementation,
+        bytes memory args,
+        bytes32 salt
+    ) internal returns (address instance) {
+        bytes memory creationCode = _creationCode(implementation, args);
+        /// @solidity memory-safe-assembly
+        assembly {
+            instance := create2(0, add(creationCode, 0x20), mload(creationCode), salt)
+        }
+        require(instance != address(0), "Clones/create2-failed");
+    }
+
+    /**
+     * @notice Computes the address of a clone deployed with `cloneDeterministic` and immutable args
+     * @param implementation The contract the clone delegates to
+     * @param args The immutable args
+     * @param salt The CREATE2 salt
+     * @param deployer The contract calling `cloneDeterministic`
+     * @return predicted The address of the clone
+     */
+    function predictDeterministicAddress(
+        address implementation,
+        bytes memory args,
+        bytes32 salt,
+        address deployer
+    ) internal pure returns (address predicted) {
+        bytes32 codeHash = keccak256(_creationCode(implementation, args));
+        return address(uint160(uint256(keccak256(abi.encodePacked(bytes1(0xff), deployer, salt, codeHash)))));
+    }
+
+    /**
+     * @dev Creation code of a clone with immutable args: a 10 bytes constructor returning the runtime code, then the
+     * runtime code. The runtime copies the calldata and the args to memory, delegates and bubbles up the result like
+     * the EIP-1167 proxy.
+     */
+    function _creationCode(address implementation, bytes memory args) private pure returns (bytes memory) {
+        // the args and their uint16 length, the runtime code before them is 0x38 bytes long
+        uint256 extraLength = args.length + 2;
+        uint256 runtimeLength = 0x38 + extraLength;
+        require(runtimeLength <= type(uint16).max, "Clones/args-length");
+        return abi.encodePacked(
+            // PUSH2 runtimeLength DUP1 PUSH1 0x0a RETURNDATASIZE CODECOPY RETURNDATASIZE RETURN
+            hex"61", uint16(runtimeLength), hex"80600a3d393df3",
+            // CALLDATASIZE RETURNDATASIZE RETURNDATASIZE CALLDATACOPY PUSH2 extraLength
+            hex"363d3d3761", uint16(extraLength),
+            // RETURNDATASIZE DUP2 PUSH2 0x38 CALLDATASIZE CODECOPY RETURNDATASIZE RETURNDATASIZE SWAP3 CALLDATASIZE
+            // ADD RETURNDATASIZE PUSH20 implementation
+            hex"3d8161003836393d3d9236013d73", implementation,
+            // GAS DELEGATECALL, then the EIP-1167 return/revert with the jump destination at 0x36
+            hex"5af43d82803e903d91603657fd5bf3",
+            args,
+            uint16(extraLength)
+        );
+    }
+}
@@ -6,14 +6,20 @@ contract MockAddressesProvider {
     address public POOL;
     address public POOL_CONFIGURATOR;
 
+    // Same as IPoolAddressesProvider
+    event PoolUpdated(address indexed oldAddress, address indexed newAddress);
+    event PoolConfiguratorUpdated(address indexed oldAddress, address indexed newAddress);
+
     constructor() {
     }
 
     function setPool(address _pool) external {
+        emit PoolUpdated(POOL, _pool);
         POOL = _pool;
     }
 
     function setPoolConfigurator(address _poolConfigurator) external {
+        emit PoolConfiguratorUpdated(POOL_CONFIGURATOR, _poolConfigurator);
         POOL_CONFIGURATOR = _poolConfigurator;
     }
 
@@ -3,6 +3,7 @@ pragma solidity ^0.8.0;
 
 contract MockERC20 {
     uint256 internal _totalSupply;
+    mapping(address => uint256) internal _balances;
 
     function totalSupply() external view returns (uint256) {
         return _totalSupply;
@@ -13,4 +14,15 @@ contract MockERC20 {
     ) external {
         _totalSupply = totalSupply_;
     }
+
+    function balanceOf(address account) external view returns (uint256) {
+        return _balances[account];
+    }
+
+    function setBalance(
+        address account,
+        uint256 balance
+    ) external {
+        _balances[account] = balance;
+    }
 }
\ No newline at end of file
@@ -1,11 +1,47 @@
 // SPDX-License-Identifier: MIT
 pragma solidity ^0.8.0;
 import { DataTypes } from '@aave-v3/contracts/protocol/libraries/types/DataTypes.sol';
+import { ReserveConfiguration } from '@aave-v3/contracts/protocol/libraries/configuration/ReserveConfiguration.sol';
+import { IReserveInterestRateStrategy } from '@aave-v3/contracts/interfaces/IReserveInterestRateStrategy.sol';
+import { ReserveLogic } from '@aave-v3/contracts/protocol/libraries/logic/ReserveLogic.sol';
+import { MathUtils } from '@aave-v3/contracts/protocol/libraries/math/MathUtils.sol';
+import { WadRayMath } from '@aave-v3/contracts/protocol/libraries/math/WadRayMath.sol';
+
+interface MockERC20Like {
+    function totalSupply() external view returns (uint256);
+    function setTotalSupply(uint256 totalSupply_) external;
+    function balanceOf(address account) external view returns (uint256);
+    function setBalance(address account, uint256 balance) external;
+}
 
 
 contract MockPool {
+    using ReserveConfiguration for DataTypes.ReserveConfigurationMap;
+    using ReserveLogic for DataTypes.ReserveData;
+    using WadRayMath for uint256;
+
     mapping(address => DataTypes.ReserveData) reserves;
 
+    // Same as IPool
+    event ReserveDataUpdated(
+        address indexed reserve,
+        uint256 liquidityRate,
+        uint256 stableBorrowRate,
+        uint256 variableBorrowRate,
+        uint256 liquidityIndex,
+        uint256 variableBorrowIndex
+    );
+
+    // Same as IPoolConfigurator, the mock pool stands for the configurator when the tokens or the strategy are set
+    event ReserveInitialized(
+        address indexed asset,
+        address indexed aToken,
+        address stableDebtToken,
+        address variableDebtToken,
+        address interestRateStrategyAddress
+    );
+    event ReserveInterestRateStrategyChanged(address indexed asset, address oldStrategy, address newStrategy);
+
     constructor() {
 
     }
@@ -38,6 +74,18 @@ contract MockPool {
         uint128 unbacked,
         uint128 isolationModeTotalDebt
     ) external {
+        address oldStrategy = reserves[asset].interestRateStrategyAddress;
+        if (reserves[asset].aTokenAddress == address(0)) {
+            emit ReserveInitialized(
+                asset,
+                aTokenAddress,
+                stableDebtTokenAddress,
+                variableDebtTokenAddress,
+                interestRateStrategyAddress
+            );
+        } else if (oldStrategy != interestRateStrategyAddress) {
+            emit ReserveInterestRateStrategyChanged(asset, oldStrategy, interestRateStrategyAddress);
+        }
         reserves[asset].id = id;
         reserves[asset].aTokenAddress = aTokenAddress;
         reserves[asset].stableDebtTokenAddress = stableDebtTokenAddress;
@@ -54,5 +102,111 @@ contract MockPool {
         return reserves[asset];
     }
 
+    // Pool traffic, the mock tokens only track total supplies and the reserve balance of the aToken.
+    // As in ReserveLogic.updateInterestRates the rates are computed with the debt after the operation and the liquidity
+    // moved by the operation passed as liquidityAdded/liquidityTaken, before the underlying is transferred.
+
+    function supply(address asset, uint256 amount) external {
+        DataTypes.ReserveData storage reserve = reserves[asset];
+        _updateInterestRates(asset, amount, 0);
+        MockERC20Like aToken = MockERC20Like(reserve.aTokenAddress);
+        aToken.setTotalSupply(aToken.totalSupply() + amount);
+        _moveLiquidity(asset, int256(amount));
+    }
+
+    function borrow(address asset, uint256 amount) external {
+        DataTypes.ReserveData storage reserve = reserves[asset];
+        MockERC20Like variableDebtToken = MockERC20Like(reserve.variableDebtTokenAddress);
+        variableDebtToken.setTotalSupply(variableDebtToken.totalSupply() + amount);
+        _updateInterestRates(asset, 0, amount);
+        _moveLiquidity(asset, -int256(amount));
+    }
+
+    /// @dev Repays at most the total variable debt
+    function repay(address asset, uint256 amount) external returns (uint256) {
+        DataTypes.ReserveData storage reserve = reserves[asset];
+        MockERC20Like variableDebtToken = MockERC20Like(reserve.variableDebtTokenAddress);
+        uint256 totalVariableDebt = variableDebtToken.totalSupply();
+        if (amount > totalVariableDebt) {
+            amount = totalVariableDebt;
+        }
+        variableDebtToken.setTotalSupply(totalVariableDebt - amount);
+        _updateInterestRates(asset, amount, 0);
+        _moveLiquidity(asset, int256(amount));
+        return amount;
+    }
 
+    /// @notice Accrues the indexes and the treasury share with Aave's ReserveLogic.updateState
+    /// @dev The mock tokens don't track scaled balances, the debt is passed as ReserveLogic.cache would read it from
+    /// the debt tokens. The stable debt compounds from its own timestamp as in StableDebtToken.getSupplyData.
+    function accrue(
+        address asset,
+        uint256 scaledVariableDebt,
+        uint256 principalStableDebt,
+        uint256 averageStableBorrowRate,
+        uint40 stableDebtLastUpdateTimestamp
+    ) external {
+        DataTypes.ReserveData storage reserve = reserves[asset];
+        DataTypes.ReserveCache memory reserveCache;
+        reserveCache.reserveConfiguration = reserve.configuration;
+        reserveCache.reserveFactor = reserve.configuration.getReserveFactor();
+        reserveCache.currLiquidityIndex = reserveCache.nextLiquidityIndex = reserve.liquidityIndex;
+        reserveCache.currVariableBorrowIndex = reserveCache.nextVariableBorrowIndex = reserve.variableBorrowIndex;
+        reserveCache.currLiquidityRate = reserve.currentLiquidityRate;
+        reserveCache.currVariableBorrowRate = reserve.currentVariableBorrowRate;
+        reserveCache.reserveLastUpdateTimestamp = reserve.lastUpdateTimestamp;
+        reserveCache.currScaledVariableDebt = reserveCache.nextScaledVariableDebt = scaledVariableDebt;
+        reserveCache.currPrincipalStableDebt = principalStableDebt;
+        reserveCache.currAvgStableBorrowRate = averageStableBorrowRate;
+        reserveCache.stableDebtLastUpdateTimestamp = stableDebtLastUpdateTimestamp;
+        if (principalStableDebt != 0) {
+            reserveCache.currTotalStableDebt = principalStableDebt.rayMul(
+                MathUtils.calculateCompoundedInterest(averageStableBorrowRate, stableDebtLastUpdateTimestamp)
+            );
+        }
+        reserveCache.nextTotalStableDebt = reserveCache.currTotalStableDebt;
+        reserve.updateState(reserveCache);
+    }
+
+    function _moveLiquidity(address asset, int256 amount) internal {
+        address aToken = reserves[asset].aTokenAddress;
+        uint256 balance = MockERC20Like(asset).balanceOf(aToken);
+        MockERC20Like(asset).setBalance(
+            aToken,
+            amount >= 0 ? balance + uint256(amount) : balance - uint256(-amount)
+        );
+    }
+
+    function _updateInterestRates(address asset, uint256 liquidityAdded, uint256 liquidityTaken) internal {
+        DataTypes.ReserveData storage reserve = reserves[asset];
+        DataTypes.CalculateInterestRatesParams memory params;
+        params.unbacked = reserve.unbacked;
+        params.liquidityAdded = liquidityAdded;
+        params.liquidityTaken = liquidityTaken;
+        params.totalStableDebt = MockERC20Like(reserve.stableDebtTokenAddress).totalSupply();
+        params.totalVariableDebt = MockERC20Like(reserve.variableDebtTokenAddress).totalSupply();
+        // the mock stable debt token has no average rate
+        params.averageStableBorrowRate = 0;
+        params.reserveFactor = reserve.configuration.getReserveFactor();
+        params.reserve = asset;
+        params.aToken = reserve.aTokenAddress;
+
+        (
+            uint256 liquidityRate,
+            uint256 stableBorrowRate,
+            uint256 variableBorrowRate
+        ) = IReserveInterestRateStrategy(reserve.interestRateStrategyAddress).calculateInterestRates(params);
+
+        reserve.currentLiquidityRate = uint128(liquidityRate);
+        reserve.currentStableBorrowRate = uint128(stableBorrowRate);
+        reserve.currentVariableBorrowRate = uint128(variableBorrowRate);
+        emit ReserveDataUpdated(
+            asset,
+            liquidityRate,
+            stableBorrowRate,
+            variableBorrowRate,
+            reserve.liquidityIndex,
+            reserve.variableBorrowIndex
+        );
+    }
 }
\ No newline at end of file
@@ -2,6 +2,7 @@
 pragma solidity ^0.8.0;
 
 import { IDefaultInterestRateStrategy } from '@aave-v3/contracts/interfaces/IDefaultInterestRateStrategy.sol';
+import { IPoolAddressesProvider } from '@aave-v3/contracts/interfaces/IPoolAddressesProvider.sol';
 
 
 /**
@@ -10,7 +11,53 @@ import { IDefaultInterestRateStrategy } from '@aave-v3/contracts/interfaces/IDef
  * @notice Defines the interface of the DynamicRateStrategy
  */
 interface IDynamicRateStrategy is IDefaultInterestRateStrategy {
-    
+
+    /**
+     * @dev Emitted when the variable rate slope 1 is updated by a ward
+     * @param oldVariableRateSlope1 The previous slope, expressed in ray
+     * @param newVariableRateSlope1 The new slope, expressed in ray
+     */
+    event VariableRateSlope1Updated(uint256 oldVariableRateSlope1, uint256 newVariableRateSlope1);
+
+    /**
+     * @dev Emitted when the m+ parameter is updated
+     * @param oldMPlus The previous value, expressed in percentage
+     * @param newMPlus The new value, expressed in percentage
+     */
+    event MPlusUpdated(uint256 oldMPlus, uint256 newMPlus);
+
+    /**
+     * @dev Emitted when the m- parameter is updated
+     * @param oldMMinus The previous value, expressed in percentage
+     * @param newMMinus The new value, expressed in percentage
+     */
+    event MMinusUpdated(uint256 oldMMinus, uint256 newMMinus);
+
+    /**
+     * @dev Emitted when the variable rate updater is replaced
+     * @param oldAddress The address of the previous updater
+     * @param newAddress The address of the new updater
+     */
+    event VariableRateUpdaterUpdated(address indexed oldAddress, address indexed newAddress);
+
+    /// Parameters of a strategy deployed by DynamicRateFactory
+    struct InitializationParams {
+        IPoolAddressesProvider provider;
+        uint256 optimalUsageRatio;
+        uint256 baseVariableBorrowRate;
+        uint256 variableRateSlope1;
+        uint256 variableRateSlope2;
+        uint256 stableRateSlope1;
+        uint256 stableRateSlope2;
+        uint256 baseStableRateOffset;
+        uint256 stableRateExcessOffset;
+        uint256 optimalStableToTotalDebtRatio;
+        uint256 epsilon;
+        uint256 mPlus;
+        uint256 mMinus;
+        address variableRateUpdater;
+    }
+
     /**
      * @notice Returns the VariableRateUpdater in charge of adjusting the variable rate slope 1
      * @return Returns an address
@@ -36,6 +83,22 @@ interface IDynamicRateStrategy is IDefaultInterestRateStrategy {
      */
     function EPSILON() external view returns (uint256);
 
+    /**
+     * @notice Returns the parameters read by the keeper, in a single call reading one storage slot
+     * @return optimalUsageRatio The optimal usage ratio, expressed in ray
+     * @return epsilon The epsilon parameter, expressed in ray
+     * @return variableRateSlope1 The current variable rate slope 1, expressed in ray
+     * @return mPlus The m+ parameter, expressed in percentage
+     * @return mMinus The m- parameter, expressed in percentage
+     */
+    function getUpkeepParameters() external view returns (
+        uint256 optimalUsageRatio,
+        uint256 epsilon,
+        uint256 variableRateSlope1,
+        uint256 mPlus,
+        uint256 mMinus
+    );
+
     /**
      * @notice Returns the multiplier used when average utilization is too low
      * @return The m- parameter, expressed in percentage
@@ -59,7 +122,7 @@ interface IDynamicRateStrategy is IDefaultInterestRateStrategy {
 
     /**
      * @notice Updates the mPlus parameter
-     * @dev Only callable by pool configurator
+     * @dev Only callable by pool configurator, must be in (100%, 655.35%]
      * @param mPlus The mPlus parameter
      */
     function setMPlus(
@@ -10,6 +10,15 @@ import { AutomationCompatibleInterface } from "@chainlink/interfaces/automation/
  */
 
 interface IVariableRateUpdater is AutomationCompatibleInterface {
+    /**
+     * @notice Initializes an updater deployed as a minimal proxy clone
+     * @dev Can only be called once, an updater deployed with the constructor is already initialized
+     * @param provider The address of the PoolAddressesProvider contract
+     * @param asset The asset of the reserve
+     * @param utilizationHistory The seed utilization history, of length WINDOW
+     */
+    function initialize(address provider, address asset, uint256[] calldata utilizationHistory) external;
+
     /**
      * @notice Returns the interval (frequency) at which the upkeep needs to be performed
      * @return Returns the interval, an integer
@@ -56,5 +65,109 @@ interface IVariableRateUpdater is AutomationCompatibleInterface {
      * @return Returns the counter, an integer
      */
     function counter() external view returns(uint256);
+
+    /**
+     * @notice Returns the observation of the time-weighted accumulator for a certain index
+     * @param index Index in the ring, observations are indexed like the utilization history
+     * @return blockTimestamp The timestamp of the sample
+     * @return utilizationCumulative The accumulator at the sample, utilization (ray) times seconds
+     */
+    function observations(uint256 index) external view returns (uint32 blockTimestamp, uint224 utilizationCumulative);
+
+    /**
+     * @notice Returns the utilization recorded at the last sample
+     * @return Returns the utilization, expressed in ray
+     */
+    function lastUtilization() external view returns (uint256);
+
+    /**
+     * @notice Returns the utilization accumulator extrapolated to the current block
+     * @return Returns the accumulator, modulo 2**224
+     */
+    function currentUtilizationCumulative() external view returns (uint224);
+
+    /**
+     * @notice Returns the time-weighted average utilization between an observation and the current block
+     * @param observationsAgo Number of samples to look back, 0 is the latest sample
+     * @return twau The average utilization, expressed in ray
+     * @return period The number of seconds the average covers
+     */
+    function timeWeightedAverageUtilization(uint256 observationsAgo) external view returns (uint256 twau, uint256 period);
+
+    /**
+     * @notice Returns how the utilization history is aggregated: 0 mean, 1 median, 2 trimmed mean
+     * @return Returns an integer
+     */
+    function aggregation() external view returns (uint8);
+
+    /**
+     * @notice Returns the number of samples dropped at each end of the sorted window by the trimmed mean
+     * @return Returns an integer
+     */
+    function trim() external view returns (uint8);
+
+    /**
+     * @notice Sets how the utilization history is aggregated
+     * @dev Only callable by pool configurator
+     * @param aggregation 0 mean, 1 median, 2 trimmed mean
+     * @param trim The number of samples dropped at each end by the trimmed mean, 0 for the other aggregations
+     */
+    function setAggregation(uint8 aggregation, uint8 trim) external;
+
+    /**
+     * @notice Returns the aggregated utilization history used by checkUpkeep
+     * @return Returns the utilization, expressed in ray
+     */
+    function aggregatedUtilization() external view returns (uint256);
+
+    /**
+     * @notice Returns the index of the utilization history holding the sample of a given rank
+     * @param rank The rank, 0 is the lowest utilization
+     * @return Returns the index
+     */
+    function sortedIndex(uint256 rank) external view returns (uint256);
+
+    /**
+     * @notice Returns the number of samples averaged by the short horizon of the early adjustment rule
+     * @return Returns an integer
+     */
+    function shortHorizon() external view returns (uint8);
+
+    /**
+     * @notice Returns the deviation above which checkUpkeep uses the short horizon mean, 0 when disabled
+     * @return Returns the threshold, expressed in bps of utilization
+     */
+    function earlyAdjustmentThreshold() external view returns (uint16);
+
+    /**
+     * @notice Sets the early adjustment rule
+     * @dev Only callable by pool configurator
+     * @param shortHorizon The number of samples of the short horizon, between 1 and 59, 0 when disabled
+     * @param threshold The deviation threshold, expressed in bps of utilization, 0 disables the rule
+     */
+    function setEarlyAdjustment(uint8 shortHorizon, uint16 threshold) external;
+
+    /**
+     * @notice Returns the mean of the last samples, in O(1)
+     * @param samples The horizon, in samples, between 1 and 60
+     * @return Returns the utilization, expressed in ray
+     */
+    function horizonAverage(uint256 samples) external view returns (uint256);
+
+    /**
+     * @notice Returns the utilization checkUpkeep adjusts the slope on
+     * @return utilization The utilization, expressed in ray
+     * @return early Whether the early adjustment rule triggered
+     */
+    function upkeepUtilization() external view returns (uint256 utilization, bool early);
+
+    /**
+     * @notice Returns the current utilization, the utilization checkUpkeep adjusts the slope on and whether an upkeep
+     * is due
+     * @return currentUtilization The utilization of the reserve, expressed in ray
+     * @return utilization The utilization of the performData slope, expressed in ray
+     * @return due Whether an upkeep is due
+     */
+    function upkeepDue() external view returns (uint256 currentUtilization, uint256 utilization, bool due);
     
 }
\ No newline at end of file
@@ -0,0 +1,180 @@
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+from scripts.rpc import batch_request, request
+
+'''
+Brownie-free client for the keeper and the analytics processes.
+
+Contracts are loaded from the JSON of the brownie build (`brownie compile`), without importing brownie. Calls go
+straight to the node through scripts.rpc, the endpoint is a node URL or a scripts.rpc_pool.RPCPool. eth_abi and
+eth_utils are only imported on first use, importing this module costs little more than importing requests.
+
+    updater = ContractClient.at(endpoint, "VariableRateUpdater", address)
+    upkeep_needed, perform_data = updater.call("checkUpkeep", b"")
+    counter, last_time_stamp = updater.call_many([("counter", ()), ("lastTimeStamp", ())])
+'''
+
+ROOT = Path(__file__).resolve().parent.parent
+BUILD_DIR = ROOT / "build" / "contracts"
+RECEIPT_POLL = 0.2
+
+
+class ArtifactNotFound(FileNotFoundError):
+    pass
+
+
+@lru_cache(maxsize=None)
+def load_artifact(name: str) -> dict:
+    '''
+    {"contractName", "abi", "bytecode", "selectors"} from the brownie build, the selectors are computed on first use.
+    '''
+    path = BUILD_DIR / f"{name}.json"
+    if not path.exists():
+        raise ArtifactNotFound(f"no build artifact for {name}, run `brownie compile`")
+    build = json.loads(path.read_text())
+    return {"contractName": name, "abi": build["abi"], "bytecode": build["bytecode"], "selectors": None}
+
+def canonical_type(abi_input: dict) -> str:
+    '''
+    Type of an ABI input or output as used in signatures and by eth_abi, tuples are expanded.
+    '''
+    abi_type = abi_input["type"]
+    if abi_type.startswith("tuple"):
+        return "(" + ",".join(canonical_type(component) for component in abi_input["components"]) + ")" + abi_type[5:]
+    return abi_type
+
+def function_selector(signature: str) -> str:
+    from eth_utils import keccak
+
+    return keccak(text=signature)[:4].hex()
+
+def wait_for_receipt(endpoint, tx_hash: str, timeout: float = 120) -> dict:
+    deadline = time.time() + timeout
+    while True:
+        receipt = request(endpoint, "eth_getTransactionReceipt", [tx_hash])
+        if receipt is not None:
+            return receipt
+        if time.time() > deadline:
+            raise TimeoutError(f"{tx_hash} not mined after {timeout}s")
+        time.sleep(RECEIPT_POLL)
+
+
+class ContractClient:
+    def __init__(self, endpoint, address: str, abi: list, selectors: Optional[dict] = None):
+        self.endpoint = endpoint
+        self.address = address
+        self.abi = abi
+        self._functions = {item["name"]: item for item in abi if item.get("type") == "function"}
+        self._selectors = dict(selectors or {})
+
+    @classmethod
+    def at(cls, endpoint, name: str, address: str) -> "ContractClient":
+        artifact = load_artifact(name)
+        return cls(endpoint, address, artifact["abi"], artifact["selectors"])
+
+    def _function(self, name: str) -> dict:
+        try:
+            return self._functions[name]
+        except KeyError:
+            raise AttributeError(f"no function {name} in the ABI of {self.address}") from None
+
+    def selector(self, name: str) -> str:
+        if name not in self._selectors:
+            function = self._function(name)
+            inputs = ",".join(canonical_type(abi_input) for abi_input in function["inputs"])
+            self._selectors[name] = function_selector(f"{name}({inputs})")
+        return self._selectors[name].removeprefix("0x")
+
+    def encode_input(self, name: str, *args) -> str:
+        from eth_abi import encode
+
+        types = [canonical_type(abi_input) for abi_input in self._function(name)["inputs"]]
+        assert len(args) == len(types), f"{name} takes {len(types)} arguments"
+        return "0x" + self.selector(name) + encode(types, list(args)).hex()
+
+    def decode_output(self, name: str, data: str):
+        '''
+        A single value for functions with one output, a tuple otherwise.
+        '''
+        from eth_abi import decode
+
+        types = [canonical_type(output) for output in self._function(name)["outputs"]]
+        values = decode(types, bytes.fromhex(data.removeprefix("0x")))
+        return values[0] if len(values) == 1 else values
+
+    def _call(self, name: str, args, block, state_override):
+        params = [{"to": self.address, "data": self.encode_input(name, *args)}, block]
+        if state_override is not None:
+            params.append(state_override)
+        return ("eth_call", params)
+
+    def call(self, name: str, *args, block="latest", state_override: Optional[dict] = None):
+        if isinstance(block, int):
+            block = hex(block)
+        return self.decode_output(name, request(self.endpoint, *self._call(name, args, block, state_override)))
+
+    def call_many(self, calls: List[Tuple[str, tuple]], block="latest") -> list:
+        '''
+        (function name, arguments) pairs in JSON-RPC batches, all pinned to the same block.
+        '''
+        return call_batch(self.endpoint, [(self, name, args) for name, args in calls], block)
+
+    def transact(self, name: str, *args, sender: str, gas: Optional[int] = None, wait: bool = True):
+        '''
+        Sends from an account unlocked on the node, returns the receipt or the hash when not waiting. Keepers
+        signing their own transactions use scripts.tx_submitter.
+        '''
+        tx = {"from": sender, "to": self.address, "data": self.encode_input(name, *args)}
+        if gas is not None:
+            tx["gas"] = hex(gas)
+        tx_hash = request(self.endpoint, "eth_sendTransaction", [tx])
+        if not wait:
+            return tx_hash
+        receipt = wait_for_receipt(self.endpoint, tx_hash)
+        assert int(receipt["status"], 16) == 1, f"{name} reverted in {tx_hash}"
+        return receipt
+
+
+def call_batch(endpoint, calls: List[Tuple[ContractClient, str, tuple]], block="latest", reader=None) -> list:
+    '''
+    (contract, function name, arguments) triples over several contracts in JSON-RPC batches, pinned to one block.
+    With a scripts.rpc_cache.CachedReader, only its cache misses are sent: the reader moves to `block` when it is a
+    number, "latest" reads at the block of the reader.
+    '''
+    if reader is not None:
+        if isinstance(block, int):
+            reader.advance(block)
+        return reader.call_many(calls)
+    if isinstance(block, int):
+        block = hex(block)
+    results = batch_request(endpoint, [contract._call(name, args, block, None) for contract, name, args in calls])
+    return [contract.decode_output(name, result) for (contract, name, _), result in zip(calls, results)]
+
+def deploy(endpoint, name: str, *args, sender: str, gas: Optional[int] = None) -> ContractClient:
+    '''
+    Deploys a contract from its artifact with an account unlocked on the node.
+    '''
+    from eth_abi import encode
+
+    artifact = load_artifact(name)
+    constructor = next((item for item in artifact["abi"] if item["type"] == "constructor"), {"inputs": []})
+    types = [canonical_type(abi_input) for abi_input in constructor["inputs"]]
+    data = "0x" + artifact["bytecode"].removeprefix("0x") + encode(types, list(args)).hex()
+    tx = {"from": sender, "data": data}
+    if gas is not None:
+        tx["gas"] = hex(gas)
+    receipt = wait_for_receipt(endpoint, request(endpoint, "eth_sendTransaction", [tx]))
+    assert int(receipt["status"], 16) == 1, f"deployment of {name} reverted"
+    return ContractClient(endpoint, receipt["contractAddress"], artifact["abi"], artifact["selectors"])
+
+def deploy_dynamic_rate_strategy(endpoint, rate_strategy_params, sender: str) -> ContractClient:
+    '''
+    Same as scripts.setup_mock_env.deploy_dynamic_rate_strategy, the sender must be the pool configurator.
+    '''
+    strategy = deploy(endpoint, "DynamicRateStrategy", *rate_strategy_params.constructor_args(), sender=sender)
+    strategy.transact("setMPlus", rate_strategy_params.mPlus, sender=sender)
+    strategy.transact("setMMinus", rate_strategy_params.mMinus, sender=sender)
+    return strategy
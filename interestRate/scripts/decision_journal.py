@@ -0,0 +1,413 @@
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from scripts.client import ContractClient, call_batch
+from scripts.rpc import request
+from scripts import rate_model
+
+'''
+Append-only journal of the keeper decisions, for audits and post-mortems.
+
+Every upkeep is one fixed-width record: the inputs of checkUpkeep (history window, counter, time of the last
+sample, aggregation settings, average and current utilization, upkeep parameters of the strategy and slope before the
+upkeep), the utilization checkUpkeep adjusted the slope on and the performData slope, and the outcome (transaction
+hash, gas used, slope of the strategy after the transaction). Records are appended with a single write and read back
+through a memory map as a NumPy structured array, without parsing.
+
+The index is the reserve table of the `.idx` sidecar (updater addresses, the records store a 2 byte id) and the
+order of the records: timestamps never decrease, a time range is a binary search and a reserve a mask over the ids
+of that range. replay() runs the records through scripts/rate_model.py to check that the keeper and the chain did
+what the model says.
+
+    journal = DecisionJournal("keeper.journal")
+    decision = read_decision_inputs(endpoint, updater, strategy, block)   # before sending the upkeep
+    journal.append(complete_decision(endpoint, decision, strategy, tx_hash))  # once mined
+    mismatches = replay(journal, journal.query(updater, start, end))
+
+Usage: python -m scripts.decision_journal <journal> [<updater>]
+'''
+
+MAGIC = b"KPRJRNL\0"
+VERSION = 2
+HEADER_SIZE = 16
+ADDRESS_SIZE = 20
+# ray values (utilizations, rates) are stored as big endian uint128
+UINT128 = ("u1", (16,))
+
+RECORD = np.dtype([
+    ("timestamp", "<u8"),
+    ("blockNumber", "<u8"),
+    ("reserve", "<u2"),
+    ("aggregation", "u1"),
+    ("trim", "u1"),
+    ("shortHorizon", "u1"),
+    ("success", "u1"),
+    ("earlyAdjustmentThreshold", "<u2"),
+    ("counter", "<u8"),
+    ("lastTimeStamp", "<u8"),
+    ("latestSampleTimestamp", "<u8"),
+    ("utilizationHistory", "u1", (rate_model.WINDOW, 16)),
+    ("avgUtilization", UINT128),
+    ("liveUtilization", UINT128),
+    ("slopeUtilization", UINT128),
+    ("optimalUsageRatio", UINT128),
+    ("epsilon", UINT128),
+    ("mPlus", "<u8"),
+    ("mMinus", "<u8"),
+    ("oldSlope", UINT128),
+    ("newSlope", UINT128),
+    ("appliedSlope", UINT128),
+    ("txHash", "u1", (32,)),
+    ("gasUsed", "<u8"),
+])
+# the ray fields, in the order of KeeperDecision
+UINT128_FIELDS = (
+    "avgUtilization",
+    "liveUtilization",
+    "slopeUtilization",
+    "optimalUsageRatio",
+    "epsilon",
+    "oldSlope",
+    "newSlope",
+    "appliedSlope"
+)
+
+
+@dataclass
+class KeeperDecision:
+    updater: str
+    timestamp: int
+    blockNumber: int
+    counter: int
+    lastTimeStamp: int
+    # time of the latest sample, newer than lastTimeStamp once an early upkeep refreshed it
+    latestSampleTimestamp: int
+    aggregation: int
+    trim: int
+    shortHorizon: int
+    earlyAdjustmentThreshold: int
+    utilizationHistory: List[int]
+    avgUtilization: int
+    # utilization of the reserve at the block
+    liveUtilization: int
+    # utilization of the performData slope, the short horizon mean when the early adjustment rule made the upkeep due
+    slopeUtilization: int
+    optimalUsageRatio: int
+    epsilon: int
+    mPlus: int
+    mMinus: int
+    oldSlope: int
+    # slope of the performData
+    newSlope: int
+    # outcome, set once the upkeep is mined
+    appliedSlope: int = 0
+    txHash: str = "0x" + "00" * 32
+    gasUsed: int = 0
+    success: bool = False
+
+
+@dataclass
+class Mismatch:
+    record: int
+    field: str
+    recorded: int
+    expected: int
+
+
+def _uint128(value: int) -> np.ndarray:
+    assert 0 <= value < 2**128, "does not fit in 128 bits"
+    return np.frombuffer(value.to_bytes(16, "big"), dtype=np.uint8)
+
+def uint128_column(column: np.ndarray) -> np.ndarray:
+    '''
+    Object array of python integers from a uint128 column (or a history column, any shape ending in 16 bytes).
+    '''
+    words = np.ascontiguousarray(column).view(">u8")
+    return (words[..., 0].astype(object) << 64) | words[..., 1].astype(object)
+
+
+class DecisionJournal:
+    def __init__(self, path, fsync: bool = False):
+        '''
+        Opens the journal, creates it if needed. A record cut short by a crash is dropped. With fsync, every append
+        is on disk before it returns.
+        '''
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.fsync = fsync
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            header = MAGIC + VERSION.to_bytes(4, "little") + RECORD.itemsize.to_bytes(4, "little")
+            self.path.write_bytes(header)
+            self.index_path.write_bytes(b"")
+        with open(self.path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+        assert header[:8] == MAGIC, f"{self.path} is not a keeper journal"
+        assert int.from_bytes(header[8:12], "little") == VERSION, "unsupported journal version"
+        assert int.from_bytes(header[12:16], "little") == RECORD.itemsize, "record layout mismatch"
+
+        size = self.path.stat().st_size
+        complete = HEADER_SIZE + (size - HEADER_SIZE) // RECORD.itemsize * RECORD.itemsize
+        if complete != size:
+            os.truncate(self.path, complete)
+        self._file = open(self.path, "ab")
+        index = self.index_path.read_bytes() if self.index_path.exists() else b""
+        self.reserves: List[str] = [
+            "0x" + index[k:k + ADDRESS_SIZE].hex() for k in range(0, len(index) - ADDRESS_SIZE + 1, ADDRESS_SIZE)
+        ]
+        self._reserve_ids: Dict[str, int] = {reserve: k for k, reserve in enumerate(self.reserves)}
+        self._records = None
+        records = self.records()
+        self._last_timestamp = int(records["timestamp"][-1]) if len(records) else 0
+
+    def __len__(self) -> int:
+        return (self.path.stat().st_size - HEADER_SIZE) // RECORD.itemsize
+
+    def close(self):
+        self._file.close()
+
+    def _reserve_id(self, updater: str) -> int:
+        updater = updater.lower()
+        if updater not in self._reserve_ids:
+            assert len(self.reserves) < 2**16, "reserve table full"
+            # the address is on disk before any record refers to it
+            with open(self.index_path, "ab") as index:
+                index.write(bytes.fromhex(updater.removeprefix("0x")))
+                index.flush()
+                if self.fsync:
+                    os.fsync(index.fileno())
+            self._reserve_ids[updater] = len(self.reserves)
+            self.reserves.append(updater)
+        return self._reserve_ids[updater]
+
+    def append(self, decision: KeeperDecision) -> int:
+        '''
+        Writes the decision, returns its record number. Decisions must come in time order.
+        '''
+        assert decision.timestamp >= self._last_timestamp, "decisions must be appended in time order"
+        assert len(decision.utilizationHistory) == rate_model.WINDOW, "history window"
+        record = np.zeros((), dtype=RECORD)
+        record["timestamp"] = decision.timestamp
+        record["blockNumber"] = decision.blockNumber
+        record["reserve"] = self._reserve_id(decision.updater)
+        record["aggregation"] = decision.aggregation
+        record["trim"] = decision.trim
+        record["shortHorizon"] = decision.shortHorizon
+        record["success"] = decision.success
+        record["earlyAdjustmentThreshold"] = decision.earlyAdjustmentThreshold
+        record["counter"] = decision.counter
+        record["lastTimeStamp"] = decision.lastTimeStamp
+        record["latestSampleTimestamp"] = decision.latestSampleTimestamp
+        record["utilizationHistory"] = np.frombuffer(
+            b"".join(sample.to_bytes(16, "big") for sample in decision.utilizationHistory), dtype=np.uint8
+        ).reshape(rate_model.WINDOW, 16)
+        for name in UINT128_FIELDS:
+            record[name] = _uint128(getattr(decision, name))
+        record["mPlus"] = decision.mPlus
+        record["mMinus"] = decision.mMinus
+        record["txHash"] = np.frombuffer(bytes.fromhex(decision.txHash.removeprefix("0x")), dtype=np.uint8)
+        record["gasUsed"] = decision.gasUsed
+
+        self._file.write(record.tobytes())
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._last_timestamp = decision.timestamp
+        return len(self) - 1
+
+    def records(self) -> np.ndarray:
+        '''
+        Read-only memory map of the complete records, remapped when the journal has grown.
+        '''
+        count = len(self)
+        if self._records is None or len(self._records) != count:
+            if count == 0:
+                self._records = np.zeros(0, dtype=RECORD)
+            else:
+                self._records = np.memmap(self.path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(count,))
+        return self._records
+
+    def query(self, updater: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        '''
+        Record numbers of the decisions of `updater` (all reserves by default) with start <= timestamp < end.
+        '''
+        records = self.records()
+        timestamps = records["timestamp"]
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = len(records) if end is None else int(np.searchsorted(timestamps, end, side="left"))
+        selected = np.arange(first, last)
+        if updater is not None:
+            reserve = self._reserve_ids.get(updater.lower())
+            if reserve is None:
+                return selected[:0]
+            selected = selected[records["reserve"][first:last] == reserve]
+        return selected
+
+    def decision(self, k: int) -> KeeperDecision:
+        record = self.records()[k]
+        history = uint128_column(record["utilizationHistory"])
+        return KeeperDecision(
+            self.reserves[int(record["reserve"])],
+            int(record["timestamp"]),
+            int(record["blockNumber"]),
+            int(record["counter"]),
+            int(record["lastTimeStamp"]),
+            int(record["latestSampleTimestamp"]),
+            int(record["aggregation"]),
+            int(record["trim"]),
+            int(record["shortHorizon"]),
+            int(record["earlyAdjustmentThreshold"]),
+            [int(sample) for sample in history],
+            *(int(uint128_column(record[name])) for name in UINT128_FIELDS[:5]),
+            int(record["mPlus"]),
+            int(record["mMinus"]),
+            *(int(uint128_column(record[name])) for name in UINT128_FIELDS[5:]),
+            "0x" + bytes(record["txHash"]).hex(),
+            int(record["gasUsed"]),
+            bool(record["success"])
+        )
+
+
+def replay(journal: DecisionJournal, records: Optional[Sequence[int]] = None) -> List[Mismatch]:
+    '''
+    Recomputes every decision with the off-chain model: the average utilization from the history window, the
+    utilization of the slope (the early adjustment rule between two samples, on the current utilization), the
+    performData slope from the upkeep parameters, and checks that the mined upkeep set that slope.
+    '''
+    if records is None:
+        records = range(len(journal))
+    mismatches = []
+    for k in records:
+        decision = journal.decision(int(k))
+        avg_utilization, _ = rate_model.upkeep_utilization(
+            decision.utilizationHistory,
+            decision.counter,
+            decision.aggregation,
+            decision.trim,
+            decision.shortHorizon,
+            decision.earlyAdjustmentThreshold
+        )
+        slope_utilization = avg_utilization
+        # the early upkeep of an interval refreshes the latest sample, the rule doesn't fire again until the next one
+        within_interval = decision.timestamp - decision.lastTimeStamp <= rate_model.INTERVAL
+        if within_interval and decision.latestSampleTimestamp == decision.lastTimeStamp:
+            early, short_average = rate_model.early_adjustment(
+                decision.utilizationHistory,
+                decision.counter,
+                decision.liveUtilization,
+                decision.aggregation,
+                decision.trim,
+                decision.shortHorizon,
+                decision.earlyAdjustmentThreshold
+            )
+            if early:
+                slope_utilization = short_average
+        new_slope = rate_model.next_variable_rate_slope_1(
+            decision.slopeUtilization,
+            decision.oldSlope,
+            decision.optimalUsageRatio,
+            decision.epsilon,
+            decision.mPlus,
+            decision.mMinus
+        )
+        expected = {
+            "avgUtilization": avg_utilization,
+            "slopeUtilization": slope_utilization,
+            "newSlope": new_slope,
+            "success": True
+        }
+        if decision.success:
+            expected["appliedSlope"] = decision.newSlope
+        for name, value in expected.items():
+            if getattr(decision, name) != value:
+                mismatches.append(Mismatch(int(k), name, getattr(decision, name), value))
+    return mismatches
+
+
+def read_decision_inputs(endpoint, updater: str, strategy: str, block="latest", reader=None) -> KeeperDecision:
+    '''
+    The checkUpkeep inputs of an updater/strategy pair in one batch, at the block the keeper checked. With a
+    scripts.rpc_cache.CachedReader, the settings and the history are only read again after they changed.
+    '''
+    updater_client = ContractClient.at(endpoint, "VariableRateUpdater", updater)
+    strategy_client = ContractClient.at(endpoint, "DynamicRateStrategy", strategy)
+    if reader is not None:
+        reader.advance(block if isinstance(block, int) else None)
+        block = reader.block_number
+    elif block == "latest":
+        block = int(request(endpoint, "eth_blockNumber", []), 16)
+    calls = [
+        (updater_client, "counter", ()),
+        (updater_client, "aggregation", ()),
+        (updater_client, "trim", ()),
+        (updater_client, "shortHorizon", ()),
+        (updater_client, "earlyAdjustmentThreshold", ()),
+        (updater_client, "lastTimeStamp", ()),
+        (updater_client, "upkeepUtilization", ()),
+        (updater_client, "upkeepDue", ()),
+        (updater_client, "checkUpkeep", (b"",)),
+        (strategy_client, "getUpkeepParameters", ()),
+    ] + [(updater_client, "utilizationHistory", (k,)) for k in range(rate_model.WINDOW)]
+    results = call_batch(endpoint, calls, block, reader)
+    counter, aggregation, trim, short_horizon, threshold, last_time_stamp, (avg_utilization, _) = results[:7]
+    (live_utilization, slope_utilization, _), (_, perform_data) = results[7:9]
+    optimal, epsilon, slope, m_plus, m_minus = results[9]
+    # the index of the latest sample depends on the counter read above
+    latest = (counter + rate_model.WINDOW - 1) % rate_model.WINDOW
+    (latest_sample_timestamp, _), = call_batch(endpoint, [(updater_client, "observations", (latest,))], block, reader)
+    timestamp = int(request(endpoint, "eth_getBlockByNumber", [hex(block), False])["timestamp"], 16)
+    return KeeperDecision(
+        updater,
+        timestamp,
+        block,
+        counter,
+        last_time_stamp,
+        latest_sample_timestamp,
+        aggregation,
+        trim,
+        short_horizon,
+        threshold,
+        list(results[10:]),
+        avg_utilization,
+        live_utilization,
+        slope_utilization,
+        optimal,
+        epsilon,
+        m_plus,
+        m_minus,
+        slope,
+        int.from_bytes(perform_data, "big")
+    )
+
+def complete_decision(endpoint, decision: KeeperDecision, strategy: str, tx_hash: str) -> KeeperDecision:
+    '''
+    Fills the outcome of the upkeep from its receipt and the slope of the strategy at the block it was mined in.
+    '''
+    receipt = request(endpoint, "eth_getTransactionReceipt", [tx_hash])
+    assert receipt is not None, f"{tx_hash} is not mined"
+    block = int(receipt["blockNumber"], 16)
+    decision.txHash = tx_hash
+    decision.gasUsed = int(receipt["gasUsed"], 16)
+    decision.success = int(receipt["status"], 16) == 1
+    decision.appliedSlope = ContractClient.at(endpoint, "DynamicRateStrategy", strategy).call(
+        "getVariableRateSlope1", block=block
+    )
+    return decision
+
+
+def main(path, updater=None):
+    journal = DecisionJournal(path)
+    records = journal.query(updater)
+    print(f"{len(records)} decisions, {len(journal.reserves)} reserves")
+    mismatches = replay(journal, records)
+    for mismatch in mismatches:
+        print(f"record {mismatch.record}: {mismatch.field} {mismatch.recorded} != {mismatch.expected}")
+    print("replay matches" if not mismatches else f"{len(mismatches)} mismatches")
+    journal.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    main(*sys.argv[1:])
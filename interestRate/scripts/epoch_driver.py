@@ -0,0 +1,184 @@
+from dataclasses import dataclass, field
+from typing import List
+from brownie import accounts, web3
+from scripts.rpc import batch_request, set_automine
+from scripts import rate_model
+
+'''
+Fast-forward driver for long on-chain keeper scenarios on a local node.
+
+Instead of one chain.sleep/chain.mine/checkUpkeep/performUpkeep round trip per step, the driver turns automine off,
+computes the performData off-chain with scripts/rate_model.py and, for every epoch, sends the debt token supply update
+and the performUpkeep as one batch with locally assigned nonces, then mines the block at an explicit timestamp.
+The updater and strategy state is snapshotted at every epoch block in a single batch of historical eth_calls at the
+end, together with checkUpkeep at the previous block to verify that the performed slopes are the ones the contract
+recommends.
+
+Usage: brownie run scripts/epoch_driver.py
+'''
+
+RAY = rate_model.RAY
+# gas limit of the driver transactions, no estimation round trip
+TX_GAS = 1_000_000
+
+
+@dataclass
+class EpochSnapshots:
+    '''
+    One entry per epoch, state after the epoch block.
+    '''
+    blockNumber: List[int] = field(default_factory=list)
+    timestamp: List[int] = field(default_factory=list)
+    utilization: List[int] = field(default_factory=list)
+    counter: List[int] = field(default_factory=list)
+    lastUtilization: List[int] = field(default_factory=list)
+    variableRateSlope1: List[int] = field(default_factory=list)
+    # slope returned by checkUpkeep on the previous block, what a keeper would have performed
+    recommendedSlope: List[int] = field(default_factory=list)
+    performGasUsed: List[int] = field(default_factory=list)
+
+    def to_numpy(self):
+        '''
+        Returns the columns as NumPy object arrays (ray values don't fit in int64).
+        '''
+        import numpy as np
+        return {name: np.array(values, dtype=object) for name, values in self.__dict__.items()}
+
+
+def _transaction(sender, nonce, contract_method, *args):
+    return ("eth_sendTransaction", [{
+        "from": sender,
+        "to": contract_method._address,
+        "data": contract_method.encode_input(*args),
+        "gas": hex(TX_GAS),
+        "nonce": hex(nonce),
+    }])
+
+def _call(contract_method, block_number, *args):
+    return ("eth_call", [
+        {"to": contract_method._address, "data": contract_method.encode_input(*args)},
+        hex(block_number)
+    ])
+
+def read_model_state(env, endpoint):
+    '''
+    Reads what the off-chain model needs to reproduce checkUpkeep, in one batch.
+    '''
+    variable_rate_updater = env["VariableRateUpdater"]
+    dynamic_rate_strategy = env["DynamicRateStrategy"]
+    block_number = web3.eth.block_number
+    calls = [
+        _call(dynamic_rate_strategy.getUpkeepParameters, block_number),
+        _call(variable_rate_updater.counter, block_number),
+        _call(variable_rate_updater.lastTimeStamp, block_number),
+        _call(variable_rate_updater.aggregation, block_number),
+        _call(variable_rate_updater.trim, block_number),
+        _call(variable_rate_updater.shortHorizon, block_number),
+        _call(variable_rate_updater.earlyAdjustmentThreshold, block_number),
+    ] + [_call(variable_rate_updater.utilizationHistory, block_number, k) for k in range(rate_model.WINDOW)]
+    raw = batch_request(endpoint, calls)
+    upkeep_parameters = dynamic_rate_strategy.getUpkeepParameters.decode_output(raw[0])
+    counter = variable_rate_updater.counter.decode_output(raw[1])
+    last_time_stamp = variable_rate_updater.lastTimeStamp.decode_output(raw[2])
+    aggregation = (
+        variable_rate_updater.aggregation.decode_output(raw[3]),
+        variable_rate_updater.trim.decode_output(raw[4]),
+        variable_rate_updater.shortHorizon.decode_output(raw[5]),
+        variable_rate_updater.earlyAdjustmentThreshold.decode_output(raw[6])
+    )
+    history = [variable_rate_updater.utilizationHistory.decode_output(value) for value in raw[7:]]
+    return upkeep_parameters, counter, last_time_stamp, aggregation, history
+
+def run_epochs(env, utilizations: List[int], sender=None, interval=None) -> EpochSnapshots:
+    '''
+    Advances the chain by one upkeep per entry of `utilizations` (expressed in ray).
+    The mock reserve of `env` (see setup_mock_env.deploy_mock_reserve) must be used, the deployer of the mocks
+    sends the transactions.
+    '''
+    sender = (sender or accounts[0]).address
+    endpoint = web3.provider.endpoint_uri
+    variable_rate_updater = env["VariableRateUpdater"]
+    dynamic_rate_strategy = env["DynamicRateStrategy"]
+    a_token, variable_debt_token = env["AToken"], env["VariableDebtToken"]
+    if interval is None:
+        interval = variable_rate_updater.INTERVAL() + 1
+
+    state = read_model_state(env, endpoint)
+    (optimal, epsilon, slope, m_plus, m_minus), counter, last_time_stamp, aggregation, history = state
+    # evm_mine only accepts increasing timestamps
+    timestamp = max(last_time_stamp, web3.eth.get_block("latest")["timestamp"])
+    nonce = web3.eth.get_transaction_count(sender)
+    total_reserve = 100 * RAY
+
+    snapshots = EpochSnapshots()
+    perform_hashes = []
+    set_automine(endpoint, False)
+    try:
+        calls = [_transaction(sender, nonce, a_token.setTotalSupply, total_reserve)]
+        nonce += 1
+        for utilization in utilizations:
+            timestamp += interval
+            total_debt = rate_model.ray_mul(utilization, total_reserve)
+
+            utilization_used, _ = rate_model.upkeep_utilization(history, counter, *aggregation)
+            slope = rate_model.next_variable_rate_slope_1(
+                utilization_used, slope, optimal, epsilon, m_plus, m_minus
+            )
+            history[counter % rate_model.WINDOW] = rate_model.usage_ratio(total_debt, total_reserve)
+            counter += 1
+
+            calls.append(_transaction(sender, nonce, variable_debt_token.setTotalSupply, total_debt))
+            calls.append(_transaction(sender, nonce + 1, variable_rate_updater.performUpkeep, slope.to_bytes(32, "big")))
+            nonce += 2
+            perform_hashes.append(batch_request(endpoint, calls)[-1])
+            # the pending transactions are mined in nonce order
+            batch_request(endpoint, [("evm_mine", [timestamp])])
+            calls = []
+            snapshots.timestamp.append(timestamp)
+            snapshots.utilization.append(history[(counter - 1) % rate_model.WINDOW])
+    finally:
+        set_automine(endpoint, True)
+
+    receipts = batch_request(endpoint, [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in perform_hashes])
+    for receipt in receipts:
+        assert int(receipt["status"], 16) == 1, f"performUpkeep reverted in block {int(receipt['blockNumber'], 16)}"
+        snapshots.blockNumber.append(int(receipt["blockNumber"], 16))
+        snapshots.performGasUsed.append(int(receipt["gasUsed"], 16))
+
+    calls = []
+    for block_number in snapshots.blockNumber:
+        calls += [
+            _call(variable_rate_updater.counter, block_number),
+            _call(variable_rate_updater.lastUtilization, block_number),
+            _call(dynamic_rate_strategy.getVariableRateSlope1, block_number),
+            _call(variable_rate_updater.checkUpkeep, block_number - 1, b""),
+        ]
+    raw = batch_request(endpoint, calls)
+    for k in range(0, len(raw), 4):
+        snapshots.counter.append(variable_rate_updater.counter.decode_output(raw[k]))
+        snapshots.lastUtilization.append(variable_rate_updater.lastUtilization.decode_output(raw[k + 1]))
+        snapshots.variableRateSlope1.append(dynamic_rate_strategy.getVariableRateSlope1.decode_output(raw[k + 2]))
+        _, perform_data = variable_rate_updater.checkUpkeep.decode_output(raw[k + 3])
+        snapshots.recommendedSlope.append(int.from_bytes(bytes(perform_data)[:32], "big"))
+    return snapshots
+
+
+def main():
+    import math
+    import time
+    from scripts.setup_mock_env import deploy_mock_reserve
+
+    deployer_account = accounts[0]
+    env = deploy_mock_reserve(deployer_account, [80 * 10**25] * rate_model.WINDOW)
+
+    # a year of upkeeps, utilization oscillating around the optimal usage ratio
+    epochs = 2 * 365
+    utilizations = [int((0.75 + 0.15 * math.sin(2 * math.pi * k / 120)) * RAY) for k in range(epochs)]
+
+    start = time.time()
+    snapshots = run_epochs(env, utilizations)
+    elapsed = time.time() - start
+
+    mismatches = sum(a != b for a, b in zip(snapshots.variableRateSlope1, snapshots.recommendedSlope))
+    print(f"{epochs} epochs in {elapsed:.1f}s, {mismatches} slopes differ from checkUpkeep")
+    print(f"final slope1: {snapshots.variableRateSlope1[-1] / RAY:.4%}")
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+
+'''
+JSON-RPC proxy injecting faults in front of a node, to exercise scripts/rpc_pool.py against several "nodes" backed
+by one local chain.
+
+    with FaultProxy(web3.provider.endpoint_uri) as proxy:
+        proxy.delay = 0.5     # seconds added to every request
+        proxy.down = True     # answers HTTP 503
+        proxy.drop = True     # closes the connection without answering
+        proxy.lag = 5         # reports a head 5 blocks behind
+        proxy.fork = True     # reports different block hashes
+        proxy.error = "header not found"  # answers every call with this JSON-RPC error
+        proxy.unsupported = {"txpool_content"}  # methods answered as not available
+'''
+
+
+class FaultProxy:
+    def __init__(self, upstream: str, host: str = "127.0.0.1"):
+        self.upstream = upstream
+        self.delay = 0
+        self.down = False
+        self.drop = False
+        self.lag = 0
+        self.fork = False
+        self.error = None
+        self.unsupported = set()
+        self.requests = 0
+        self._session = requests.Session()
+        self._server = ThreadingHTTPServer((host, 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._session.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _upstream(self, payload):
+        return self._session.post(self.upstream, json=payload, timeout=60).json()
+
+    def _rewrite_call(self, call):
+        # a lagging node answers "latest" with an older block
+        if self.lag and call["method"] == "eth_getBlockByNumber" and call["params"][0] == "latest":
+            head = int(self._upstream({"jsonrpc": "2.0", "id": 0, "method": "eth_blockNumber", "params": []})["result"], 16)
+            return dict(call, params=[hex(max(head - self.lag, 0))] + call["params"][1:])
+        return call
+
+    def _rewrite_reply(self, call, reply):
+        result = reply.get("result")
+        if self.lag and call["method"] == "eth_blockNumber" and result is not None:
+            return dict(reply, result=hex(max(int(result, 16) - self.lag, 0)))
+        if self.fork and call["method"] == "eth_getBlockByNumber" and isinstance(result, dict):
+            return dict(reply, result=dict(result, hash="0x" + "f" * 64))
+        return reply
+
+    def _fault(self, call):
+        if self.error:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": self.error}}
+        if call["method"] in self.unsupported:
+            message = f"the method {call['method']} does not exist/is not available"
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": message}}
+        return None
+
+    def _forward(self, payload):
+        calls = payload if isinstance(payload, list) else [payload]
+        replies = [reply for reply in map(self._fault, calls) if reply is not None]
+        forwarded = [call for call in calls if self._fault(call) is None]
+        if forwarded:
+            replies += self._upstream([self._rewrite_call(call) for call in forwarded])
+        replies = sorted(replies, key=lambda reply: reply["id"])
+        by_id = {call["id"]: call for call in calls}
+        replies = [self._rewrite_reply(by_id[reply["id"]], reply) for reply in replies]
+        return replies if isinstance(payload, list) else replies[0]
+
+    def _handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                proxy.requests += 1
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if proxy.delay:
+                    time.sleep(proxy.delay)
+                if proxy.drop:
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if proxy.down:
+                    self.send_error(503)
+                    return
+                data = json.dumps(proxy._forward(json.loads(body))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
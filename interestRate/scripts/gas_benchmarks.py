@@ -0,0 +1,165 @@
+from brownie import accounts, chain, web3, DynamicRateStrategy, VariableRateUpdater
+from scripts.rpc import request, RPCError
+from scripts.setup_mock_env import (
+    deploy_mocks,
+    deploy_mock_reserve,
+    deploy_dynamic_rate_factory,
+    deploy_with_factory,
+    default_rate_strategy_parameters,
+    reserve_deployment,
+    set_utilization
+)
+
+'''
+Gas benchmarks of the keeper path on a local chain.
+
+Usage: brownie run scripts/gas_benchmarks.py
+'''
+
+RAY = 10**27
+# (name, aggregation, trim, short horizon, early adjustment threshold in bps)
+AGGREGATIONS = (
+    ("mean", 0, 0, 0, 0),
+    ("median", 1, 0, 0, 0),
+    ("trimmed mean (6)", 2, 6, 0, 0),
+    ("mean, early adjustment (6 samples, 5%)", 0, 0, 6, 500),
+)
+EPOCHS = 70 # more than a WINDOW so the ring buffers are written over
+BATCH = 10
+
+
+def benchmark_upkeep(env, deployer_account, epochs=EPOCHS):
+    '''
+    Runs `epochs` upkeeps, returns the gas used by performUpkeep and the gas estimate of checkUpkeep for each of them.
+    '''
+    variable_rate_updater = env["VariableRateUpdater"]
+    interval = variable_rate_updater.INTERVAL()
+    check_gas, perform_gas = [], []
+    for epoch in range(epochs):
+        set_utilization(env, (70 + epoch % 20) * 10**25, deployer_account)
+        chain.sleep(interval + 1)
+        chain.mine(1)
+        check_gas.append(variable_rate_updater.checkUpkeep.estimate_gas(""))
+        _, data = variable_rate_updater.checkUpkeep("")
+        tx = variable_rate_updater.performUpkeep(data, {"from": deployer_account})
+        perform_gas.append(tx.gas_used)
+    return check_gas, perform_gas
+
+def benchmark_aggregations(deployer_account, epochs=EPOCHS):
+    '''
+    Runs the upkeep benchmark on a fresh reserve for each aggregation of the utilization history.
+    Returns {name: (check gas, perform gas, aggregatedUtilization gas)}.
+    '''
+    results = {}
+    for name, aggregation, trim, short_horizon, threshold in AGGREGATIONS:
+        env = deploy_mock_reserve(deployer_account, [80 * 10**25] * 60)
+        variable_rate_updater = env["VariableRateUpdater"]
+        variable_rate_updater.setAggregation(aggregation, trim, {"from": deployer_account})
+        variable_rate_updater.setEarlyAdjustment(short_horizon, threshold, {"from": deployer_account})
+        check_gas, perform_gas = benchmark_upkeep(env, deployer_account, epochs)
+        results[name] = (check_gas, perform_gas, [variable_rate_updater.aggregatedUtilization.estimate_gas()])
+    return results
+
+def benchmark_rates(dynamic_rate_strategy, env, deployer_account):
+    '''
+    Gas estimates and storage reads of the strategy reads, below and above the optimal usage ratio, for a strategy
+    deployed with its constructor or a factory clone. Returns {name: (gas, (SLOADs, distinct slots) or None)}.
+    '''
+    endpoint = web3.provider.endpoint_uri
+    token, a_token = env["Token"], env["AToken"]
+    token.setBalance(a_token, 100 * RAY, {"from": deployer_account})
+    calls = {"getUpkeepParameters": (dynamic_rate_strategy.getUpkeepParameters, ())}
+    for name, total_variable_debt in (("below optimal", 50 * RAY), ("above optimal", 900 * RAY)):
+        params = (0, 0, 0, 0, total_variable_debt, 0, 1_000, token.address, a_token.address)
+        calls[f"calculateInterestRates, {name}"] = (dynamic_rate_strategy.calculateInterestRates, (params,))
+    return {
+        name: (
+            method.estimate_gas(*args),
+            storage_reads(endpoint, dynamic_rate_strategy.address, method.encode_input(*args))
+        )
+        for name, (method, args) in calls.items()
+    }
+
+def benchmark_deployment(deployer_account, batch=BATCH):
+    '''
+    Gas of a strategy/updater pair deployed with full bytecode and setter transactions, compared to the factory.
+    Returns (direct, factory single, factory per reserve in a batch of `batch`).
+    '''
+    addresses_provider = deploy_mocks(deployer_account)["AddressesProvider"]
+    params = default_rate_strategy_parameters(addresses_provider)
+    history = [80 * 10**25] * 60
+    sender = {"from": deployer_account}
+
+    strategy = DynamicRateStrategy.deploy(
+        params.provider,
+        params.optimalUsageRatio,
+        params.baseVariableBorrowRate,
+        params.variableRateSlope1,
+        params.variableRateSlope2,
+        params.stableRateSlope1,
+        params.stableRateSlope2,
+        params.baseStableRateOffset,
+        params.stableRateExcessOffset,
+        params.optimalStableToTotalDebtRatio,
+        params.epsilon,
+        sender
+    )
+    updater = VariableRateUpdater.deploy(addresses_provider, accounts[1], history, sender)
+    direct = strategy.tx.gas_used + updater.tx.gas_used
+    direct += strategy.setMPlus(params.mPlus, sender).gas_used
+    direct += strategy.setMMinus(params.mMinus, sender).gas_used
+    direct += strategy.setVariableRateUpdater(updater, sender).gas_used
+
+    factory = deploy_dynamic_rate_factory(addresses_provider, deployer_account)
+    single = factory.deploy(reserve_deployment(params, accounts[1].address, history), sender).gas_used
+    deployments = [reserve_deployment(params, accounts[1].address, history, salt) for salt in range(1, batch + 1)]
+    batched = factory.deployBatch(deployments, sender).gas_used // batch
+    return direct, single, batched
+
+def summary(name, values):
+    print(f"{name:<40} first {values[0]:>8} mean {sum(values) // len(values):>8} max {max(values):>8}")
+
+
+def main():
+    deployer_account = accounts[0]
+    env = deploy_mock_reserve(deployer_account, [80 * 10**25] * 60)
+
+    check_gas, perform_gas = benchmark_upkeep(env, deployer_account)
+    summary("checkUpkeep (estimate)", check_gas)
+    summary("performUpkeep", perform_gas)
+
+    variable_rate_updater = env["VariableRateUpdater"]
+    summary("currentUtilizationCumulative", [variable_rate_updater.currentUtilizationCumulative.estimate_gas()])
+    summary(
+        "timeWeightedAverageUtilization(59)",
+        [variable_rate_updater.timeWeightedAverageUtilization.estimate_gas(59)]
+    )
+    for samples in (6, 60):
+        summary(f"horizonAverage({samples})", [variable_rate_updater.horizonAverage.estimate_gas(samples)])
+
+    aggregations = benchmark_aggregations(deployer_account)
+    for name, (check_gas, perform_gas, aggregate_gas) in aggregations.items():
+        summary(f"checkUpkeep, {name} (estimate)", check_gas)
+        summary(f"performUpkeep, {name}", perform_gas)
+        summary(f"aggregatedUtilization, {name}", aggregate_gas)
+    # the sorted aggregations against the plain mean
+    mean_perform = sum(aggregations["mean"][1]) // EPOCHS
+    for name, (_, perform_gas, _) in aggregations.items():
+        print(f"{'performUpkeep over the mean, ' + name:<40} {sum(perform_gas) // EPOCHS - mean_perform:>8}")
+
+    for name, (gas, reads) in benchmark_early_upkeep(deployer_account).items():
+        reads = "" if reads is None else f"  SLOAD {reads[0]:>2} slots {reads[1]:>2}"
+        print(f"{'early upkeep, ' + name:<40} {gas:>8}{reads}")
+
+    factory = deploy_dynamic_rate_factory(env["AddressesProvider"], deployer_account)
+    params = default_rate_strategy_parameters(env["AddressesProvider"])
+    clone, _ = deploy_with_factory(factory, params, env["Token"].address, [80 * 10**25] * 60, deployer_account)
+    for deployment, strategy in (("constructor", env["DynamicRateStrategy"]), ("clone", clone)):
+        for name, (gas, reads) in benchmark_rates(strategy, env, deployer_account).items():
+            reads = "" if reads is None else f"  SLOAD {reads[0]:>2} slots {reads[1]:>2}"
+            print(f"{f'{name}, {deployment} (estimate)':<56} {gas:>8}{reads}")
+
+    direct, single, batched = benchmark_deployment(deployer_account)
+    print(f"{'deployment, constructor + setters':<40} {direct:>8}")
+    print(f"{'deployment, factory':<40} {single:>8}")
+    print(f"{f'deployment, factory batch of {BATCH} (each)':<40} {batched:>8}")
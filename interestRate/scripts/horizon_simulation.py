@@ -0,0 +1,104 @@
+import random
+from scripts import constants
+from scripts.rate_model import RAY, INTERVAL, WINDOW, upkeep_utilization, early_adjustment
+
+'''
+Reaction latency of the keeper to a utilization regime change, with and without the early adjustment rule of
+VariableRateUpdater (short horizon mean used when it deviates from the 60 sample mean by more than a threshold).
+
+The slope goes down below optimal - epsilon and up above it, the latency is the time after the change until the keeper
+moves the slope in the direction of the new regime. The keeper checks every CHECK, utilization moves every CHECK with
+gaussian noise and one sample is taken per INTERVAL. Between two samples, the rule runs on the current utilization
+and makes the upkeep due early, at most once per interval, like checkUpkeep. The stationary scenario measures the
+price of the rule: the share of upkeeps where it fires, and where it moves the slope the other way than the 60 sample
+mean would, the spike scenario is a transient the rule reacts to. Early upkeeps are counted per interval.
+
+Usage: python -m scripts.horizon_simulation
+'''
+
+SEEDS = 50
+NOISE = 0.02
+CHECK = 3600
+CHECKS = INTERVAL // CHECK
+SAMPLES = 3 * WINDOW
+CHANGE = WINDOW
+# (name, short horizon in samples, threshold in bps)
+RULES = (("60 sample mean", 0, 0), ("early, 3d / 5%", 6, 500), ("early, 3d / 10%", 6, 1_000))
+# (name, utilization before the change, after the change, samples the change lasts)
+SCENARIOS = (
+    ("rise 60% -> 92%", 0.60, 0.92, SAMPLES),
+    ("fall 85% -> 55%", 0.85, 0.55, SAMPLES),
+    ("spike 60% -> 95% 2d", 0.60, 0.95, 4),
+    ("stationary 72%", 0.72, 0.72, SAMPLES),
+)
+
+THRESHOLD = constants.OPTIMAL_USAGE_RATIO - constants.EPSILON
+
+
+def utilization_path(rng, before, after, duration):
+    return [
+        int(min(max((after if CHANGE <= k // CHECKS < CHANGE + duration else before) + rng.gauss(0, NOISE), 0.0), 0.99)
+            * RAY)
+        for k in range(SAMPLES * CHECKS)
+    ]
+
+def run(rng, before, after, duration, short_horizon, threshold):
+    '''
+    Returns (latency in hours or None, share of upkeeps the rule fires on, share of upkeeps going against the 60
+    sample mean, early upkeeps per interval), counted after the change.
+    '''
+    path = utilization_path(rng, before, after, duration)
+    history = [int(before * RAY)] * WINDOW
+    raising = after * RAY >= THRESHOLD
+    latency = None
+    counter = upkeeps = early_count = against_count = early_upkeeps = 0
+    refreshed = False
+    for check, utilization in enumerate(path):
+        if check % CHECKS == 0:
+            history[counter % WINDOW] = utilization
+            counter += 1
+            refreshed = False
+            used, early = upkeep_utilization(history, counter, short_horizon=short_horizon,
+                                             early_adjustment_threshold=threshold)
+        elif refreshed:
+            continue
+        else:
+            early, used = early_adjustment(history, counter, utilization, short_horizon=short_horizon,
+                                           early_adjustment_threshold=threshold)
+            if not early:
+                continue
+            # the early upkeep refreshes the latest sample
+            history[(counter - 1) % WINDOW] = utilization
+            refreshed = True
+            if check >= CHANGE * CHECKS:
+                early_upkeeps += 1
+        if check < CHANGE * CHECKS:
+            continue
+        mean, _ = upkeep_utilization(history, counter)
+        upkeeps += 1
+        early_count += early
+        against_count += (used >= THRESHOLD) != (mean >= THRESHOLD)
+        if latency is None and (used >= THRESHOLD) == raising:
+            latency = (check - CHANGE * CHECKS) * CHECK / 3600
+    return latency, early_count / upkeeps, against_count / upkeeps, early_upkeeps / (SAMPLES - CHANGE)
+
+
+def main():
+    print(f"{'scenario':<20} {'rule':<18} {'latency':>18} {'early':>8} {'against mean':>13} {'early upkeeps':>14}")
+    for scenario, before, after, duration in SCENARIOS:
+        for rule, short_horizon, threshold in RULES:
+            runs = [
+                run(random.Random(seed), before, after, duration, short_horizon, threshold) for seed in range(SEEDS)
+            ]
+            latencies = [latency for latency, *_ in runs if latency is not None]
+            latency = sum(latencies) / len(latencies) if latencies else float("nan")
+            early, against, early_upkeeps = [sum(values) / SEEDS for values in list(zip(*runs))[1:]]
+            latency = f"{latency:.1f}h ({latency / 24:.1f} days)" if latencies and before != after else "-"
+            print(
+                f"{scenario:<20} {rule:<18} {latency:>18} {100 * early:>7.1f}% {100 * against:>12.1f}%"
+                f" {early_upkeeps:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
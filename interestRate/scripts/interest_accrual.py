@@ -0,0 +1,282 @@
+import time
+from dataclasses import dataclass
+import numpy as np
+from scripts.parameters import RateStrategyParameters, default_rate_strategy_parameters, ZERO_ADDRESS
+from scripts.rate_model import RAY, ray_mul, ray_div, percent_mul, calculate_interest_rates
+
+'''
+Accrual of the reserve indexes over rate paths, for many reserves and scenarios at once.
+
+Replicates MathUtils.calculateLinearInterest/calculateCompoundedInterest and ReserveLogic.updateState
+(_updateIndexes then _accrueToTreasury) of Aave v3 to the wei. The values are object arrays of python integers:
+NumPy broadcasts the batch axes (reserves, scenarios, ...) and the time steps are looped over, rays don't fit in
+int64 and float64 would drift from the contracts after a few steps.
+
+Rates are constant over a step, as between two pool interactions, rates[..., k] applies from timestamps[..., k]
+to timestamps[..., k + 1]. strategy_rates turns reserve states into the rate paths of DynamicRateStrategy.
+
+Usage: python -m scripts.interest_accrual
+'''
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+
+def integers(value) -> np.ndarray:
+    '''
+    Object array of python integers, numpy integers would overflow on rays.
+    '''
+    return np.vectorize(int, otypes=[object])(np.asarray(value, dtype=object))
+
+def _where(condition, a, b) -> np.ndarray:
+    return np.where(condition, np.asarray(a, dtype=object), np.asarray(b, dtype=object))
+
+def calculate_linear_interest(rate, last_update_timestamp, current_timestamp):
+    '''
+    Same as MathUtils.calculateLinearInterest at block.timestamp == current_timestamp, element wise.
+    '''
+    return RAY + rate * (current_timestamp - last_update_timestamp) // SECONDS_PER_YEAR
+
+def calculate_compounded_interest(rate, last_update_timestamp, current_timestamp):
+    '''
+    Same as MathUtils.calculateCompoundedInterest, element wise. The early return and the exp > 2 branch of the
+    contract need no special case: the terms they skip carry an exp or an exp - 1 factor.
+    '''
+    exp = current_timestamp - last_update_timestamp
+    base_power_two = ray_mul(rate, rate) // (SECONDS_PER_YEAR * SECONDS_PER_YEAR)
+    base_power_three = ray_mul(base_power_two, rate) // SECONDS_PER_YEAR
+    second_term = exp * (exp - 1) * base_power_two // 2
+    third_term = exp * (exp - 1) * (exp - 2) * base_power_three // 6
+    return RAY + rate * exp // SECONDS_PER_YEAR + second_term + third_term
+
+
+@dataclass
+class AccrualPaths:
+    '''
+    Reserve data after each step, arrays of shape batch + (steps + 1,), the first entry is the initial state.
+    '''
+    timestamps: np.ndarray
+    liquidityIndex: np.ndarray
+    variableBorrowIndex: np.ndarray
+    accruedToTreasury: np.ndarray
+
+    def _growth(self, index) -> np.ndarray:
+        return ray_div(index[..., -1], index[..., 0]).astype(np.float64) / RAY - 1
+
+    def supplier_yield(self) -> np.ndarray:
+        '''
+        Growth of the aToken balances over the path, 0.05 is 5%.
+        '''
+        return self._growth(self.liquidityIndex)
+
+    def borrower_cost(self) -> np.ndarray:
+        '''
+        Growth of the variable debt balances over the path.
+        '''
+        return self._growth(self.variableBorrowIndex)
+
+    def treasury_income(self) -> np.ndarray:
+        '''
+        Underlying minted to the treasury by Pool.mintToTreasury at the end of the path, less what was pending at
+        the start.
+        '''
+        return ray_mul(self.accruedToTreasury[..., -1], self.liquidityIndex[..., -1]) - \
+            ray_mul(self.accruedToTreasury[..., 0], self.liquidityIndex[..., 0])
+
+    def annualized(self, growth: np.ndarray) -> np.ndarray:
+        years = (self.timestamps[..., -1] - self.timestamps[..., 0]).astype(np.float64) / SECONDS_PER_YEAR
+        return (1 + growth) ** (1 / years) - 1
+
+
+def accrue_paths(
+    timestamps,
+    liquidity_rates,
+    variable_borrow_rates,
+    liquidity_index,
+    variable_borrow_index,
+    reserve_factor,
+    scaled_variable_debt=None,
+    total_variable_debt=None,
+    accrued_to_treasury=0,
+    principal_stable_debt=0,
+    average_stable_borrow_rate=0,
+    stable_debt_last_update_timestamp=None
+) -> AccrualPaths:
+    '''
+    Applies ReserveLogic.updateState at every timestamps[..., k + 1], the reserve being last updated at
+    timestamps[..., k] with the rates of step k.
+
+    The variable debt of each step is given either scaled (scaledTotalSupply of the variable debt token) or as a
+    balance, in which case it is scaled with the index at the start of the step like VariableDebtToken.mint would.
+    Step arrays are broadcast to batch + (steps,), the other inputs to the batch shape. The stable debt doesn't
+    change over the path, it compounds from stable_debt_last_update_timestamp (default: the first timestamp) as in
+    StableDebtToken.getSupplyData.
+    '''
+    assert (scaled_variable_debt is None) != (total_variable_debt is None), "scaled or total variable debt"
+    timestamps = integers(timestamps)
+    liquidity_rates = integers(liquidity_rates)
+    variable_borrow_rates = integers(variable_borrow_rates)
+    debt = integers(scaled_variable_debt if total_variable_debt is None else total_variable_debt)
+    steps = timestamps.shape[-1] - 1
+    batch = np.broadcast_shapes(
+        timestamps.shape[:-1],
+        liquidity_rates.shape[:-1],
+        variable_borrow_rates.shape[:-1],
+        debt.shape[:-1] if debt.ndim else (),
+        np.shape(liquidity_index),
+        np.shape(variable_borrow_index),
+        np.shape(reserve_factor),
+        np.shape(accrued_to_treasury),
+        np.shape(principal_stable_debt),
+        np.shape(average_stable_borrow_rate)
+    )
+    timestamps = np.broadcast_to(timestamps, batch + (steps + 1,))
+    liquidity_rates = np.broadcast_to(liquidity_rates, batch + (steps,))
+    variable_borrow_rates = np.broadcast_to(variable_borrow_rates, batch + (steps,))
+    debt = np.broadcast_to(debt if debt.ndim else debt[None], batch + (steps,))
+    reserve_factor = np.broadcast_to(integers(reserve_factor), batch)
+    principal_stable_debt = np.broadcast_to(integers(principal_stable_debt), batch)
+    average_stable_borrow_rate = np.broadcast_to(integers(average_stable_borrow_rate), batch)
+    if stable_debt_last_update_timestamp is None:
+        stable_debt_last_update_timestamp = timestamps[..., 0]
+    stable_debt_last_update_timestamp = np.broadcast_to(integers(stable_debt_last_update_timestamp), batch)
+
+    liquidity_indexes = np.empty(batch + (steps + 1,), dtype=object)
+    variable_borrow_indexes = np.empty(batch + (steps + 1,), dtype=object)
+    accrued = np.empty(batch + (steps + 1,), dtype=object)
+    liquidity_indexes[..., 0] = np.broadcast_to(integers(liquidity_index), batch)
+    variable_borrow_indexes[..., 0] = np.broadcast_to(integers(variable_borrow_index), batch)
+    accrued[..., 0] = np.broadcast_to(integers(accrued_to_treasury), batch)
+
+    # the stable debt at the first update, the following ones are the stable debt of the previous update
+    previous_stable_debt = ray_mul(
+        principal_stable_debt,
+        calculate_compounded_interest(average_stable_borrow_rate, stable_debt_last_update_timestamp, timestamps[..., 0])
+    )
+    for k in range(steps):
+        last_update, now = timestamps[..., k], timestamps[..., k + 1]
+        liquidity_index, variable_borrow_index = liquidity_indexes[..., k], variable_borrow_indexes[..., k]
+        scaled = debt[..., k] if total_variable_debt is None else ray_div(debt[..., k], variable_borrow_index)
+
+        # _updateIndexes
+        next_liquidity_index = _where(
+            liquidity_rates[..., k] != 0,
+            ray_mul(calculate_linear_interest(liquidity_rates[..., k], last_update, now), liquidity_index),
+            liquidity_index
+        )
+        next_variable_borrow_index = _where(
+            scaled != 0,
+            ray_mul(calculate_compounded_interest(variable_borrow_rates[..., k], last_update, now), variable_borrow_index),
+            variable_borrow_index
+        )
+
+        # _accrueToTreasury
+        stable_debt = ray_mul(
+            principal_stable_debt,
+            calculate_compounded_interest(average_stable_borrow_rate, stable_debt_last_update_timestamp, now)
+        )
+        total_debt_accrued = ray_mul(scaled, next_variable_borrow_index) + stable_debt - \
+            ray_mul(scaled, variable_borrow_index) - previous_stable_debt
+        amount_to_mint = percent_mul(total_debt_accrued, reserve_factor)
+        accrued[..., k + 1] = accrued[..., k] + _where(
+            (reserve_factor != 0) & (amount_to_mint != 0),
+            ray_div(amount_to_mint, next_liquidity_index),
+            0
+        )
+        liquidity_indexes[..., k + 1] = next_liquidity_index
+        variable_borrow_indexes[..., k + 1] = next_variable_borrow_index
+        previous_stable_debt = stable_debt
+
+    return AccrualPaths(timestamps, liquidity_indexes, variable_borrow_indexes, accrued)
+
+
+_calculate_interest_rates = np.frompyfunc(calculate_interest_rates, 15, 3)
+
+def strategy_rates(
+    params: RateStrategyParameters,
+    available_liquidity,
+    total_stable_debt,
+    total_variable_debt,
+    average_stable_borrow_rate=0,
+    reserve_factor=0,
+    variable_rate_slope_1=None,
+    unbacked=0
+):
+    '''
+    (liquidityRate, stableBorrowRate, variableBorrowRate) of DynamicRateStrategy.calculateInterestRates, element wise
+    over broadcast inputs. variable_rate_slope_1 defaults to the slope of the parameters, pass the path set by the
+    keeper to follow the dynamic slope.
+    '''
+    if variable_rate_slope_1 is None:
+        variable_rate_slope_1 = params.variableRateSlope1
+    rates = _calculate_interest_rates(
+        integers(variable_rate_slope_1),
+        params.optimalUsageRatio,
+        params.baseVariableBorrowRate,
+        params.variableRateSlope2,
+        params.stableRateSlope1,
+        params.stableRateSlope2,
+        params.baseStableRateOffset,
+        params.stableRateExcessOffset,
+        params.optimalStableToTotalDebtRatio,
+        integers(available_liquidity),
+        integers(total_stable_debt),
+        integers(total_variable_debt),
+        integers(average_stable_borrow_rate),
+        integers(reserve_factor),
+        integers(unbacked)
+    )
+    return tuple(np.asarray(rate, dtype=object) for rate in rates)
+
+
+SCENARIOS = 1_000
+STEPS = 2 * 365
+STEP = 12 * 60 * 60
+RESERVE_FACTORS = (1_000, 2_000)
+LIQUIDITY = 10**6 * 10**18
+REVERSION = 0.05
+NOISE = 0.02
+
+def main():
+    '''
+    A year of 12 hour steps over mean reverting utilization paths around the optimal usage ratio, with the Spark WETH
+    parameters, for two reserve factors.
+    '''
+    rng = np.random.default_rng(0)
+    params = default_rate_strategy_parameters(ZERO_ADDRESS)
+    optimal = params.optimalUsageRatio / RAY
+    usage = np.empty((SCENARIOS, STEPS))
+    usage[:, 0] = optimal
+    for k in range(1, STEPS):
+        usage[:, k] = usage[:, k - 1] + REVERSION * (optimal - usage[:, k - 1]) + rng.normal(0, NOISE, SCENARIOS)
+    usage = np.clip(usage, 0.0, 0.99)
+    debt = integers(np.round(usage * 10**6)) * (LIQUIDITY // 10**6)
+    timestamps = integers(np.arange(STEPS + 1) * STEP)
+    reserve_factor = integers(RESERVE_FACTORS)[:, None]
+
+    start = time.time()
+    liquidity_rates, _, variable_borrow_rates = strategy_rates(
+        params, LIQUIDITY - debt[None], 0, debt[None], reserve_factor=reserve_factor[..., None]
+    )
+    rates_time = time.time() - start
+    paths = accrue_paths(
+        timestamps, liquidity_rates, variable_borrow_rates, RAY, RAY, reserve_factor, total_variable_debt=debt[None]
+    )
+    accrual_time = time.time() - start - rates_time
+    print(
+        f"{len(RESERVE_FACTORS)} reserve factors x {SCENARIOS} scenarios x {STEPS} steps: "
+        f"rates {rates_time:.1f}s, accrual {accrual_time:.1f}s"
+    )
+
+    supplier = paths.annualized(paths.supplier_yield())
+    borrower = paths.annualized(paths.borrower_cost())
+    treasury = paths.treasury_income().astype(np.float64) / LIQUIDITY
+    print(f"{'reserve factor':>14} {'supply APY':>11} {'borrow APY':>11} {'spread':>8} {'treasury / liquidity':>21}")
+    for k, factor in enumerate(RESERVE_FACTORS):
+        print(
+            f"{factor / 100:>13.0f}% {supplier[k].mean():>10.2%} {borrower[k].mean():>10.2%}"
+            f" {(borrower[k] - supplier[k]).mean():>7.2%} {treasury[k].mean():>20.3%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List
+import requests
+from eth_utils import keccak
+from brownie import accounts, web3
+from scripts.rpc import request, RPCError
+from scripts import rate_model
+
+'''
+Load generator for calculateInterestRates under concurrent pool traffic.
+
+Every account runs its own thread sending supply/borrow/repay transactions to the MockPool, which calls
+calculateInterestRates like the Aave pool does, while a keeper thread moves the variable rate slope 1 with performUpkeep.
+With a block time set the node packs the concurrent transactions in shared blocks, otherwise every transaction is
+mined on its own.
+
+Once the traffic is done the transactions are replayed off-chain in (block, transaction index) order with
+scripts/rate_model.py: the rates emitted by every user transaction must be the ones of the slope in effect at its
+position in the block, before or after the keeper transaction.
+
+Usage: brownie run scripts/load_test.py
+'''
+
+RAY = rate_model.RAY
+TX_GAS = 1_000_000
+RECEIPT_POLL = 0.05
+OPERATIONS = ("supply", "borrow", "repay")
+RESERVE_DATA_UPDATED = "0x" + keccak(
+    text="ReserveDataUpdated(address,uint256,uint256,uint256,uint256,uint256)"
+).hex()
+
+
+@dataclass
+class LoadConfig:
+    accounts: int = 10
+    transactionsPerAccount: int = 20
+    # relative weights of supply, borrow and repay
+    mix: tuple = (4, 3, 3)
+    # amounts are drawn uniformly in [1, maxAmount] units of the underlying
+    maxAmount: int = 1_000 * 10**18
+    initialLiquidity: int = 100_000 * 10**18
+    initialDebt: int = 60_000 * 10**18
+    # seconds between two slope updates of the keeper, 0 disables the keeper
+    keeperPeriod: float = 0.5
+    # relative slope moves of the keeper, in basis points, applied in turn
+    keeperMoves: tuple = (11_000, 9_000)
+    # seconds, 0 keeps automine (one transaction per block)
+    blockTime: float = 1
+    seed: int = 0
+
+
+@dataclass
+class SentTransaction:
+    hash: str
+    operation: str
+    amount: int
+    sentAt: float
+    latency: float = 0
+    blockNumber: int = 0
+    transactionIndex: int = 0
+    gasUsed: int = 0
+    status: int = 0
+    # (liquidityRate, stableBorrowRate, variableBorrowRate) of the ReserveDataUpdated event
+    rates: tuple = field(default_factory=tuple)
+
+
+@dataclass
+class LoadReport:
+    transactions: List[SentTransaction]
+    keeperTransactions: List[SentTransaction]
+    elapsed: float
+    blocks: int
+    # user transactions whose rates don't match the slope in effect at their position in the block
+    inconsistencies: List[SentTransaction]
+
+    @property
+    def mined(self) -> List[SentTransaction]:
+        return [tx for tx in self.transactions if tx.status == 1]
+
+    def throughput(self) -> float:
+        return len(self.mined) / self.elapsed
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)) -> Dict[int, float]:
+        latencies = [tx.latency for tx in self.transactions]
+        return {p: percentile(latencies, p) for p in percentiles}
+
+    def gas_percentiles(self, percentiles=(50, 90, 100)) -> Dict[str, Dict[int, int]]:
+        gas = {}
+        for operation in OPERATIONS:
+            values = [tx.gasUsed for tx in self.mined if tx.operation == operation]
+            if values:
+                gas[operation] = {p: percentile(values, p) for p in percentiles}
+        return gas
+
+
+def percentile(values, p):
+    # nearest rank
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * p // 100) - 1)]
+
+def unlocked_accounts(endpoint, count, funding=10**20):
+    '''
+    Accounts the node signs for. The node accounts are used first, the others are impersonated (anvil and hardhat).
+    '''
+    addresses = request(endpoint, "eth_accounts", [])[:count]
+    for k in range(count - len(addresses)):
+        address = web3.to_checksum_address(keccak(text=f"load-test-{k}")[-20:])
+        for prefix in ("anvil", "hardhat"):
+            try:
+                request(endpoint, f"{prefix}_impersonateAccount", [address])
+                request(endpoint, f"{prefix}_setBalance", [address, hex(funding)])
+                break
+            except RPCError:
+                continue
+        else:
+            raise RPCError("impersonateAccount", f"the node has {len(addresses)} accounts and can't impersonate")
+        addresses.append(address)
+    return addresses
+
+def _set_block_time(endpoint, block_time):
+    # anvil and hardhat, interval mining only starts once automine is off
+    if block_time:
+        request(endpoint, "evm_setAutomine", [False])
+        request(endpoint, "evm_setIntervalMining", [int(block_time * 1000)])
+    else:
+        request(endpoint, "evm_setIntervalMining", [0])
+        request(endpoint, "evm_setAutomine", [True])
+
+def send_and_wait(session, endpoint, sender, to, data) -> tuple:
+    sent_at = time.time()
+    tx_hash = request(
+        endpoint,
+        "eth_sendTransaction",
+        [{"from": sender, "to": to, "data": data, "gas": hex(TX_GAS)}],
+        session=session
+    )
+    while True:
+        receipt = request(endpoint, "eth_getTransactionReceipt", [tx_hash], session=session)
+        if receipt is not None:
+            return tx_hash, sent_at, time.time() - sent_at, receipt
+        time.sleep(RECEIPT_POLL)
+
+def _record(sent: SentTransaction, receipt, pool_address):
+    sent.blockNumber = int(receipt["blockNumber"], 16)
+    sent.transactionIndex = int(receipt["transactionIndex"], 16)
+    sent.gasUsed = int(receipt["gasUsed"], 16)
+    sent.status = int(receipt["status"], 16)
+    for log in receipt["logs"]:
+        if log["address"].lower() == pool_address.lower() and log["topics"][0] == RESERVE_DATA_UPDATED:
+            data = bytes.fromhex(log["data"][2:])
+            sent.rates = tuple(int.from_bytes(data[32 * k:32 * (k + 1)], "big") for k in range(3))
+
+def user_traffic(env, endpoint, sender, config: LoadConfig, rng: random.Random) -> List[SentTransaction]:
+    pool, token = env["Pool"], env["Token"]
+    session = requests.Session()
+    transactions = []
+    for _ in range(config.transactionsPerAccount):
+        operation = rng.choices(OPERATIONS, weights=config.mix)[0]
+        amount = rng.randint(1, config.maxAmount)
+        data = getattr(pool, operation).encode_input(token.address, amount)
+        tx_hash, sent_at, latency, receipt = send_and_wait(session, endpoint, sender, pool.address, data)
+        sent = SentTransaction(tx_hash, operation, amount, sent_at, latency)
+        _record(sent, receipt, pool.address)
+        transactions.append(sent)
+    return transactions
+
+def keeper_traffic(env, endpoint, sender, config: LoadConfig, stop: threading.Event) -> List[SentTransaction]:
+    variable_rate_updater = env["VariableRateUpdater"]
+    session = requests.Session()
+    slope = env["DynamicRateStrategy"].getVariableRateSlope1()
+    transactions = []
+    while not stop.is_set():
+        slope = rate_model.percent_mul(slope, config.keeperMoves[len(transactions) % len(config.keeperMoves)])
+        data = variable_rate_updater.performUpkeep.encode_input(slope.to_bytes(32, "big"))
+        tx_hash, sent_at, latency, receipt = send_and_wait(
+            session, endpoint, sender, variable_rate_updater.address, data
+        )
+        sent = SentTransaction(tx_hash, "performUpkeep", slope, sent_at, latency)
+        _record(sent, receipt, env["Pool"].address)
+        transactions.append(sent)
+        stop.wait(config.keeperPeriod)
+    return transactions
+
+def check_consistency(env, start_block, transactions, keeper_transactions) -> List[SentTransaction]:
+    '''
+    Replays the mined transactions on the state of `start_block` and returns the user transactions whose rates differ
+    from rate_model.calculate_interest_rates with the slope in effect when they were executed.
+    '''
+    strategy, pool, token = env["DynamicRateStrategy"], env["Pool"], env["Token"]
+    block = {"block_identifier": start_block}
+    slope = strategy.getVariableRateSlope1(**block)
+    curve = (
+        strategy.OPTIMAL_USAGE_RATIO(**block),
+        strategy.getBaseVariableBorrowRate(**block),
+        strategy.getVariableRateSlope2(**block),
+        strategy.getStableRateSlope1(**block),
+        strategy.getStableRateSlope2(**block),
+        strategy.getBaseStableBorrowRate(**block) - slope,
+        strategy.getStableRateExcessOffset(**block),
+        strategy.OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO(**block),
+    )
+    # bits 64-79 of the reserve configuration
+    reserve_factor = (pool.getReserveData(token, **block)[0][0] >> 64) & 0xFFFF
+    balance = token.balanceOf(env["AToken"], **block)
+    total_variable_debt = env["VariableDebtToken"].totalSupply(**block)
+    total_stable_debt = env["StableDebtToken"].totalSupply(**block)
+
+    inconsistencies = []
+    mined = [tx for tx in transactions + keeper_transactions if tx.status == 1]
+    for tx in sorted(mined, key=lambda tx: (tx.blockNumber, tx.transactionIndex)):
+        if tx.operation == "performUpkeep":
+            slope = tx.amount
+            continue
+        if tx.operation == "supply":
+            available_liquidity = balance + tx.amount
+            balance += tx.amount
+        elif tx.operation == "borrow":
+            total_variable_debt += tx.amount
+            available_liquidity = balance - tx.amount
+            balance -= tx.amount
+        else:
+            repaid = min(tx.amount, total_variable_debt)
+            total_variable_debt -= repaid
+            available_liquidity = balance + repaid
+            balance += repaid
+        expected = rate_model.calculate_interest_rates(
+            slope,
+            *curve,
+            available_liquidity,
+            total_stable_debt,
+            total_variable_debt,
+            0,
+            reserve_factor
+        )
+        if tx.rates != expected:
+            inconsistencies.append(tx)
+    return inconsistencies
+
+def run_load(env, config: LoadConfig, keeper_account=None) -> LoadReport:
+    '''
+    Drives the mock reserve of `env` (see setup_mock_env.deploy_mock_reserve) with concurrent pool traffic.
+    '''
+    endpoint = web3.provider.endpoint_uri
+    keeper_account = keeper_account or accounts[0]
+    keeper = keeper_account.address
+    senders = unlocked_accounts(endpoint, config.accounts)
+    pool, token = env["Pool"], env["Token"]
+    pool.supply(token, config.initialLiquidity, {"from": keeper_account})
+    pool.borrow(token, config.initialDebt, {"from": keeper_account})
+    start_block = web3.eth.block_number
+
+    stop = threading.Event()
+    if config.blockTime:
+        _set_block_time(endpoint, config.blockTime)
+    start = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=config.accounts + 1) as executor:
+            keeper_future = None
+            if config.keeperPeriod:
+                keeper_future = executor.submit(keeper_traffic, env, endpoint, keeper, config, stop)
+            user_futures = [
+                executor.submit(user_traffic, env, endpoint, sender, config, random.Random(config.seed * 1_000_003 + k))
+                for k, sender in enumerate(senders)
+            ]
+            transactions = [tx for future in user_futures for tx in future.result()]
+            elapsed = time.time() - start
+            stop.set()
+            keeper_transactions = keeper_future.result() if keeper_future else []
+    finally:
+        stop.set()
+        if config.blockTime:
+            _set_block_time(endpoint, 0)
+
+    blocks = {tx.blockNumber for tx in transactions}
+    inconsistencies = check_consistency(env, start_block, transactions, keeper_transactions)
+    return LoadReport(transactions, keeper_transactions, elapsed, len(blocks), inconsistencies)
+
+def print_report(report: LoadReport):
+    mined = report.mined
+    print(f"{len(report.transactions)} transactions, {len(mined)} mined, "
+          f"{len(report.transactions) - len(mined)} reverted, {len(report.keeperTransactions)} slope updates")
+    print(f"throughput: {report.throughput():.1f} tx/s over {report.elapsed:.1f}s, "
+          f"{len(mined) / max(report.blocks, 1):.1f} tx per block")
+    latencies = report.latency_percentiles()
+    print("latency: " + ", ".join(f"p{p} {value * 1000:.0f}ms" for p, value in latencies.items()))
+    for operation, gas in report.gas_percentiles().items():
+        print(f"gas {operation:<8}: " + ", ".join(f"p{p} {value}" for p, value in gas.items()))
+    print(f"inconsistent rates: {len(report.inconsistencies)}")
+
+
+def main(n_accounts: int = 10, transactions_per_account: int = 20, block_time: float = 1):
+    from scripts.setup_mock_env import deploy_mock_reserve
+
+    env = deploy_mock_reserve(accounts[0], [80 * 10**25] * rate_model.WINDOW)
+    config = LoadConfig(
+        accounts=int(n_accounts),
+        transactionsPerAccount=int(transactions_per_account),
+        blockTime=float(block_time)
+    )
+    report = run_load(env, config)
+    print_report(report)
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from scripts import constants
+
+'''
+Parameters of a dynamic rate strategy, shared by the brownie deployment helpers and the brownie-free client.
+'''
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+@dataclass
+class RateStrategyParameters:
+    provider: object # address or contract of the PoolAddressesProvider
+    optimalUsageRatio: int
+    baseVariableBorrowRate: int
+    variableRateSlope1: int
+    variableRateSlope2: int
+    stableRateSlope1: int
+    stableRateSlope2: int
+    baseStableRateOffset: int
+    stableRateExcessOffset: int
+    optimalStableToTotalDebtRatio: int
+    epsilon: int # half width of the utilization band around the optimal usage ratio
+    mPlus: int
+    mMinus: int
+
+    def constructor_args(self) -> tuple:
+        '''
+        Arguments of the DynamicRateStrategy constructor, mPlus and mMinus are set afterwards.
+        '''
+        return (
+            self.provider,
+            self.optimalUsageRatio,
+            self.baseVariableBorrowRate,
+            self.variableRateSlope1,
+            self.variableRateSlope2,
+            self.stableRateSlope1,
+            self.stableRateSlope2,
+            self.baseStableRateOffset,
+            self.stableRateExcessOffset,
+            self.optimalStableToTotalDebtRatio,
+            self.epsilon
+        )
+
+    def initialize_args(self, variable_rate_updater=ZERO_ADDRESS) -> tuple:
+        '''
+        IDynamicRateStrategy.InitializationParams tuple, used by the factory: the curve parameters become immutable
+        args of the strategy clone, the other ones are passed to its initialize.
+        '''
+        return self.constructor_args() + (self.mPlus, self.mMinus, variable_rate_updater)
+
+
+def default_rate_strategy_parameters(provider) -> RateStrategyParameters:
+    return RateStrategyParameters(
+        provider,
+        constants.OPTIMAL_USAGE_RATIO,
+        constants.BASE_VARIABLE_BORROW_RATE,
+        constants.VARIABLE_RATE_SLOPE_1,
+        constants.VARIABLE_RATE_SLOPE_2,
+        constants.STABLE_RATE_SLOPE_1,
+        constants.STABLE_RATE_SLOPE_2,
+        constants.BASE_STABLE_RATE_OFFSET,
+        constants.STABLE_RATE_EXCESS_OFFSET,
+        constants.OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO,
+        constants.EPSILON,
+        constants.M_PLUS,
+        constants.M_MINUS
+    )
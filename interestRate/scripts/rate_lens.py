@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+import numpy as np
+from brownie import web3, DynamicRateLens
+
+'''
+NumPy wrapper of DynamicRateLens: rate curves of many strategies in a handful of eth_calls.
+
+Usage: brownie run scripts/rate_lens.py main <strategy> [<strategy> ...] --network mainnet-fork
+'''
+
+RAY = 10**27
+# points quoted per eth_call, all strategies included, stays well under the eth_call gas cap of the nodes
+MAX_QUOTES_PER_CALL = 2_000
+
+
+@dataclass
+class RateQuotes:
+    '''
+    Rates as float64 fractions (1.0 is 100%) of shape (strategies,) + shape of the points, NaN where a strategy failed.
+    '''
+    liquidityRate: np.ndarray
+    stableBorrowRate: np.ndarray
+    variableBorrowRate: np.ndarray
+    ok: np.ndarray
+
+
+def deploy_rate_lens(deployer_account):
+    return DynamicRateLens.deploy({"from": deployer_account})
+
+def quote_points(
+    lens,
+    strategies: Sequence[str],
+    available_liquidity,
+    total_stable_debt,
+    total_variable_debt,
+    average_stable_borrow_rate=0,
+    reserve_factor: int = 0,
+    block_identifier: Optional[int] = None
+) -> RateQuotes:
+    '''
+    Quotes the strategies at arbitrary reserve states, the inputs are broadcast against each other (integers or
+    integer arrays, in the units of the reserve). Calls are split so that each carries at most MAX_QUOTES_PER_CALL
+    quotes, all pinned to the same block.
+    '''
+    inputs = np.broadcast_arrays(
+        *(np.asarray(value, dtype=object) for value in (
+            available_liquidity, total_stable_debt, total_variable_debt, average_stable_borrow_rate
+        ))
+    )
+    shape = inputs[0].shape
+    points = [tuple(int(value) for value in point) for point in zip(*(array.ravel() for array in inputs))]
+    if block_identifier is None:
+        block_identifier = web3.eth.block_number
+
+    rates = np.zeros((len(strategies), len(points), 3), dtype=np.float64)
+    ok = np.ones(len(strategies), dtype=bool)
+    chunk = max(1, MAX_QUOTES_PER_CALL // max(len(strategies), 1))
+    for start in range(0, len(points), chunk):
+        batch = points[start:start + chunk]
+        batch_ok, batch_rates = lens.quote(strategies, batch, reserve_factor, block_identifier=block_identifier)
+        ok &= np.array(batch_ok, dtype=bool)
+        rates[:, start:start + len(batch)] = np.array(
+            [[int(rate) for rate in point] for point in batch_rates], dtype=np.float64
+        ).reshape(len(strategies), len(batch), 3)
+
+    rates[~ok] = np.nan
+    rates = rates.reshape((len(strategies),) + shape + (3,)) / RAY
+    return RateQuotes(rates[..., 0], rates[..., 1], rates[..., 2], ok)
+
+def rate_curve(
+    lens,
+    strategies: Sequence[str],
+    usage_ratios: Sequence[float],
+    stable_to_total_debt_ratios: Sequence[float] = (0.0,),
+    average_stable_borrow_rate: int = 0,
+    reserve_factor: int = 0,
+    block_identifier: Optional[int] = None
+) -> RateQuotes:
+    '''
+    Rate curves on a grid of usage ratios and stable debt shares, arrays of shape
+    (strategies, usage ratios, stable shares). The synthetic reserve holds 1 ray of underlying so the ratios are exact
+    to 1e-27.
+    '''
+    usage = np.array([int(round(u * RAY)) for u in usage_ratios], dtype=object)[:, None]
+    stable_share = np.array([int(round(s * RAY)) for s in stable_to_total_debt_ratios], dtype=object)[None, :]
+    total_debt = usage
+    total_stable_debt = total_debt * stable_share // RAY
+    return quote_points(
+        lens,
+        strategies,
+        RAY - total_debt,
+        total_stable_debt,
+        total_debt - total_stable_debt,
+        average_stable_borrow_rate,
+        reserve_factor,
+        block_identifier
+    )
+
+
+def main(*strategies):
+    from brownie import accounts
+
+    lens = deploy_rate_lens(accounts[0])
+    usage_ratios = np.linspace(0, 1, 101)
+    quotes = rate_curve(lens, list(strategies), usage_ratios)
+    for k, strategy in enumerate(strategies):
+        print(strategy)
+        for u in range(0, 101, 10):
+            print(
+                f"  U {usage_ratios[u]:>4.0%}  variable {quotes.variableBorrowRate[k, u, 0]:>8.2%}"
+                f"  supply {quotes.liquidityRate[k, u, 0]:>8.2%}"
+            )
@@ -0,0 +1,221 @@
+'''
+Off-chain model of the keeper and of the rate strategy.
+
+The arithmetic replicates WadRayMath/PercentageMath (half up rounding) so the results match the contracts to the wei,
+it has no brownie dependency and can be used by simulations or to check on-chain results.
+'''
+
+WAD = 10**18
+RAY = 10**27
+HALF_RAY = RAY // 2
+WAD_RAY_RATIO = 10**9
+PERCENTAGE_FACTOR = 10_000
+HALF_PERCENTAGE_FACTOR = PERCENTAGE_FACTOR // 2
+
+INTERVAL = 12 * 60 * 60
+WINDOW = 60
+
+
+def ray_mul(a: int, b: int) -> int:
+    return (a * b + HALF_RAY) // RAY
+
+def ray_div(a: int, b: int) -> int:
+    return (a * RAY + b // 2) // b
+
+def wad_to_ray(a: int) -> int:
+    return a * WAD_RAY_RATIO
+
+def percent_mul(value: int, percentage: int) -> int:
+    return (value * percentage + HALF_PERCENTAGE_FACTOR) // PERCENTAGE_FACTOR
+
+
+# VariableRateUpdater.Aggregation
+MEAN = 0
+MEDIAN = 1
+TRIMMED_MEAN = 2
+
+
+def average_utilization(utilization_history) -> int:
+    return sum(utilization_history) // len(utilization_history)
+
+def aggregate_utilization(utilization_history, aggregation: int = MEAN, trim: int = 0) -> int:
+    '''
+    Same as VariableRateUpdater.aggregatedUtilization.
+    '''
+    if aggregation == MEAN:
+        return average_utilization(utilization_history)
+    ordered = sorted(utilization_history)
+    if aggregation == MEDIAN:
+        middle = len(ordered) // 2
+        return (ordered[middle - 1] + ordered[middle]) // 2
+    return average_utilization(ordered[trim:len(ordered) - trim])
+
+def horizon_average(utilization_history, counter: int, samples: int) -> int:
+    '''
+    Same as VariableRateUpdater.horizonAverage: mean of the last `samples` samples of the ring history written
+    `counter` times.
+    '''
+    assert 0 < samples <= len(utilization_history), "horizon"
+    return sum(utilization_history[(counter - 1 - k) % len(utilization_history)] for k in range(samples)) // samples
+
+def upkeep_utilization(
+    utilization_history,
+    counter: int,
+    aggregation: int = MEAN,
+    trim: int = 0,
+    short_horizon: int = 0,
+    early_adjustment_threshold: int = 0
+) -> tuple:
+    '''
+    Same as VariableRateUpdater.upkeepUtilization, returns (utilization, early). The threshold is in bps.
+    '''
+    utilization = aggregate_utilization(utilization_history, aggregation, trim)
+    threshold = early_adjustment_threshold * (RAY // PERCENTAGE_FACTOR)
+    if threshold:
+        short_average = horizon_average(utilization_history, counter, short_horizon)
+        if abs(short_average - utilization) > threshold:
+            return short_average, True
+    return utilization, False
+
+def early_adjustment(
+    utilization_history,
+    counter: int,
+    utilization: int,
+    aggregation: int = MEAN,
+    trim: int = 0,
+    short_horizon: int = 0,
+    early_adjustment_threshold: int = 0
+) -> tuple:
+    '''
+    Same as VariableRateUpdater._earlyAdjustment between two samples, `utilization` is the current utilization of the
+    reserve and replaces the latest sample in the short horizon mean. Returns (early, short horizon mean), the
+    threshold is in bps. The contract also requires that no early upkeep happened yet in the interval.
+    '''
+    threshold = early_adjustment_threshold * (RAY // PERCENTAGE_FACTOR)
+    if threshold == 0:
+        return False, 0
+    window = len(utilization_history)
+    recent = [utilization_history[(counter - 1 - k) % window] for k in range(short_horizon)]
+    short_average = (sum(recent) - recent[0] + utilization) // short_horizon
+    aggregated = aggregate_utilization(utilization_history, aggregation, trim)
+    return abs(short_average - aggregated) > threshold, short_average
+
+def next_variable_rate_slope_1(
+    avg_utilization: int,
+    variable_rate_slope_1: int,
+    optimal_usage_ratio: int,
+    epsilon: int,
+    m_plus: int,
+    m_minus: int
+) -> int:
+    '''
+    Slope returned by VariableRateUpdater.checkUpkeep for a given average utilization.
+    '''
+    if avg_utilization < optimal_usage_ratio - epsilon:
+        return percent_mul(variable_rate_slope_1, m_minus)
+    return ray_mul(
+        percent_mul(variable_rate_slope_1, m_plus),
+        RAY + (avg_utilization + epsilon - optimal_usage_ratio)
+    )
+
+def usage_ratio(total_debt: int, total_reserve: int) -> int:
+    '''
+    Utilization as recorded by VariableRateUpdater.performUpkeep.
+    '''
+    return ray_div(total_debt, total_reserve)
+
+
+def calculate_interest_rates(
+    variable_rate_slope_1: int,
+    optimal_usage_ratio: int,
+    base_variable_borrow_rate: int,
+    variable_rate_slope_2: int,
+    stable_rate_slope_1: int,
+    stable_rate_slope_2: int,
+    base_stable_rate_offset: int,
+    stable_rate_excess_offset: int,
+    optimal_stable_to_total_debt_ratio: int,
+    available_liquidity: int,
+    total_stable_debt: int,
+    total_variable_debt: int,
+    average_stable_borrow_rate: int,
+    reserve_factor: int,
+    unbacked: int = 0
+):
+    '''
+    Same as DynamicRateStrategy.calculateInterestRates, returns (liquidityRate, stableBorrowRate, variableBorrowRate).
+    '''
+    max_excess_usage_ratio = RAY - optimal_usage_ratio
+    max_excess_stable_to_total_debt_ratio = RAY - optimal_stable_to_total_debt_ratio
+    total_debt = total_stable_debt + total_variable_debt
+
+    variable_borrow_rate = base_variable_borrow_rate
+    stable_borrow_rate = variable_rate_slope_1 + base_stable_rate_offset
+    borrow_usage_ratio = 0
+    supply_usage_ratio = 0
+    stable_to_total_debt_ratio = 0
+
+    if total_debt != 0:
+        stable_to_total_debt_ratio = ray_div(total_stable_debt, total_debt)
+        available_liquidity_plus_debt = available_liquidity + total_debt
+        borrow_usage_ratio = ray_div(total_debt, available_liquidity_plus_debt)
+        supply_usage_ratio = ray_div(total_debt, available_liquidity_plus_debt + unbacked)
+
+    if borrow_usage_ratio > optimal_usage_ratio:
+        excess_borrow_usage_ratio = ray_div(borrow_usage_ratio - optimal_usage_ratio, max_excess_usage_ratio)
+        stable_borrow_rate += stable_rate_slope_1 + ray_mul(stable_rate_slope_2, excess_borrow_usage_ratio)
+        variable_borrow_rate += variable_rate_slope_1 + ray_mul(variable_rate_slope_2, excess_borrow_usage_ratio)
+    else:
+        stable_borrow_rate += ray_div(ray_mul(stable_rate_slope_1, borrow_usage_ratio), optimal_usage_ratio)
+        variable_borrow_rate += ray_div(ray_mul(variable_rate_slope_1, borrow_usage_ratio), optimal_usage_ratio)
+
+    if stable_to_total_debt_ratio > optimal_stable_to_total_debt_ratio:
+        excess_stable_debt_ratio = ray_div(
+            stable_to_total_debt_ratio - optimal_stable_to_total_debt_ratio,
+            max_excess_stable_to_total_debt_ratio
+        )
+        stable_borrow_rate += ray_mul(stable_rate_excess_offset, excess_stable_debt_ratio)
+
+    overall_borrow_rate = 0
+    if total_debt != 0:
+        weighted_variable_rate = ray_mul(wad_to_ray(total_variable_debt), variable_borrow_rate)
+        weighted_stable_rate = ray_mul(wad_to_ray(total_stable_debt), average_stable_borrow_rate)
+        overall_borrow_rate = ray_div(weighted_variable_rate + weighted_stable_rate, wad_to_ray(total_debt))
+
+    liquidity_rate = percent_mul(
+        ray_mul(overall_borrow_rate, supply_usage_ratio),
+        PERCENTAGE_FACTOR - reserve_factor
+    )
+    return liquidity_rate, stable_borrow_rate, variable_borrow_rate
+
+
+class UtilizationAccumulator:
+    '''
+    Mirror of the time-weighted accumulator of VariableRateUpdater (observations ring + lastUtilization).
+    '''
+
+    def __init__(self, timestamp: int, utilization: int):
+        self.counter = 0
+        self.last_utilization = utilization
+        # the genesis observation sits at WINDOW - 1, like on chain
+        self.observations = [(0, 0)] * WINDOW
+        self.observations[WINDOW - 1] = (timestamp, 0)
+
+    def _latest(self):
+        return self.observations[(self.counter + WINDOW - 1) % WINDOW]
+
+    def cumulative(self, timestamp: int) -> int:
+        last_timestamp, last_cumulative = self._latest()
+        return (last_cumulative + self.last_utilization * (timestamp - last_timestamp)) % 2**224
+
+    def sample(self, timestamp: int, utilization: int):
+        # the utilization of the last sample holds until this one, as in cumulative()
+        self.observations[self.counter % WINDOW] = (timestamp, self.cumulative(timestamp))
+        self.last_utilization = utilization
+        self.counter += 1
+
+    def time_weighted_average(self, timestamp: int, observations_ago: int):
+        assert observations_ago < WINDOW and observations_ago <= self.counter, "lookback"
+        start_timestamp, start_cumulative = self.observations[(self.counter + WINDOW - 1 - observations_ago) % WINDOW]
+        period = timestamp - start_timestamp
+        return ((self.cumulative(timestamp) - start_cumulative) % 2**224) // period, period
@@ -0,0 +1,72 @@
+import requests
+from typing import List, Tuple
+
+'''
+Raw JSON-RPC helpers shared by the tooling, they only need the HTTP endpoint of the node or a
+scripts.rpc_pool.RPCPool.
+'''
+
+BATCH_SIZE = 200
+
+
+class RPCError(RuntimeError):
+    def __init__(self, method, error):
+        super().__init__(f"{method} failed: {error}")
+        self.method = method
+        self.error = error
+
+
+def batch_request(
+    endpoint: str,
+    calls: List[Tuple[str, list]],
+    batch_size: int = BATCH_SIZE,
+    session=None,
+    timeout: int = 60
+) -> list:
+    '''
+    Sends (method, params) pairs as JSON-RPC batches of `batch_size`, returns the results in the same order.
+    Raises RPCError on the first failed call.
+    '''
+    if not isinstance(endpoint, str):
+        # connection pool
+        return endpoint.batch_request(calls, batch_size)
+    post = session.post if session is not None else requests.post
+    results = []
+    for start in range(0, len(calls), batch_size):
+        chunk = calls[start:start + batch_size]
+        payload = [
+            {"jsonrpc": "2.0", "id": k, "method": method, "params": params}
+            for k, (method, params) in enumerate(chunk)
+        ]
+        response = post(endpoint, json=payload, timeout=timeout)
+        response.raise_for_status()
+        # the replies of a batch may come back in any order
+        replies = sorted(response.json(), key=lambda reply: reply["id"])
+        for (method, _), reply in zip(chunk, replies):
+            if "error" in reply:
+                raise RPCError(method, reply["error"])
+            results.append(reply["result"])
+    return results
+
+def request(endpoint: str, method: str, params: list, session=None, timeout: int = 60):
+    return batch_request(endpoint, [(method, params)], session=session, timeout=timeout)[0]
+
+def set_automine(endpoint, enabled: bool):
+    '''
+    Turns automatic mining of the local node on or off (anvil and hardhat, ganache through miner_start/miner_stop).
+    '''
+    try:
+        request(endpoint, "evm_setAutomine", [enabled])
+    except RPCError:
+        request(endpoint, "miner_start" if enabled else "miner_stop", [])
+
+def set_balance(endpoint, address: str, balance: int):
+    '''
+    Sets the ether balance of an account of the local node (anvil, hardhat, ganache 7).
+    '''
+    for method in ("anvil_setBalance", "hardhat_setBalance", "evm_setAccountBalance"):
+        try:
+            return request(endpoint, method, [address, hex(balance)])
+        except RPCError as error:
+            last_error = error
+    raise last_error
@@ -0,0 +1,332 @@
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import requests
+from scripts.rpc import batch_request, request
+
+'''
+Block-scoped read cache for the keeper tooling, over the contracts of scripts.client (ContractClient).
+
+Calls are classified by function name:
+- immutable: set at deployment or initialization and never written again, cached forever (and across runs with
+  `save`/`load`, for as long as the code at the address is the same),
+- invalidated by events: cached across blocks until the contract emits one of the events that changes them, or for
+  the state an upkeep writes in the updater, until any contract emits VariableRateSlope1Updated (the strategy of the
+  updater does in every performUpkeep),
+- anything else: cached for the current block only.
+
+The token and strategy addresses of a reserve are read with getReserveData, whose other fields change with every
+interaction of the pool: `reserve_tokens` caches the addresses alone until the PoolConfigurator initializes a reserve
+or changes a strategy.
+
+The reader is pinned to a block, `advance` moves it to a newer block, drops the per-block entries and fetches the logs
+of the skipped blocks with a single eth_getLogs to invalidate the entries whose events were emitted. Cache misses of
+a `call_many` are sent as one JSON-RPC batch. scripts.client.call_batch, scripts.tx_submitter.check_upkeeps and
+scripts.decision_journal.read_decision_inputs read through a reader when given one.
+
+    reader = CachedReader(endpoint)
+    upkeeps = check_upkeeps(endpoint, updaters, reader=reader)
+    decision = read_decision_inputs(endpoint, updater, strategy, reader=reader)
+    reader.advance()  # next block
+'''
+
+# Calls whose result never changes once the contract is initialized
+IMMUTABLE_CALLS = {
+    # DynamicRateStrategy
+    "OPTIMAL_USAGE_RATIO",
+    "OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO",
+    "MAX_EXCESS_USAGE_RATIO",
+    "MAX_EXCESS_STABLE_TO_TOTAL_DEBT_RATIO",
+    "EPSILON",
+    "ADDRESSES_PROVIDER",
+    "getBaseVariableBorrowRate",
+    "getVariableRateSlope2",
+    "getStableRateSlope1",
+    "getStableRateSlope2",
+    "getStableRateExcessOffset",
+    # VariableRateUpdater
+    "POOL",
+    "ASSET",
+    "INTERVAL",
+    "WINDOW",
+}
+
+# Calls cached until the contract emits one of the events
+_SLOPE_1_UPDATED = "VariableRateSlope1Updated(uint256,uint256)"
+_M_PLUS_UPDATED = "MPlusUpdated(uint256,uint256)"
+_M_MINUS_UPDATED = "MMinusUpdated(uint256,uint256)"
+_AGGREGATION_UPDATED = "AggregationUpdated(uint8,uint8)"
+_EARLY_ADJUSTMENT_UPDATED = "EarlyAdjustmentUpdated(uint8,uint16)"
+EVENT_INVALIDATED_CALLS = {
+    # PoolAddressesProvider
+    "getPool": ["PoolUpdated(address,address)"],
+    "getPoolConfigurator": ["PoolConfiguratorUpdated(address,address)"],
+    # DynamicRateStrategy
+    "getVariableRateSlope1": [_SLOPE_1_UPDATED],
+    "getBaseStableBorrowRate": [_SLOPE_1_UPDATED],
+    # base rate + slope 1 + slope 2
+    "getMaxVariableBorrowRate": [_SLOPE_1_UPDATED],
+    "getMPlus": [_M_PLUS_UPDATED],
+    "getMMinus": [_M_MINUS_UPDATED],
+    "getUpkeepParameters": [_SLOPE_1_UPDATED, _M_PLUS_UPDATED, _M_MINUS_UPDATED],
+    "getVariableRateUpdater": ["VariableRateUpdaterUpdated(address,address)"],
+    # VariableRateUpdater
+    "aggregation": [_AGGREGATION_UPDATED],
+    "trim": [_AGGREGATION_UPDATED],
+    "shortHorizon": [_EARLY_ADJUSTMENT_UPDATED],
+    "earlyAdjustmentThreshold": [_EARLY_ADJUSTMENT_UPDATED],
+    "aggregatedUtilization": [_AGGREGATION_UPDATED],
+    "upkeepUtilization": [_AGGREGATION_UPDATED, _EARLY_ADJUSTMENT_UPDATED],
+}
+
+# VariableRateUpdater state written by performUpkeep, which sets the slope of the strategy: also cached until a
+# VariableRateSlope1Updated, from any contract since the strategy of an updater isn't known from its calls
+UPKEEP_INVALIDATED_CALLS = {
+    "counter",
+    "lastTimeStamp",
+    "lastUtilization",
+    "utilizationHistory",
+    "observations",
+    "horizonAverage",
+    "aggregatedUtilization",
+    "upkeepUtilization",
+}
+
+# PoolConfigurator events that change the token or strategy addresses of a reserve
+RESERVE_TOKENS_EVENTS = [
+    "ReserveInitialized(address,address,address,address,address)",
+    "ReserveInterestRateStrategyChanged(address,address,address)",
+]
+
+# Immutables the constructor writes to storage (VariableRateUpdater): the same code may hold other values after a
+# redeployment at the same address, they aren't saved
+STORAGE_IMMUTABLE_CALLS = {"POOL", "ASSET", "ADDRESSES_PROVIDER"}
+
+IMMUTABLE = "immutable"
+EVENT = "event"
+BLOCK = "block"
+
+
+def event_topic(signature: str) -> str:
+    from eth_utils import keccak
+
+    return "0x" + keccak(text=signature).hex()
+
+def code_hash(code: str) -> str:
+    from eth_utils import keccak
+
+    return "0x" + keccak(hexstr=code).hex()
+
+
+@dataclass(frozen=True)
+class ReserveTokens:
+    aToken: str
+    stableDebtToken: str
+    variableDebtToken: str
+    interestRateStrategy: str
+
+
+@dataclass
+class CacheStats:
+    hits: Dict[str, int] = field(default_factory=lambda: {IMMUTABLE: 0, EVENT: 0, BLOCK: 0})
+    misses: Dict[str, int] = field(default_factory=lambda: {IMMUTABLE: 0, EVENT: 0, BLOCK: 0})
+    invalidations: int = 0
+    # JSON-RPC requests sent, a batch counts for each call it carries
+    requests: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return hits / (hits + misses) if hits + misses else 0
+
+
+class CachedReader:
+    '''
+    Caches eth_calls of scripts.client contracts, e.g. `reader.call(strategy, "OPTIMAL_USAGE_RATIO")`.
+    The reader is pinned to `block_number`, the latest block by default. `endpoint` is a node URL or a
+    scripts.rpc_pool.RPCPool.
+    '''
+
+    def __init__(self, endpoint, block_number: Optional[int] = None, session=None):
+        self.endpoint = endpoint
+        self.session = session or requests.Session()
+        self.stats = CacheStats()
+        self._immutable = {}
+        # (address, data) -> (value, {(emitter or None for any contract, topic)})
+        self._event = {}
+        self._block = {}
+        self._topics = {
+            name: {event_topic(signature) for signature in signatures}
+            for name, signatures in EVENT_INVALIDATED_CALLS.items()
+        }
+        self._upkeep_topic = event_topic(_SLOPE_1_UPDATED)
+        self.block_number = block_number if block_number is not None else self._latest_block()
+
+    def _latest_block(self) -> int:
+        self.stats.requests += 1
+        return int(request(self.endpoint, "eth_blockNumber", [], session=self.session), 16)
+
+    @staticmethod
+    def policy(name: str) -> str:
+        if name in IMMUTABLE_CALLS:
+            return IMMUTABLE
+        if name in EVENT_INVALIDATED_CALLS or name in UPKEEP_INVALIDATED_CALLS:
+            return EVENT
+        return BLOCK
+
+    def advance(self, block_number: Optional[int] = None) -> int:
+        '''
+        Moves the reader to `block_number` (the latest block by default), returns the number of invalidated entries.
+        '''
+        if block_number is None:
+            block_number = self._latest_block()
+        if block_number == self.block_number:
+            return 0
+        assert block_number > self.block_number, "the reader only moves forward"
+        self._block = {}
+
+        invalidated = 0
+        if self._event:
+            watched = {watch for _, watches in self._event.values() for watch in watches}
+            log_filter = {
+                "fromBlock": hex(self.block_number + 1),
+                "toBlock": hex(block_number),
+                "topics": [sorted({topic for _, topic in watched})],
+            }
+            if all(emitter is not None for emitter, _ in watched):
+                log_filter["address"] = sorted({emitter for emitter, _ in watched})
+            self.stats.requests += 1
+            logs = request(self.endpoint, "eth_getLogs", [log_filter], session=self.session)
+            emitted = {(log["address"].lower(), log["topics"][0]) for log in logs}
+            emitted |= {(None, topic) for _, topic in emitted}
+            for key, (_, watches) in list(self._event.items()):
+                if watches & emitted:
+                    del self._event[key]
+                    invalidated += 1
+        self.stats.invalidations += invalidated
+        self.block_number = block_number
+        return invalidated
+
+    def _lookup(self, policy, key):
+        if policy == IMMUTABLE:
+            entry = self._immutable.get(key)
+        elif policy == EVENT:
+            entry = self._event.get(key)
+        else:
+            entry = self._block.get(key)
+        return entry is not None, entry[0] if entry else None
+
+    def _store(self, policy, name, key, value):
+        if policy == IMMUTABLE:
+            self._immutable[key] = (value, name not in STORAGE_IMMUTABLE_CALLS)
+        elif policy == EVENT:
+            watches = {(key[0], topic) for topic in self._topics.get(name, ())}
+            if name in UPKEEP_INVALIDATED_CALLS:
+                watches.add((None, self._upkeep_topic))
+            self._event[key] = (value, watches)
+        else:
+            self._block[key] = (value,)
+
+    def call_many(self, calls: List[Tuple[object, str, tuple]]) -> list:
+        '''
+        (contract, function name, arguments) triples like scripts.client.call_batch, returns the decoded results in
+        the same order. The cache misses are sent as one batch.
+        '''
+        results = [None] * len(calls)
+        missing = []
+        for k, (contract, name, args) in enumerate(calls):
+            policy = self.policy(name)
+            key = (contract.address.lower(), contract.encode_input(name, *args))
+            found, value = self._lookup(policy, key)
+            if found:
+                self.stats.hits[policy] += 1
+                results[k] = value
+            else:
+                self.stats.misses[policy] += 1
+                missing.append((k, contract, name, policy, key))
+
+        if missing:
+            self.stats.requests += len(missing)
+            raw = batch_request(
+                self.endpoint,
+                [("eth_call", [{"to": key[0], "data": key[1]}, hex(self.block_number)]) for *_, key in missing],
+                session=self.session
+            )
+            for (k, contract, name, policy, key), data in zip(missing, raw):
+                value = contract.decode_output(name, data)
+                self._store(policy, name, key, value)
+                results[k] = value
+        return results
+
+    def call(self, contract, name: str, *args):
+        return self.call_many([(contract, name, args)])[0]
+
+    def reserve_tokens(self, pool, asset: str, configurator: str) -> ReserveTokens:
+        '''
+        The aToken, debt tokens and interest rate strategy of `asset`, read with `pool.getReserveData` (`pool` is a
+        ContractClient of the Pool) and cached until `configurator` (the PoolConfigurator, see
+        PoolAddressesProvider.getPoolConfigurator) emits one of RESERVE_TOKENS_EVENTS.
+        '''
+        key = (pool.address.lower(), pool.encode_input("getReserveData", asset))
+        found, tokens = self._lookup(EVENT, key)
+        if found:
+            self.stats.hits[EVENT] += 1
+            return tokens
+        self.stats.misses[EVENT] += 1
+        self.stats.requests += 1
+        data = request(
+            self.endpoint,
+            "eth_call",
+            [{"to": key[0], "data": key[1]}, hex(self.block_number)],
+            session=self.session
+        )
+        reserve = pool.decode_output("getReserveData", data)
+        # DataTypes.ReserveData: aTokenAddress, stableDebtTokenAddress, variableDebtTokenAddress and
+        # interestRateStrategyAddress follow the id
+        tokens = ReserveTokens(*reserve[8:12])
+        self._event[key] = (tokens, {(configurator.lower(), event_topic(event)) for event in RESERVE_TOKENS_EVENTS})
+        return tokens
+
+    def save(self, path: str):
+        '''
+        Writes the immutable entries with the hash of the code of their contract: a restarted local chain or fork
+        redeploying other code (other curve parameters) at the same address doesn't reuse them.
+        '''
+        entries = [(address, data, value) for (address, data), (value, saved) in self._immutable.items() if saved]
+        codes = self._code_hashes({address for address, _, _ in entries})
+        with open(path, "w") as f:
+            json.dump({
+                "entries": [[address, codes[address], data, value] for address, data, value in entries],
+            }, f)
+
+    def load(self, path: str) -> int:
+        '''
+        Reads the immutable entries saved by a previous run whose contract still has the same code, returns the number
+        of entries loaded.
+        '''
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return 0
+        codes = self._code_hashes({address for address, *_ in saved["entries"]})
+        loaded = 0
+        for address, saved_code_hash, data, value in saved["entries"]:
+            if codes[address] != saved_code_hash:
+                continue
+            # JSON turns tuples into lists
+            self._immutable[(address, data)] = (tuple(value) if isinstance(value, list) else value, True)
+            loaded += 1
+        return loaded
+
+    def _code_hashes(self, addresses) -> Dict[str, str]:
+        addresses = sorted(addresses)
+        if not addresses:
+            return {}
+        self.stats.requests += len(addresses)
+        codes = batch_request(
+            self.endpoint,
+            [("eth_getCode", [address, hex(self.block_number)]) for address in addresses],
+            session=self.session
+        )
+        return {address: code_hash(code) for address, code in zip(addresses, codes)}
@@ -0,0 +1,283 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from scripts.rpc import batch_request, BATCH_SIZE, RPCError
+
+'''
+Pooled JSON-RPC client for the keeper and the scripts.
+
+Holds a persistent HTTP session per endpoint, tracks an exponential moving average of the latency of every endpoint and
+routes each request to the fastest healthy one. Transport failures (connection errors, timeouts, HTTP errors,
+malformed replies) fail over to the next endpoint and put the failing one in a cooldown. JSON-RPC errors are returned
+to the caller as they are the same on every node, except the ones about the state of the node (NODE_STATE_ERRORS: a
+block it hasn't seen yet, state it has pruned) which are retried on the next endpoint.
+
+Health checks read the head of every endpoint concurrently: endpoints lagging the best head by more than `max_lag`
+blocks, or whose hash at the common head disagrees with the majority, are taken out of the rotation until a later
+check clears them.
+
+A pool can be passed wherever scripts.rpc takes an endpoint.
+'''
+
+# weight of the last sample in the latency average
+LATENCY_SMOOTHING = 0.3
+
+# JSON-RPC error messages (geth, erigon, nethermind, anvil) of a node missing a block or state another node may hold
+NODE_STATE_ERRORS = (
+    "header not found",
+    "missing trie node",
+    "unknown block",
+    "block not found",
+    "state is not available",
+    "required historical state unavailable",
+)
+
+
+class NoHealthyEndpoint(RuntimeError):
+    pass
+
+
+def node_state_error(error: RPCError) -> bool:
+    '''
+    Whether the error comes from the state of the node that answered rather than from the request.
+    '''
+    message = error.error.get("message", "") if isinstance(error.error, dict) else str(error.error)
+    return any(pattern in message.lower() for pattern in NODE_STATE_ERRORS)
+
+
+@dataclass
+class Endpoint:
+    url: str
+    session: requests.Session
+    # seconds, None until the first request
+    latency: Optional[float] = None
+    head: int = 0
+    headHash: Optional[str] = None
+    failures: int = 0
+    # consecutive failures, reset by a success
+    consecutiveFailures: int = 0
+    cooldownUntil: float = 0
+    lagging: bool = False
+    forked: bool = False
+    requests: int = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldownUntil and not self.lagging and not self.forked
+
+    def record_latency(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+
+@dataclass
+class HealthReport:
+    head: int
+    # highest block every healthy endpoint has reached
+    commonHead: int
+    healthy: List[str] = field(default_factory=list)
+    lagging: List[str] = field(default_factory=list)
+    forked: List[str] = field(default_factory=list)
+    down: List[str] = field(default_factory=list)
+
+
+class RPCPool:
+    '''
+    `endpoints` are HTTP JSON-RPC URLs, `timeout` is the per request timeout in seconds and `cooldown` the time a failing
+    endpoint is left out of the rotation, doubled for every consecutive failure.
+    '''
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        timeout: float = 5,
+        cooldown: float = 2,
+        max_lag: int = 2,
+        connections: int = 10
+    ):
+        assert endpoints, "at least one endpoint"
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.max_lag = max_lag
+        self.endpoints = []
+        for url in endpoints:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.endpoints.append(Endpoint(url, session))
+        self._lock = threading.Lock()
+        self._checker = None
+        self._stop = threading.Event()
+
+    def ranked(self) -> List[Endpoint]:
+        '''
+        Healthy endpoints by increasing latency, the ones never measured first so they get measured. If none is
+        healthy the endpoints out of the rotation are returned, those in cooldown last.
+        '''
+        now = time.time()
+        with self._lock:
+            healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy(now)]
+            if healthy:
+                return sorted(healthy, key=lambda endpoint: (endpoint.latency is not None, endpoint.latency or 0))
+            return sorted(self.endpoints, key=lambda endpoint: (endpoint.cooldownUntil, endpoint.latency or 0))
+
+    def _failed(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.consecutiveFailures += 1
+            endpoint.cooldownUntil = time.time() + self.cooldown * 2 ** (endpoint.consecutiveFailures - 1)
+
+    def _succeeded(self, endpoint: Endpoint, latency: float):
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.consecutiveFailures = 0
+            endpoint.cooldownUntil = 0
+            endpoint.record_latency(latency)
+
+    def _send(self, endpoint: Endpoint, calls, batch_size) -> list:
+        start = time.time()
+        try:
+            results = batch_request(endpoint.url, calls, batch_size, endpoint.session, self.timeout)
+        except RPCError:
+            # the node answered
+            self._succeeded(endpoint, time.time() - start)
+            raise
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            self._failed(endpoint)
+            raise
+        self._succeeded(endpoint, time.time() - start)
+        return results
+
+    def batch_request(self, calls: List[Tuple[str, list]], batch_size: int = BATCH_SIZE) -> list:
+        '''
+        Same as scripts.rpc.batch_request, on the fastest healthy endpoint with failover. A node state error is raised
+        when every endpoint answered with one.
+        '''
+        errors = []
+        state_error = None
+        unreachable = False
+        for endpoint in self.ranked():
+            try:
+                return self._send(endpoint, calls, batch_size)
+            except RPCError as error:
+                if not node_state_error(error):
+                    raise
+                # another node may have the block or the state
+                state_error = error
+                errors.append(f"{endpoint.url}: {error!r}")
+            except Exception as error:
+                unreachable = True
+                errors.append(f"{endpoint.url}: {error!r}")
+        if state_error is not None and not unreachable:
+            raise state_error
+        raise NoHealthyEndpoint("all endpoints failed: " + "; ".join(errors))
+
+    def request(self, method: str, params: list):
+        return self.batch_request([(method, params)])[0]
+
+    def broadcast(self, method: str, params: list) -> dict:
+        '''
+        Sends the same request to every endpoint concurrently (e.g. eth_sendRawTransaction, so a transaction reaches
+        the network even if the fastest node drops it). Returns {url: result or exception}.
+        '''
+        def send(endpoint):
+            try:
+                return self._send(endpoint, [(method, params)], BATCH_SIZE)[0]
+            except Exception as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=len(self.endpoints)) as executor:
+            results = executor.map(send, self.endpoints)
+            return {endpoint.url: result for endpoint, result in zip(self.endpoints, results)}
+
+    def check_health(self) -> HealthReport:
+        '''
+        Reads the head of every endpoint concurrently, flags the lagging ones, then compares the block hashes at the
+        common head and flags the endpoints disagreeing with the majority, a tie going to the side of the highest and
+healthiest endpoint.
+        '''
+        def head(endpoint):
+            try:
+                block = self._send(endpoint, [("eth_getBlockByNumber", ["latest", False])], BATCH_SIZE)[0]
+                return int(block["number"], 16)
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=len(self.endpoints)) as executor:
+            heads = list(executor.map(head, self.endpoints))
+
+        live = [(endpoint, number) for endpoint, number in zip(self.endpoints, heads) if number is not None]
+        report = HealthReport(head=max((number for _, number in live), default=0), commonHead=0)
+        report.down = [endpoint.url for endpoint, number in zip(self.endpoints, heads) if number is None]
+        with self._lock:
+            for endpoint, number in live:
+                endpoint.head = number
+                endpoint.lagging = report.head - number > self.max_lag
+        in_sync = [endpoint for endpoint, _ in live if not endpoint.lagging]
+        report.lagging = [endpoint.url for endpoint, _ in live if endpoint.lagging]
+        report.commonHead = min((endpoint.head for endpoint in in_sync), default=0)
+
+        def block_hash(endpoint):
+            try:
+                block = self._send(endpoint, [("eth_getBlockByNumber", [hex(report.commonHead), False])], BATCH_SIZE)[0]
+                return block["hash"] if block else None
+            except Exception:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(len(in_sync), 1)) as executor:
+            hashes = list(executor.map(block_hash, in_sync))
+        # hash -> endpoints reporting it
+        votes = {}
+        for endpoint, value in zip(in_sync, hashes):
+            if value is not None:
+                votes.setdefault(value, []).append(endpoint)
+
+        def support(value):
+            # the number of endpoints, then on a tie the highest head and the healthiest endpoint
+            endpoints = votes[value]
+            return (
+                len(endpoints),
+                max(endpoint.head for endpoint in endpoints),
+                -min(endpoint.consecutiveFailures for endpoint in endpoints),
+                -min(endpoint.latency if endpoint.latency is not None else float("inf") for endpoint in endpoints),
+            )
+
+        majority = max(votes, key=support) if votes else None
+        with self._lock:
+            for endpoint, value in zip(in_sync, hashes):
+                endpoint.headHash = value
+                endpoint.forked = value != majority
+        report.forked = [endpoint.url for endpoint in in_sync if endpoint.forked]
+        report.healthy = [endpoint.url for endpoint in in_sync if not endpoint.forked]
+        return report
+
+    def start_health_checks(self, interval: float = 5):
+        '''
+        Runs check_health every `interval` seconds in a daemon thread until `close`.
+        '''
+        def run():
+            while not self._stop.wait(interval):
+                self.check_health()
+
+        self._stop.clear()
+        self._checker = threading.Thread(target=run, daemon=True)
+        self._checker.start()
+
+    def close(self):
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+        for endpoint in self.endpoints:
+            endpoint.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
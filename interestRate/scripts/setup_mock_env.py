@@ -1,11 +1,15 @@
-from brownie import network, accounts, Contract
-from dataclasses import dataclass
+from brownie import network, accounts
 
 from brownie import (
     MockAddressesProvider,
     MockPool,
-    DynamicRateStrategy
+    MockERC20,
+    DynamicRateStrategy,
+    DynamicRateStrategyClone,
+    DynamicRateFactory,
+    VariableRateUpdater
 )
+from scripts.parameters import ZERO_ADDRESS, RateStrategyParameters, default_rate_strategy_parameters
 
 def deploy_mock_addresses_provider(
     deployer_account
@@ -17,46 +21,77 @@ def deploy_mock_pool(
 ):
     return MockPool.deploy({"from": deployer_account})
 
-@dataclass
-class RateStrategyParameters:
-    provider: Contract
-    optimalUsageRatio: int
-    baseVariableBorrowRate: int
-    variableRateSlope1: int
-    variableRateSlope2: int
-    stableRateSlope1: int
-    stableRateSlope2: int
-    baseStableRateOffset: int
-    stableRateExcessOffset: int
-    optimalStableToTotalDebtRatio: int
-    epsilon: int # the parameter to 
-    mPlus: int
-    mMinus: int
-
 def deploy_dynamic_rate_strategy(
     rate_strategy_params: RateStrategyParameters,
-    deployer_account
+    deployer_account,
+    pool_configurator_account=None
 ):
     rate_strategy = DynamicRateStrategy.deploy(
-        rate_strategy_params.provider,
-        rate_strategy_params.optimalUsageRatio,
-        rate_strategy_params.baseVariableBorrowRate,
-        rate_strategy_params.variableRateSlope1,
-        rate_strategy_params.variableRateSlope2,
-        rate_strategy_params.stableRateSlope1,
-        rate_strategy_params.stableRateSlope2,
-        rate_strategy_params.baseStableRateOffset,
-        rate_strategy_params.stableRateExcessOffset,
-        rate_strategy_params.optimalStableToTotalDebtRatio,
-        rate_strategy_params.epsilon,
+        *rate_strategy_params.constructor_args(),
         {"from": deployer_account}
     )
 
-    # this will work because the deployer is a pool configurator in mock contract
-    rate_strategy.setMPlus(rate_strategy_params.mPlus, {"from": deployer_account})
-    rate_strategy.setMMinus(rate_strategy_params.mMinus, {"from": deployer_account})
+    # by default the deployer, this will work because the deployer is a pool configurator in mock contract
+    pool_configurator_account = pool_configurator_account or deployer_account
+    rate_strategy.setMPlus(rate_strategy_params.mPlus, {"from": pool_configurator_account})
+    rate_strategy.setMMinus(rate_strategy_params.mMinus, {"from": pool_configurator_account})
     return rate_strategy
 
+def deploy_dynamic_rate_factory(
+    addresses_provider,
+    deployer_account
+):
+    '''
+    Deploys the implementations and the factory, the implementations are only used as code by the clones.
+    '''
+    strategy_implementation = DynamicRateStrategyClone.deploy({"from": deployer_account})
+    updater_implementation = VariableRateUpdater.deploy(
+        addresses_provider,
+        ZERO_ADDRESS,
+        [0] * 60,
+        {"from": deployer_account}
+    )
+    return DynamicRateFactory.deploy(
+        strategy_implementation,
+        updater_implementation,
+        {"from": deployer_account}
+    )
+
+def reserve_deployment(
+    rate_strategy_params: RateStrategyParameters,
+    asset,
+    utilization_history,
+    salt=0
+):
+    '''
+    Builds the DynamicRateFactory.ReserveDeployment tuple.
+    '''
+    return (
+        asset,
+        salt.to_bytes(32, "big"),
+        # the updater is set to the updater clone by the factory
+        rate_strategy_params.initialize_args(ZERO_ADDRESS),
+        utilization_history
+    )
+
+def deploy_with_factory(
+    factory,
+    rate_strategy_params: RateStrategyParameters,
+    asset,
+    utilization_history,
+    deployer_account,
+    salt=0
+):
+    '''
+    Deploys an initialized strategy/updater pair in one transaction, returns the brownie contract objects.
+    '''
+    tx = factory.deploy(
+        reserve_deployment(rate_strategy_params, asset, utilization_history, salt),
+        {"from": deployer_account}
+    )
+    strategy, updater = tx.return_value
+    return DynamicRateStrategyClone.at(strategy), VariableRateUpdater.at(updater)
+
 def deploy_mocks(
     deployer_account
 ):
@@ -68,6 +103,64 @@ def deploy_mocks(
 
     return {"Pool": pool, "AddressesProvider": addresses_provider}
 
+def deploy_mock_reserve(
+    deployer_account,
+    utilization_history
+):
+    '''
+    Deploys the mocks, a dynamic rate strategy and its updater for a mock reserve whose utilization is driven by
+    the total supplies of the mock aToken and debt tokens.
+    '''
+    deployed = deploy_mocks(deployer_account)
+    pool = deployed["Pool"]
+    addresses_provider = deployed["AddressesProvider"]
+
+    dynamic_rate_strategy = deploy_dynamic_rate_strategy(
+        default_rate_strategy_parameters(addresses_provider),
+        deployer_account
+    )
+
+    token = MockERC20.deploy({"from": deployer_account})
+    a_token = MockERC20.deploy({"from": deployer_account})
+    variable_debt_token = MockERC20.deploy({"from": deployer_account})
+    stable_debt_token = MockERC20.deploy({"from": deployer_account})
+
+    pool.setReserveData2(
+        token.address,
+        0,
+        a_token.address,
+        stable_debt_token.address,
+        variable_debt_token.address,
+        dynamic_rate_strategy.address,
+        0,
+        0,
+        0,
+        {"from": deployer_account}
+    )
+
+    variable_rate_updater = VariableRateUpdater.deploy(
+        addresses_provider,
+        token,
+        utilization_history,
+        {"from": deployer_account}
+    )
+    dynamic_rate_strategy.setVariableRateUpdater(variable_rate_updater.address, {"from": deployer_account})
+
+    deployed.update({
+        "DynamicRateStrategy": dynamic_rate_strategy,
+        "Token": token,
+        "AToken": a_token,
+        "VariableDebtToken": variable_debt_token,
+        "StableDebtToken": stable_debt_token,
+        "VariableRateUpdater": variable_rate_updater
+    })
+    return deployed
+
+def set_utilization(env, utilization, deployer_account):
+    # utilization = total debt / total aToken supply of the mock reserve, expressed in ray
+    env["AToken"].setTotalSupply(100 * 10**27, {"from": deployer_account})
+    env["VariableDebtToken"].setTotalSupply(utilization * 100, {"from": deployer_account})
+
 def main():
     deployer = accounts[0]
 
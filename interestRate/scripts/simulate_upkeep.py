@@ -0,0 +1,239 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+from eth_utils import keccak
+from brownie import web3, DynamicRateStrategy, VariableRateUpdater
+from scripts.rpc import batch_request
+
+'''
+What-if simulation of the keeper.
+
+Every scenario is evaluated with an eth_call carrying a state override (the third eth_call parameter supported by geth,
+anvil and hardhat), so nothing is written on chain and no deployment is needed to preview a parameter change.
+All the calls of a run are sent as JSON-RPC batches pinned to a single block, hundreds of scenarios cost a couple of
+HTTP round trips.
+
+Usage:
+    brownie run scripts/simulate_upkeep.py main <variable_rate_updater> <dynamic_rate_strategy> --network mainnet-fork
+'''
+
+# Storage layout of VariableRateUpdater, constants don't use storage
+UPDATER_COUNTER_SLOT = 0
+UPDATER_UTILIZATION_HISTORY_SLOT = 4
+UPDATER_LAST_TIMESTAMP_SLOT = 6
+# uint256[2], one byte per index
+UPDATER_SORTED_INDICES_SLOT = 68
+# uint128[61], two entries per word
+UPDATER_PREFIX_SUMS_SLOT = 70
+UPDATER_TRIMMED_SUM_SLOT = 101
+
+# Storage layout of DynamicRateStrategy, slot 0 is the wards mapping and the keeper parameters are packed in slot 1
+# as (offset in bits, width in bits). The curve parameters (epsilon included) are immutables or clone args, they
+# can't be overridden.
+STRATEGY_KEEPER_SLOT = 1
+STRATEGY_VARIABLE_RATE_SLOPE_1 = (0, 128)
+STRATEGY_M_PLUS = (128, 16)
+STRATEGY_M_MINUS = (144, 16)
+
+WINDOW = 60
+BATCH_SIZE = 200
+
+
+@dataclass
+class UpkeepScenario:
+    '''
+    A hypothetical state of the updater and the strategy, fields left to None keep their on-chain value.
+    '''
+    utilizationHistory: Optional[List[int]] = None
+    lastTimeStamp: Optional[int] = None
+    mPlus: Optional[int] = None
+    mMinus: Optional[int] = None
+    variableRateSlope1: Optional[int] = None
+    # CalculateInterestRatesParams tuple, if set the rates are also computed with the slope returned by checkUpkeep
+    interestRatesParams: Optional[tuple] = None
+
+
+@dataclass
+class UpkeepSimulation:
+    upkeepNeeded: bool
+    variableRateSlope1: int
+    # (liquidityRate, stableBorrowRate, variableBorrowRate), empty when the scenario has no interestRatesParams
+    rates: tuple = field(default_factory=tuple)
+
+
+def _word(value: int) -> str:
+    return "0x" + value.to_bytes(32, "big").hex()
+
+def _array_element_slot(array_slot: int, index: int) -> int:
+    # elements of a dynamic array start at keccak256(slot)
+    return int.from_bytes(keccak(array_slot.to_bytes(32, "big")), "big") + index
+
+def _set_bits(word: int, field: tuple, value: int) -> int:
+    offset, width = field
+    mask = (2**width - 1) << offset
+    assert value < 2**width, "value does not fit its packed field"
+    return (word & ~mask) | (value << offset)
+
+def sorted_indices_words(utilization_history: List[int]) -> List[int]:
+    indices = sorted(range(WINDOW), key=lambda k: utilization_history[k])
+    words = [0, 0]
+    for rank, index in enumerate(indices):
+        words[rank // 32] |= index << (8 * (rank % 32))
+    return words
+
+def prefix_sums_words(utilization_history: List[int], counter: int) -> List[int]:
+    '''
+    Prefix sums consistent with a ring history written `counter` times, the sum before the oldest sample is taken as 0
+    as only differences are read.
+    '''
+    entries = [0] * (WINDOW + 1)
+    prefix_sum = 0
+    for k in range(WINDOW):
+        prefix_sum += utilization_history[(counter + k) % WINDOW]
+        entries[(counter + k + 1) % (WINDOW + 1)] = prefix_sum % 2**128
+    words = [0] * ((WINDOW + 2) // 2)
+    for k, entry in enumerate(entries):
+        words[k // 2] |= entry << (128 * (k % 2))
+    return words
+
+def updater_state_diff(scenario: UpkeepScenario, counter: int = 0, trim: int = 0) -> dict:
+    '''
+    `counter` is the on-chain value of the counter, it places the overridden history in the prefix sums ring. `trim` is
+    the on-chain trim of the trimmed mean.
+    '''
+    state_diff = {}
+    if scenario.utilizationHistory is not None:
+        assert len(scenario.utilizationHistory) == WINDOW, "utilization history length"
+        for k, utilization in enumerate(scenario.utilizationHistory):
+            state_diff[_word(_array_element_slot(UPDATER_UTILIZATION_HISTORY_SLOT, k))] = _word(utilization)
+        # keeps the median and trimmed mean aggregations consistent with the overridden history
+        for k, word in enumerate(sorted_indices_words(scenario.utilizationHistory)):
+            state_diff[_word(UPDATER_SORTED_INDICES_SLOT + k)] = _word(word)
+        # and the means read from the prefix sums
+        for k, word in enumerate(prefix_sums_words(scenario.utilizationHistory, counter)):
+            state_diff[_word(UPDATER_PREFIX_SUMS_SLOT + k)] = _word(word)
+        trimmed_sum = sum(sorted(scenario.utilizationHistory)[trim:WINDOW - trim])
+        state_diff[_word(UPDATER_TRIMMED_SUM_SLOT)] = _word(trimmed_sum)
+    if scenario.lastTimeStamp is not None:
+        state_diff[_word(UPDATER_LAST_TIMESTAMP_SLOT)] = _word(scenario.lastTimeStamp)
+    return state_diff
+
+def strategy_state_diff(
+    scenario: UpkeepScenario,
+    keeper_word: int,
+    variable_rate_slope_1: Optional[int] = None
+) -> dict:
+    '''
+    `keeper_word` is the on-chain value of the packed keeper slot, the fields that are not overridden keep their value.
+    '''
+    if variable_rate_slope_1 is None:
+        variable_rate_slope_1 = scenario.variableRateSlope1
+    word = keeper_word
+    for field, value in (
+        (STRATEGY_VARIABLE_RATE_SLOPE_1, variable_rate_slope_1),
+        (STRATEGY_M_PLUS, scenario.mPlus),
+        (STRATEGY_M_MINUS, scenario.mMinus),
+    ):
+        if value is not None:
+            word = _set_bits(word, field, value)
+    if word == keeper_word:
+        return {}
+    return {_word(STRATEGY_KEEPER_SLOT): _word(word)}
+
+def batch_eth_call(calls: list, block_identifier: str, batch_size: int = BATCH_SIZE) -> List[str]:
+    '''
+    Sends (to, data, state_override) triples as JSON-RPC batches, returns the raw return data in the same order.
+    '''
+    return batch_request(
+        web3.provider.endpoint_uri,
+        [
+            ("eth_call", [{"to": to, "data": data}, block_identifier, state_override])
+            for to, data, state_override in calls
+        ],
+        batch_size
+    )
+
+def simulate_upkeeps(
+    variable_rate_updater,
+    dynamic_rate_strategy,
+    scenarios: List[UpkeepScenario],
+    block_identifier: Optional[int] = None
+) -> List[UpkeepSimulation]:
+    '''
+    Runs checkUpkeep for every scenario, then calculateInterestRates with the resulting slope for the scenarios that
+    carry interestRatesParams. Both passes are evaluated on the same block.
+    '''
+    if block_identifier is None:
+        block_identifier = web3.eth.block_number
+    block = hex(block_identifier)
+    keeper_word = int.from_bytes(
+        web3.eth.get_storage_at(dynamic_rate_strategy.address, STRATEGY_KEEPER_SLOT, block_identifier),
+        "big"
+    )
+    counter = int.from_bytes(
+        web3.eth.get_storage_at(variable_rate_updater.address, UPDATER_COUNTER_SLOT, block_identifier),
+        "big"
+    )
+    trim = variable_rate_updater.trim(block_identifier=block_identifier)
+
+    check_upkeep_data = variable_rate_updater.checkUpkeep.encode_input(b"")
+    calls = []
+    for scenario in scenarios:
+        calls.append((
+            variable_rate_updater.address,
+            check_upkeep_data,
+            {
+                variable_rate_updater.address: {"stateDiff": updater_state_diff(scenario, counter, trim)},
+                dynamic_rate_strategy.address: {"stateDiff": strategy_state_diff(scenario, keeper_word)},
+            }
+        ))
+
+    simulations = []
+    for raw in batch_eth_call(calls, block):
+        upkeep_needed, perform_data = variable_rate_updater.checkUpkeep.decode_output(raw)
+        slope = int.from_bytes(bytes(perform_data)[:32], "big")
+        simulations.append(UpkeepSimulation(bool(upkeep_needed), slope))
+
+    rate_calls = []
+    rate_indices = []
+    for k, scenario in enumerate(scenarios):
+        if scenario.interestRatesParams is None:
+            continue
+        rate_indices.append(k)
+        rate_calls.append((
+            dynamic_rate_strategy.address,
+            dynamic_rate_strategy.calculateInterestRates.encode_input(scenario.interestRatesParams),
+            {
+                dynamic_rate_strategy.address: {
+                    "stateDiff": strategy_state_diff(scenario, keeper_word, simulations[k].variableRateSlope1)
+                }
+            }
+        ))
+
+    for k, raw in zip(rate_indices, batch_eth_call(rate_calls, block)):
+        simulations[k].rates = tuple(dynamic_rate_strategy.calculateInterestRates.decode_output(raw))
+
+    return simulations
+
+
+def main(variable_rate_updater_address, dynamic_rate_strategy_address):
+    variable_rate_updater = VariableRateUpdater.at(variable_rate_updater_address)
+    dynamic_rate_strategy = DynamicRateStrategy.at(dynamic_rate_strategy_address)
+
+    # sweep of flat utilization histories against a grid of multipliers
+    scenarios = []
+    for utilization in range(50, 100, 5):
+        for m_plus in range(10_500, 12_500, 500):
+            for m_minus in range(8_000, 10_000, 500):
+                scenarios.append(UpkeepScenario(
+                    utilizationHistory=[utilization * 10**25] * WINDOW,
+                    mPlus=m_plus,
+                    mMinus=m_minus
+                ))
+
+    simulations = simulate_upkeeps(variable_rate_updater, dynamic_rate_strategy, scenarios)
+    print(f"{'U':>4} {'m+':>6} {'m-':>6} {'slope1 (ray)':>30}")
+    for scenario, simulation in zip(scenarios, simulations):
+        print(
+            f"{scenario.utilizationHistory[0] // 10**25:>3}% {scenario.mPlus:>6} {scenario.mMinus:>6} "
+            f"{simulation.variableRateSlope1:>30}"
+        )
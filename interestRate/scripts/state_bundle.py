@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional
+from scripts.rpc import request, RPCError
+
+'''
+Cached end state of scripts/use_in_production.py for production rehearsals without the fork.
+
+The bundle is the state of the configured fork dumped by anvil (anvil_dumpState), with the addresses of the
+contracts. It is keyed by a content hash of the contracts, the compiler settings and the setup scripts and
+parameters, and only rebuilt when one of them changes. A fresh local node loads it in a second or two, with no
+network access:
+
+    anvil --load-state build/state/<hash>.state.json
+    or load_bundle(endpoint, find_bundle()) on a running anvil
+
+Only the accounts and storage slots the setup touched are in the dump, the build reads the ones the keeper uses
+(reserve data, rates, upkeep checks) so that they are included. Rehearsals reaching into other mainnet state need
+the fork.
+
+Usage: brownie run scripts/state_bundle.py --network mainnet-fork (an anvil fork)
+'''
+
+ROOT = Path(__file__).resolve().parent.parent
+STATE_DIR = ROOT / "build" / "state"
+# what the end state depends on, directories are hashed recursively
+HASHED = (
+    "contracts",
+    "interfaces",
+    "brownie-config.yaml",
+    "scripts/constants.py",
+    "scripts/parameters.py",
+    "scripts/setup_mock_env.py",
+    "scripts/use_in_production.py",
+)
+
+
+@dataclass
+class StateBundle:
+    hash: str
+    chainId: int
+    blockNumber: int
+    timestamp: int
+    addresses: Dict[str, str]
+
+    def state_path(self, state_dir: Path = STATE_DIR) -> Path:
+        return state_dir / f"{self.hash}.state.json"
+
+
+def bundle_hash(root: Path = ROOT, hashed=HASHED) -> str:
+    '''
+    sha256 over the relative paths and contents of the hashed files, in a fixed order.
+    '''
+    digest = hashlib.sha256()
+    for name in hashed:
+        path = root / name
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in files:
+            if file.is_file() and "__pycache__" not in file.parts:
+                digest.update(file.relative_to(root).as_posix().encode() + b"\0")
+                digest.update(file.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+def find_bundle(digest: Optional[str] = None, state_dir: Path = STATE_DIR) -> Optional[StateBundle]:
+    '''
+    The bundle of the current sources, None when it has to be rebuilt.
+    '''
+    digest = digest or bundle_hash()
+    path = state_dir / f"{digest}.json"
+    if not path.exists():
+        return None
+    bundle = StateBundle(**json.loads(path.read_text()))
+    return bundle if bundle.state_path(state_dir).exists() else None
+
+def dump_bundle(
+    endpoint,
+    addresses: Dict[str, str],
+    digest: Optional[str] = None,
+    state_dir: Path = STATE_DIR
+) -> StateBundle:
+    '''
+    Writes the state of the node and the bundle metadata, the state file is in the format of anvil --load-state.
+    '''
+    try:
+        dump = request(endpoint, "anvil_dumpState", [])
+    except RPCError as error:
+        raise RuntimeError("the node can't dump its state, state bundles need anvil") from error
+    state = bytes.fromhex(dump.removeprefix("0x"))
+    if state[:2] == b"\x1f\x8b":
+        state = gzip.decompress(state)
+    block = request(endpoint, "eth_getBlockByNumber", ["latest", False])
+    bundle = StateBundle(
+        digest or bundle_hash(),
+        int(request(endpoint, "eth_chainId", []), 16),
+        int(block["number"], 16),
+        int(block["timestamp"], 16),
+        dict(addresses)
+    )
+    state_dir.mkdir(parents=True, exist_ok=True)
+    bundle.state_path(state_dir).write_bytes(state)
+    (state_dir / f"{bundle.hash}.json").write_text(json.dumps(asdict(bundle), indent=2, sort_keys=True) + "\n")
+    return bundle
+
+def load_bundle(endpoint, bundle: StateBundle, state_dir: Path = STATE_DIR) -> StateBundle:
+    '''
+    Loads the bundle into a running anvil and checks that the contracts are there.
+    '''
+    state = bundle.state_path(state_dir).read_bytes()
+    assert request(endpoint, "anvil_loadState", ["0x" + state.hex()]), "anvil_loadState failed"
+    request(endpoint, "anvil_setChainId", [bundle.chainId])
+    codes = [request(endpoint, "eth_getCode", [address, "latest"]) for address in bundle.addresses.values()]
+    missing = [name for name, code in zip(bundle.addresses, codes) if code in ("0x", "0x0")]
+    assert not missing, f"no code at {missing} after loading {bundle.hash}"
+    return bundle
+
+
+def main():
+    from brownie import accounts, web3
+    from scripts.use_in_production import configure_reserve, SDAI
+
+    digest = bundle_hash()
+    bundle = find_bundle(digest)
+    if bundle is None:
+        contracts = configure_reserve(accounts[0])
+        # reads the state the keeper and the rehearsals use, so that the fork pulls it into the dump
+        contracts["Pool"].getReserveData(SDAI)
+        contracts["DynamicRateStrategy"].getUpkeepParameters()
+        contracts["VariableRateUpdater"].checkUpkeep("")
+        addresses = {name: contract.address for name, contract in contracts.items()}
+        addresses["Asset"] = SDAI
+        bundle = dump_bundle(web3.provider.endpoint_uri, addresses, digest)
+        print(f"built state bundle {digest} at block {bundle.blockNumber}")
+    else:
+        print(f"state bundle {digest} is up to date")
+    print(f"anvil --load-state {bundle.state_path().relative_to(ROOT)} --chain-id {bundle.chainId}")
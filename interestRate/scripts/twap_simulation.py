@@ -0,0 +1,92 @@
+import random
+from scripts.rate_model import RAY, INTERVAL, WINDOW, UtilizationAccumulator, average_utilization
+
+'''
+Compares the 60-sample mean used by checkUpkeep with the time-weighted accumulator of VariableRateUpdater.
+
+The reference is the true time average of utilization over the lookback. Three keepers are simulated:
+- punctual: an upkeep right after every INTERVAL
+- irregular: random delays, upkeeps are often skipped while utilization is high (congested blocks), the samples
+  are no longer evenly spaced and stress periods are under-sampled
+- manipulated: punctual keeper, utilization is pushed up for a few minutes around every sample
+
+The accumulator only sees the samples, so it corrects for uneven spacing but a manipulated sample still weighs on the
+interval around it, it does not protect against the third case by itself.
+Errors are mean absolute errors against the reference, averaged over SEEDS runs.
+
+Usage: python -m scripts.twap_simulation
+'''
+
+MINUTE = 60
+DAYS = 90
+SEEDS = 20
+
+
+def utilization_path(rng, minutes):
+    # mean reverting around 75% with a regime change to 55% halfway
+    path = []
+    utilization = 0.75
+    for minute in range(minutes):
+        target = 0.75 if minute < minutes // 2 else 0.55
+        utilization += 0.0005 * (target - utilization) + rng.gauss(0, 0.002)
+        utilization = min(max(utilization, 0.0), 0.99)
+        path.append(int(utilization * RAY))
+    return path
+
+def keeper_times(rng, path, irregular):
+    horizon = len(path) * MINUTE
+    times = []
+    last = 0
+    while True:
+        t = last + INTERVAL + 1
+        if irregular:
+            t += int(rng.expovariate(1 / 3600))
+            while t < horizon and path[t // MINUTE] > 0.7 * RAY and rng.random() < 0.5:
+                t += INTERVAL
+        if t >= horizon:
+            return times
+        times.append(t)
+        last = t
+
+def run(scenario, rng):
+    minutes = DAYS * 24 * 60
+    path = utilization_path(rng, minutes)
+    times = keeper_times(rng, path, scenario == "irregular")
+
+    # seed the history at the initial utilization like the deployment does
+    history = [path[0]] * WINDOW
+    accumulator = UtilizationAccumulator(0, path[0])
+    prefix = [0]
+    for utilization in path:
+        prefix.append(prefix[-1] + utilization)
+
+    mean_errors, twap_errors = [], []
+    for counter, t in enumerate(times):
+        minute = t // MINUTE
+        utilization = path[minute]
+        if scenario == "manipulated":
+            utilization = min(utilization + int(0.2 * RAY), RAY)
+        history[counter % WINDOW] = utilization
+        accumulator.sample(t, utilization)
+
+        if counter < WINDOW:
+            continue
+        twap, period = accumulator.time_weighted_average(t, WINDOW - 1)
+        start = minute - period // MINUTE
+        reference = (prefix[minute] - prefix[start]) // (minute - start)
+        mean_errors.append(abs(average_utilization(history) - reference) / RAY)
+        twap_errors.append(abs(twap - reference) / RAY)
+
+    return sum(mean_errors) / len(mean_errors), sum(twap_errors) / len(twap_errors), len(times)
+
+
+def main():
+    print(f"{'keeper':<12} {'upkeeps':>8} {'60-sample mean MAE':>20} {'TWAP MAE':>10}")
+    for scenario in ("punctual", "irregular", "manipulated"):
+        runs = [run(scenario, random.Random(seed)) for seed in range(SEEDS)]
+        mean_error, twap_error, upkeeps = [sum(values) / SEEDS for values in zip(*runs)]
+        print(f"{scenario:<12} {upkeeps:>8.0f} {100 * mean_error:>19.3f}% {100 * twap_error:>9.3f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from scripts.client import ContractClient, call_batch, function_selector
+from scripts.rpc import batch_request, request, RPCError
+
+'''
+Transaction submission engine for a keeper serving many VariableRateUpdaters from one account.
+
+Nonces are handed out locally so upkeeps are sent in parallel instead of waiting on each other. A transaction still
+pending `stuck_blocks` blocks after it was sent, or refused as underpriced, is replaced (same nonce, same call) with
+fees bumped by `bump`, so a single underpriced upkeep doesn't hold back the later nonces. The max fee is never bumped
+past `max_fee_cap`, by default `max_fee_multiple` times the max fee the submission was sent with. `recover` fills the
+nonce gaps left in the node's pool by a previous run with cancellations (0 value transfers to self), queued
+transactions behind a gap would never be mined.
+
+Sending never raises: a refused send, a connection error or a timeout is recorded on the submission and retried by
+`poll` at the same nonce and fees. A submission only moves to a new nonce when its nonce was taken while none of its
+transactions could have reached the network.
+
+Transactions are signed locally when the account has a private key (brownie LocalAccount), otherwise they are sent
+with eth_sendTransaction (unlocked node accounts). `endpoint` is a node URL or a scripts.rpc_pool.RPCPool.
+The module doesn't need brownie, eth_abi and eth_account are imported on first use.
+'''
+
+UPKEEP_GAS = 500_000
+CANCEL_GAS = 21_000
+# geth and anvil require at least +10% on both fees to replace a transaction
+BUMP = 1.125
+# bound of the bumped max fee of a submission, relative to its max fee when submitted
+MAX_FEE_MULTIPLE = 4
+DEFAULT_PRIORITY_FEE = 10**9
+# answers to a resend of a transaction the node already has (geth, anvil)
+KNOWN_TRANSACTION_ERRORS = ("already known", "known transaction", "already imported")
+
+PENDING = "pending"
+MINED = "mined"
+# the nonce was used by another transaction
+DROPPED = "dropped"
+
+
+@dataclass
+class Submission:
+    to: str
+    data: str
+    nonce: int
+    gas: int
+    maxFeePerGas: int = 0
+    maxPriorityFeePerGas: int = 0
+    # highest maxFeePerGas a replacement may bid
+    maxFeeCap: int = 0
+    # every hash sent for this nonce, the last one has the highest fees
+    hashes: List[str] = field(default_factory=list)
+    status: str = PENDING
+    sentBlock: int = 0
+    sentAt: float = 0
+    replacements: int = 0
+    # set once mined
+    minedHash: Optional[str] = None
+    blockNumber: int = 0
+    gasUsed: int = 0
+    success: bool = False
+    # last error when sending, the submission is resent at the next poll
+    error: Optional[str] = None
+    # whether a transaction of the submission may have reached the network, even if its hash is unknown (a send to an
+    # unlocked account that timed out)
+    broadcast: bool = False
+    # a cancellation filling a nonce gap, see recover
+    cancellation: bool = False
+
+
+class UpkeepSubmitter:
+    def __init__(
+        self,
+        endpoint,
+        account,
+        stuck_blocks: int = 3,
+        bump: float = BUMP,
+        max_fee_cap: Optional[int] = None,
+        max_fee_multiple: float = MAX_FEE_MULTIPLE,
+        workers: int = 16
+    ):
+        self.endpoint = endpoint
+        self.account = account
+        self.address = account.address
+        self.stuck_blocks = stuck_blocks
+        self.bump = bump
+        self.max_fee_cap = max_fee_cap
+        self.max_fee_multiple = max_fee_multiple
+        self.submissions: List[Submission] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._chain_id = int(request(endpoint, "eth_chainId", []), 16)
+        self._next_nonce = self._transaction_count("pending")
+
+    def _transaction_count(self, block: str) -> int:
+        return int(request(self.endpoint, "eth_getTransactionCount", [self.address, block]), 16)
+
+    def _next(self) -> int:
+        with self._lock:
+            nonce = self._next_nonce
+            self._next_nonce += 1
+            return nonce
+
+    def fees(self):
+        '''
+        (maxFeePerGas, maxPriorityFeePerGas), the max fee covers the base fee doubling.
+        '''
+        block, priority = batch_request(self.endpoint, [
+            ("eth_getBlockByNumber", ["latest", False]),
+            ("eth_gasPrice", []),
+        ])
+        base_fee = int(block.get("baseFeePerGas") or "0x0", 16)
+        try:
+            priority = int(request(self.endpoint, "eth_maxPriorityFeePerGas", []), 16)
+        except RPCError:
+            priority = max(int(priority, 16) - base_fee, DEFAULT_PRIORITY_FEE)
+        max_fee = 2 * base_fee + priority
+        if self.max_fee_cap is not None:
+            max_fee = min(max_fee, self.max_fee_cap)
+        return max_fee, min(priority, max_fee)
+
+    def _submission(self, to: str, data: str, nonce: int, gas: int, max_fee: int, priority: int, **kwargs):
+        cap = self.max_fee_cap if self.max_fee_cap is not None else int(max_fee * self.max_fee_multiple)
+        return Submission(to, data, nonce, gas, max_fee, priority, max(cap, max_fee), **kwargs)
+
+    def _transaction(self, submission: Submission) -> dict:
+        return {
+            "from": self.address,
+            "to": submission.to,
+            "data": submission.data,
+            "value": 0,
+            "nonce": submission.nonce,
+            "gas": submission.gas,
+            "maxFeePerGas": submission.maxFeePerGas,
+            "maxPriorityFeePerGas": submission.maxPriorityFeePerGas,
+            "chainId": self._chain_id,
+            "type": 2,
+        }
+
+    def _send(self, submission: Submission):
+        '''
+        Sends the submission at its nonce, errors are recorded in `submission.error` rather than raised.
+        '''
+        try:
+            try:
+                self._broadcast(submission)
+            except RPCError as error:
+                # the node refused the transaction
+                submission.error = str(error.error)
+                if "nonce too low" in submission.error.lower():
+                    self._nonce_used(submission)
+        except Exception as error:
+            # connection error or timeout, the transaction may or may not have reached the node
+            submission.error = repr(error)
+
+    def _broadcast(self, submission: Submission):
+        tx = self._transaction(submission)
+        if hasattr(self.account, "private_key"):
+            from eth_account import Account
+
+            signed = Account.sign_transaction(tx, self.account.private_key)
+            raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+            tx_hash = "0x" + bytes(signed.hash).hex()
+            method, params = "eth_sendRawTransaction", ["0x" + bytes(raw).hex()]
+        else:
+            # the node returns the hash
+            tx_hash = None
+            method, params = "eth_sendTransaction", [
+                {key: hex(value) if isinstance(value, int) else value for key, value in tx.items()}
+            ]
+        try:
+            sent_hash = request(self.endpoint, method, params)
+        except RPCError as error:
+            # a resend of a transaction that reached the node after a connection error
+            message = str(error.error).lower()
+            if tx_hash is None or not any(known in message for known in KNOWN_TRANSACTION_ERRORS):
+                raise
+            sent_hash = tx_hash
+        except Exception:
+            # the transaction may still reach the network, a known hash has its receipt looked up like the others
+            submission.broadcast = True
+            if tx_hash is not None:
+                submission.hashes.append(tx_hash)
+            raise
+        submission.error = None
+        submission.broadcast = True
+        if (tx_hash or sent_hash) not in submission.hashes:
+            submission.hashes.append(tx_hash or sent_hash)
+        submission.sentAt = time.time()
+        submission.sentBlock = int(request(self.endpoint, "eth_blockNumber", []), 16)
+
+    def _nonce_used(self, submission: Submission):
+        '''
+        The nonce of the submission was used: by one of its own transactions (mined), by another transaction after one
+        of its own may have been broadcast (dropped, the upkeep isn't sent twice), or by another transaction before any
+        of its own could be (moved to a fresh nonce). A cancellation is dropped, its gap is filled.
+        '''
+        if submission.hashes:
+            receipts = batch_request(
+                self.endpoint,
+                [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in submission.hashes]
+            )
+            for tx_hash, receipt in zip(submission.hashes, receipts):
+                if receipt is not None:
+                    _record_receipt(submission, tx_hash, receipt)
+                    return
+        if submission.broadcast or submission.cancellation:
+            submission.status = DROPPED
+            return
+        with self._lock:
+            self._next_nonce = max(self._next_nonce, self._transaction_count("pending"))
+        submission.nonce = self._next()
+
+    def submit(self, to: str, data: str, gas: int = UPKEEP_GAS) -> Submission:
+        submission = self._submission(to, data, self._next(), gas, *self.fees())
+        self._send(submission)
+        with self._lock:
+            self.submissions.append(submission)
+        return submission
+
+    def submit_upkeeps(self, upkeeps: List[tuple]) -> List[Submission]:
+        '''
+        Sends (variable rate updater address, performData bytes) pairs concurrently, nonces are assigned in order.
+        '''
+        max_fee, priority = self.fees()
+        submissions = [
+            self._submission(
+                updater, "0x" + _perform_upkeep_input(perform_data), self._next(), UPKEEP_GAS, max_fee, priority
+            )
+            for updater, perform_data in upkeeps
+        ]
+        list(self._executor.map(self._send, submissions))
+        with self._lock:
+            self.submissions.extend(submissions)
+        return submissions
+
+    def _bump(self, submission: Submission):
+        max_fee = int(submission.maxFeePerGas * self.bump) + 1
+        if max_fee > submission.maxFeeCap:
+            return
+        priority = min(int(submission.maxPriorityFeePerGas * self.bump) + 1, max_fee)
+        submission.maxFeePerGas, submission.maxPriorityFeePerGas = max_fee, priority
+        submission.replacements += 1
+        self._send(submission)
+
+    def poll(self) -> int:
+        '''
+        Records the mined submissions, replaces the stuck and the underpriced ones with bumped fees, and resends the
+        ones that failed otherwise (connection error, insufficient funds...) at the same fees.
+        Returns the number of submissions still pending.
+        '''
+        pending = [submission for submission in self.submissions if submission.status == PENDING]
+        if not pending:
+            return 0
+        # read before the receipts: a nonce mined at this point has its receipt visible
+        mined_nonce = self._transaction_count("latest")
+        calls = [("eth_getTransactionReceipt", [tx_hash]) for submission in pending for tx_hash in submission.hashes]
+        receipts = iter(batch_request(self.endpoint, calls + [("eth_blockNumber", [])]))
+
+        for submission in pending:
+            for tx_hash in submission.hashes:
+                receipt = next(receipts)
+                if receipt is not None:
+                    _record_receipt(submission, tx_hash, receipt)
+        head = int(next(receipts), 16)
+
+        still_pending = 0
+        for submission in pending:
+            if submission.status != PENDING:
+                continue
+            if submission.nonce < mined_nonce and submission.broadcast:
+                submission.status = DROPPED
+                continue
+            still_pending += 1
+            underpriced = submission.error is not None and "underpriced" in submission.error.lower()
+            stuck = submission.error is None and head - submission.sentBlock >= self.stuck_blocks
+            if underpriced or (stuck and submission.hashes):
+                self._bump(submission)
+            elif submission.error is not None or not submission.hashes:
+                self._send(submission)
+        return still_pending
+
+    def wait(self, timeout: float = 120, interval: float = 1) -> bool:
+        deadline = time.time() + timeout
+        while self.poll():
+            if time.time() > deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def recover(self) -> List[int]:
+        '''
+        Fills the nonce gaps between the mined nonce and the highest transaction of the account in the node's pool
+        (txpool_content, supported by geth, anvil and ganache) with cancellations. Without txpool_content only the
+        nonces this submitter handed out are known, the gaps are only looked for among them. The nonces of pending
+        submissions are never cancelled, `poll` sends them. Returns the cancelled nonces.
+        '''
+        mined_nonce = self._transaction_count("latest")
+        # there is no gap below the pending count of the node
+        queued = set(range(mined_nonce, self._transaction_count("pending")))
+        with self._lock:
+            submissions = list(self.submissions)
+        pending = [submission for submission in submissions if submission.status == PENDING]
+        start = mined_nonce
+        try:
+            content = request(self.endpoint, "txpool_content", [])
+            for section in ("pending", "queued"):
+                for address, transactions in content.get(section, {}).items():
+                    if address.lower() == self.address.lower():
+                        queued.update(int(nonce) for nonce in transactions)
+        except RPCError:
+            if not submissions:
+                return []
+            start = max(mined_nonce, min(submission.nonce for submission in submissions))
+        queued.update(submission.nonce for submission in pending if submission.broadcast)
+        highest = max(queued, default=start - 1)
+        owned = {submission.nonce for submission in pending}
+        gaps = [nonce for nonce in range(start, highest + 1) if nonce not in queued and nonce not in owned]
+
+        max_fee, priority = self.fees()
+        cancellations = [
+            self._submission(self.address, "0x", nonce, CANCEL_GAS, max_fee, priority, cancellation=True)
+            for nonce in gaps
+        ]
+        for cancellation in cancellations:
+            self._send(cancellation)
+        with self._lock:
+            self.submissions.extend(cancellations)
+            self._next_nonce = max(self._next_nonce, highest + 1)
+        return gaps
+
+    def throughput(self) -> Dict[str, float]:
+        '''
+        Upkeeps mined per block, from the block of the first submission to the block of the last mined one.
+        '''
+        mined = [
+            submission for submission in self.submissions if submission.status == MINED and not submission.cancellation
+        ]
+        if not mined:
+            return {"upkeeps": 0, "blocks": 0, "upkeepsPerBlock": 0, "maxPerBlock": 0}
+        first = min(submission.sentBlock for submission in self.submissions if submission.hashes)
+        last = max(submission.blockNumber for submission in mined)
+        per_block = {}
+        for submission in mined:
+            per_block[submission.blockNumber] = per_block.get(submission.blockNumber, 0) + 1
+        blocks = max(last - first, 1)
+        return {
+            "upkeeps": len(mined),
+            "blocks": blocks,
+            "upkeepsPerBlock": len(mined) / blocks,
+            "maxPerBlock": max(per_block.values()),
+        }
+
+    def close(self):
+        self._executor.shutdown()
+
+
+def _record_receipt(submission: Submission, tx_hash: str, receipt: dict):
+    submission.status = MINED
+    submission.minedHash = tx_hash
+    submission.blockNumber = int(receipt["blockNumber"], 16)
+    submission.gasUsed = int(receipt["gasUsed"], 16)
+    submission.success = int(receipt["status"], 16) == 1
+
+def _perform_upkeep_input(perform_data: bytes) -> str:
+    from eth_abi import encode
+
+    return function_selector("performUpkeep(bytes)") + encode(["bytes"], [perform_data]).hex()
+
+def check_upkeeps(endpoint, updaters: List[str], block="latest", reader=None) -> List[tuple]:
+    '''
+    Runs checkUpkeep on every updater in one batch, returns the (updater, performData) pairs that need an upkeep.
+    With a scripts.rpc_cache.CachedReader the results are reused by the other reads of the block, see call_batch.
+    '''
+    calls = [
+        (ContractClient.at(endpoint, "VariableRateUpdater", updater), "checkUpkeep", (b"",)) for updater in updaters
+    ]
+    upkeeps = []
+    for updater, (upkeep_needed, perform_data) in zip(updaters, call_batch(endpoint, calls, block, reader)):
+        if upkeep_needed:
+            upkeeps.append((updater, perform_data))
+    return upkeeps
+
+
+def main(*updaters):
+    '''
+    One keeper round over the given updaters: brownie run scripts/tx_submitter.py main <updater> [<updater> ...]
+    '''
+    from brownie import accounts, web3
+    from scripts.rpc_cache import CachedReader
+
+    endpoint = web3.provider.endpoint_uri
+    submitter = UpkeepSubmitter(endpoint, accounts[0])
+    print(f"recovered nonces: {submitter.recover()}")
+    submissions = submitter.submit_upkeeps(check_upkeeps(endpoint, list(updaters), reader=CachedReader(endpoint)))
+    print(f"{len(submissions)} upkeeps sent")
+    submitter.wait()
+    print(submitter.throughput())
+    submitter.close()
@@ -1,16 +1,13 @@
-import logging
-from dataclasses import dataclass
-import pytest
-import brownie
 import time
-from eth_abi import decode
 from brownie import (
     accounts,
+    web3,
     Contract,
-    chain,
-    DynamicRateStrategy,
     VariableRateUpdater,
 )
+from scripts.parameters import default_rate_strategy_parameters
+from scripts.rpc import set_balance
+from scripts.setup_mock_env import deploy_dynamic_rate_strategy
 
 SPARK_ADDRESSES_PROVIDER = "0x02C3eA4e34C0cBd694D2adFa2c690EECbC1793eE"
 POOL_ADMIN_ADDRESS = "0xBE8E3e3618f7474F8cB1d074A26afFef007E98FB"
@@ -18,89 +15,25 @@ SDAI = "0x83F20F44975D03b1b09e64809B757c47f942BEeA"
 
 BIG_SDAI_HOLDER = "0x66B870dDf78c975af5Cd8EDC6De25eca81791DE1"
 
-OPTIMAL_USAGE_RATIO = 800000000000000000000000000
-BASE_VARIABLE_BORROW_RATE = 10000000000000000000000000
-VARIABLE_RATE_SLOPE_1 = 38000000000000000000000000
-VARIABLE_RATE_SLOPE_2 = 800000000000000000000000000
-STABLE_RATE_SLOPE_1 = 0
-STABLE_RATE_SLOPE_2 = 0
-BASE_STABLE_RATE_OFFSET =  38000000000000000000000000 - VARIABLE_RATE_SLOPE_1 
-STABLE_RATE_EXCESS_OFFSET = 0
-OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO = 0
-EPSILON = 100000000000000000000000000 # 10%
-M_PLUS = int(10_000*1.1) # M_PLUS = 1.1
-M_MINUS = int(10_000*0.9) # M_MINUS = 0.9
-
 UTILIZATION_HISTORY = [(60-k)*10**25 for k in range(30)] + [(30+k)*10**25 for k in range(30)]
 
-@dataclass
-class RateStrategyParameters:
-    provider: Contract
-    optimalUsageRatio: int
-    baseVariableBorrowRate: int
-    variableRateSlope1: int
-    variableRateSlope2: int
-    stableRateSlope1: int
-    stableRateSlope2: int
-    baseStableRateOffset: int
-    stableRateExcessOffset: int
-    optimalStableToTotalDebtRatio: int
-    epsilon: int # the parameter to 
-    mPlus: int
-    mMinus: int
-
-def deploy_dynamic_rate_strategy(
-    rate_strategy_params: RateStrategyParameters,
-    deployer_account
-):
-    rate_strategy = DynamicRateStrategy.deploy(
-        rate_strategy_params.provider,
-        rate_strategy_params.optimalUsageRatio,
-        rate_strategy_params.baseVariableBorrowRate,
-        rate_strategy_params.variableRateSlope1,
-        rate_strategy_params.variableRateSlope2,
-        rate_strategy_params.stableRateSlope1,
-        rate_strategy_params.stableRateSlope2,
-        rate_strategy_params.baseStableRateOffset,
-        rate_strategy_params.stableRateExcessOffset,
-        rate_strategy_params.optimalStableToTotalDebtRatio,
-        rate_strategy_params.epsilon,
-        {"from": deployer_account}
-    )
-
-    # this will work because the deployer is a pool configurator in mock contract
-    rate_strategy.setMPlus(rate_strategy_params.mPlus, {"from": deployer_account})
-    rate_strategy.setMMinus(rate_strategy_params.mMinus, {"from": deployer_account})
-    return rate_strategy
-
 def deploy_rate_strategy(
     addresses_provider,
-    deployer_account
+    deployer_account,
+    pool_configurator_account=None
 ):
-    rate_strategy_params = RateStrategyParameters(
-        addresses_provider,
-        OPTIMAL_USAGE_RATIO,
-        BASE_VARIABLE_BORROW_RATE,
-        VARIABLE_RATE_SLOPE_1,
-        VARIABLE_RATE_SLOPE_2,
-        STABLE_RATE_SLOPE_1,
-        STABLE_RATE_SLOPE_2,
-        BASE_STABLE_RATE_OFFSET,
-        STABLE_RATE_EXCESS_OFFSET,
-        OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO,
-        EPSILON,
-        M_PLUS,
-        M_MINUS
+    return deploy_dynamic_rate_strategy(
+        default_rate_strategy_parameters(addresses_provider),
+        deployer_account,
+        pool_configurator_account
     )
 
-    dynamic_rate_strategy = deploy_dynamic_rate_strategy(rate_strategy_params, deployer_account)
-    return dynamic_rate_strategy
-
 
-
-
-def main():
-    deployer_account = accounts[0]
+def configure_reserve(deployer_account):
+    '''
+    Unfreezes and configures the sDAI reserve of the fork and plugs in a dynamic rate strategy and its updater.
+    Returns the contracts, the state they leave behind is what scripts/state_bundle.py dumps.
+    '''
     addresses_provider = Contract.from_explorer(SPARK_ADDRESSES_PROVIDER)
     
     # we get the pool address
@@ -129,6 +62,11 @@ def main():
     # Impersonating the pool admin
     pool_admin_account = accounts.at(POOL_ADMIN_ADDRESS, force = True)
 
+    # and the pool configurator, the only caller of the setters of the strategy
+    pool_configurator_account = accounts.at(pool_configurator_address, force = True)
+    # it is a contract without ether, it needs some for the gas
+    set_balance(web3.provider.endpoint_uri, pool_configurator_address, 10**18)
+
     # Unfreeze the reserve 
     pool_configurator.setReserveFreeze(SDAI, False, {"from": pool_admin_account})
 
@@ -201,7 +139,7 @@ def main():
     time.sleep(1)
 
     # deploy the dynamic rate strategy
-    dynamic_rate_strategy = deploy_rate_strategy(addresses_provider, {"from": deployer_account})
+    dynamic_rate_strategy = deploy_rate_strategy(addresses_provider, deployer_account, pool_configurator_account)
 
     # deploy the variable rate updater a.k.a the Upkeep Contract
     variable_rate_updater = VariableRateUpdater.deploy(
@@ -214,7 +152,7 @@ def main():
     # allow the keeper to update the variable rate slope
     dynamic_rate_strategy.setVariableRateUpdater(
         variable_rate_updater.address,
-        {"from": deployer_account}
+        {"from": pool_configurator_account}
     )
 
     # update the interest rate strategy to be the dynamic one
@@ -224,4 +162,15 @@ def main():
         {"from": pool_admin_account}
     )
 
-    # The keeper can start updating the interest rate strategy.
\ No newline at end of file
+    # The keeper can start updating the interest rate strategy.
+    return {
+        "AddressesProvider": addresses_provider,
+        "Pool": pool,
+        "PoolConfigurator": pool_configurator,
+        "DynamicRateStrategy": dynamic_rate_strategy,
+        "VariableRateUpdater": variable_rate_updater
+    }
+
+
+def main():
+    configure_reserve(accounts[0])
@@ -0,0 +1,108 @@
+import time
+import pytest
+
+from brownie import (
+    accounts,
+    chain,
+    MockERC20,
+    VariableRateUpdater
+)
+from scripts.parameters import default_rate_strategy_parameters
+from scripts.rate_model import INTERVAL
+from scripts.setup_mock_env import deploy_mocks, deploy_dynamic_rate_strategy, set_utilization
+
+'''
+Shared mock environment of the test modules, the strategy parameters and the deployment helpers come from scripts/.
+'''
+
+CONFIGURATION =379853409927534986586068957228306619304257013817152
+LIQUIDITY_INDEX = 1004278376717578583172650619
+CURRENT_LIQUIDITY_RATE = 20061017668802092313940498
+VARIABLE_BORROW_INDEX = 1008489934007315513484719002
+CURRENT_STABLE_BORROW_RATE = 38000000000000000000000000
+ID = 3
+ACCRUED_TO_TREASURY = 642974246913988945
+
+# pyramid shaped, the average utilization is 45%
+UTILIZATION_HISTORY = [(60-k)*10**25 for k in range(30)] + [(30+k)*10**25 for k in range(30)]
+
+
+def deploy_env(
+    deployer_account,
+    utilization_history
+):
+    # the deployer acts as the pool configurator
+    deployed = deploy_mocks(deployer_account)
+    pool = deployed["Pool"]
+    addresses_provider = deployed["AddressesProvider"]
+    dynamic_rate_strategy = deploy_dynamic_rate_strategy(
+        default_rate_strategy_parameters(addresses_provider),
+        deployer_account
+    )
+
+    token = MockERC20.deploy({"from": deployer_account})
+    a_token = MockERC20.deploy({"from": deployer_account})
+    variable_debt_token = MockERC20.deploy({"from": deployer_account})
+    stable_debt_token = MockERC20.deploy({"from": deployer_account})
+
+    pool.setReserveData(
+        token.address,
+        CONFIGURATION,
+        LIQUIDITY_INDEX,
+        CURRENT_LIQUIDITY_RATE,
+        VARIABLE_BORROW_INDEX,
+        CURRENT_STABLE_BORROW_RATE,
+        int(time.time()),
+        {"from": deployer_account}
+    )
+    pool.setReserveData2(
+        token.address,
+        ID,
+        a_token.address,
+        stable_debt_token.address,
+        variable_debt_token.address,
+        dynamic_rate_strategy.address,
+        ACCRUED_TO_TREASURY,
+        0,
+        0,
+        {"from": deployer_account}
+    )
+
+    variable_rate_updater = VariableRateUpdater.deploy(
+        addresses_provider,
+        token,
+        utilization_history,
+        {"from": deployer_account}
+    )
+    dynamic_rate_strategy.setVariableRateUpdater(
+        variable_rate_updater.address,
+        {"from": deployer_account}
+    )
+
+    return {
+        "AddressesProvider": addresses_provider,
+        "Pool": pool,
+        "DynamicRateStrategy": dynamic_rate_strategy,
+        "Token": token,
+        "AToken": a_token,
+        "VariableDebtToken": variable_debt_token,
+        "StableDebtToken": stable_debt_token,
+        "VariableRateUpdater": variable_rate_updater
+    }
+
+
+def perform_upkeep_at_utilization(env, utilization, delay=INTERVAL + 1):
+    '''
+    Sets the utilization of the mock reserve, waits `delay` seconds and performs the upkeep checkUpkeep returns.
+    '''
+    set_utilization(env, utilization, accounts[0])
+    chain.sleep(delay)
+    chain.mine(1)
+    variable_rate_updater = env["VariableRateUpdater"]
+    _, data = variable_rate_updater.checkUpkeep("")
+    return variable_rate_updater.performUpkeep(data, {"from": accounts[0]})
+
+
+@pytest.fixture
+def mock_env():
+    return deploy_env(accounts[0], UTILIZATION_HISTORY)
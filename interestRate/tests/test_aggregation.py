@@ -0,0 +1,86 @@
+import random
+import brownie
+from brownie import accounts
+
+from scripts.rate_model import MEAN, MEDIAN, TRIMMED_MEAN, aggregate_utilization
+from conftest import UTILIZATION_HISTORY, perform_upkeep_at_utilization
+
+'''
+The sorted indices must follow the utilization history through the ring writes so that the median and the trimmed
+mean match the off-chain model.
+'''
+
+def assert_sorted(variable_rate_updater, history):
+    ranked = [history[variable_rate_updater.sortedIndex(rank)] for rank in range(60)]
+    assert ranked == sorted(history)
+
+def test_set_aggregation(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    assert variable_rate_updater.aggregation() == MEAN
+    assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(UTILIZATION_HISTORY)
+
+    with brownie.reverts():
+        variable_rate_updater.setAggregation(MEDIAN, 0, {"from": accounts[1]})
+    with brownie.reverts("VariableRateUpdate/trim"):
+        variable_rate_updater.setAggregation(TRIMMED_MEAN, 30, {"from": accounts[0]})
+    with brownie.reverts("VariableRateUpdate/trim"):
+        variable_rate_updater.setAggregation(MEDIAN, 1, {"from": accounts[0]})
+
+    tx = variable_rate_updater.setAggregation(MEDIAN, 0, {"from": accounts[0]})
+    assert tx.events["AggregationUpdated"]["aggregation"] == MEDIAN
+    assert_sorted(variable_rate_updater, UTILIZATION_HISTORY)
+    assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(UTILIZATION_HISTORY, MEDIAN)
+
+    variable_rate_updater.setAggregation(TRIMMED_MEAN, 6, {"from": accounts[0]})
+    assert variable_rate_updater.trim() == 6
+    assert variable_rate_updater.aggregatedUtilization() == \
+        aggregate_utilization(UTILIZATION_HISTORY, TRIMMED_MEAN, 6)
+
+def test_matches_model(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    variable_rate_updater.setAggregation(MEDIAN, 0, {"from": accounts[0]})
+    history = list(UTILIZATION_HISTORY)
+    rng = random.Random(0)
+
+    # more than a window, with duplicates and extreme samples
+    for k in range(70):
+        utilization = rng.choice([0, 10**27, 80 * 10**25, rng.randint(0, 10**27)])
+        perform_upkeep_at_utilization(mock_env, utilization)
+        history[k % 60] = utilization
+        assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(history, MEDIAN)
+    assert_sorted(variable_rate_updater, history)
+
+    variable_rate_updater.setAggregation(TRIMMED_MEAN, 10, {"from": accounts[0]})
+    assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(history, TRIMMED_MEAN, 10)
+
+def test_trimmed_sum_follows_writes(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    variable_rate_updater.setAggregation(TRIMMED_MEAN, 6, {"from": accounts[0]})
+    history = list(UTILIZATION_HISTORY)
+    rng = random.Random(1)
+
+    # the incremental trimmed sum, samples moving up, down, to the trimmed ends and onto equal samples
+    for k in range(65):
+        utilization = rng.choice([0, 10**27, history[rng.randrange(60)], rng.randint(0, 10**27)])
+        perform_upkeep_at_utilization(mock_env, utilization)
+        history[k % 60] = utilization
+        assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(history, TRIMMED_MEAN, 6)
+
+    # summed again when the trim changes
+    variable_rate_updater.setAggregation(TRIMMED_MEAN, 1, {"from": accounts[0]})
+    assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(history, TRIMMED_MEAN, 1)
+    perform_upkeep_at_utilization(mock_env, 10**27)
+    history[65 % 60] = 10**27
+    assert variable_rate_updater.aggregatedUtilization() == aggregate_utilization(history, TRIMMED_MEAN, 1)
+
+def test_median_resists_outliers(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    variable_rate_updater.setAggregation(MEDIAN, 0, {"from": accounts[0]})
+    median = variable_rate_updater.aggregatedUtilization()
+    mean = aggregate_utilization(UTILIZATION_HISTORY)
+
+    for _ in range(5):
+        perform_upkeep_at_utilization(mock_env, 10**27)
+    history = [10**27] * 5 + UTILIZATION_HISTORY[5:]
+    assert aggregate_utilization(history) - mean > 10**25
+    assert variable_rate_updater.aggregatedUtilization() - median < aggregate_utilization(history) - mean
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from brownie import accounts, chain, web3
+
+from scripts.client import ContractClient, deploy_dynamic_rate_strategy
+from scripts.parameters import default_rate_strategy_parameters
+from conftest import UTILIZATION_HISTORY
+
+'''
+The brownie-free client must read and write the same values as the brownie contract objects, and the keeper modules
+must import without brownie.
+'''
+
+def test_no_brownie_import():
+    code = "import sys, scripts.client, scripts.tx_submitter, scripts.parameters; print('brownie' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+
+def test_calls_match_brownie(mock_env):
+    endpoint = web3.provider.endpoint_uri
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    updater = ContractClient.at(endpoint, "VariableRateUpdater", variable_rate_updater.address)
+    strategy = ContractClient.at(endpoint, "DynamicRateStrategy", mock_env["DynamicRateStrategy"].address)
+
+    assert updater.call("counter") == variable_rate_updater.counter()
+    assert updater.call("utilizationHistory", 7) == variable_rate_updater.utilizationHistory(7) == UTILIZATION_HISTORY[7]
+    assert tuple(strategy.call("getUpkeepParameters")) == tuple(mock_env["DynamicRateStrategy"].getUpkeepParameters())
+    assert updater.call_many([("avgUtilization", ()), ("lastTimeStamp", ())]) == \
+        [variable_rate_updater.avgUtilization(), variable_rate_updater.lastTimeStamp()]
+
+    mock_env["AToken"].setTotalSupply(100 * 10**27, {"from": accounts[0]})
+    mock_env["VariableDebtToken"].setTotalSupply(50 * 10**27, {"from": accounts[0]})
+    chain.sleep(12*60*60 + 1)
+    chain.mine(1)
+    upkeep_needed, perform_data = updater.call("checkUpkeep", b"")
+    assert (upkeep_needed, perform_data) == tuple(variable_rate_updater.checkUpkeep(""))
+    updater.transact("performUpkeep", perform_data, sender=accounts[0].address)
+    assert variable_rate_updater.counter() == 1
+    assert strategy.call("getVariableRateSlope1") == int.from_bytes(perform_data, "big")
+
+def test_deploy(mock_env):
+    endpoint = web3.provider.endpoint_uri
+    params = default_rate_strategy_parameters(mock_env["AddressesProvider"].address)
+    strategy = deploy_dynamic_rate_strategy(endpoint, params, accounts[0].address)
+    assert strategy.call("EPSILON") == params.epsilon
+    assert strategy.call("getMPlus") == params.mPlus
+    assert strategy.call("getMMinus") == params.mMinus
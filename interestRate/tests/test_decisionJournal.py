@@ -0,0 +1,104 @@
+import pytest
+from brownie import accounts, chain, web3
+
+from scripts.decision_journal import DecisionJournal, read_decision_inputs, complete_decision, replay
+from scripts.rate_model import early_adjustment
+from scripts.tx_submitter import UpkeepSubmitter, check_upkeeps
+
+'''
+The journal must hold what the keeper saw and did, read back the same through the memory map, and replay through
+the off-chain model without mismatches.
+'''
+
+def keeper_round(env, journal, endpoint, submitter):
+    updater, strategy = env["VariableRateUpdater"].address, env["DynamicRateStrategy"].address
+    block = web3.eth.block_number
+    upkeeps = check_upkeeps(endpoint, [updater], block)
+    assert len(upkeeps) == 1
+    decision = read_decision_inputs(endpoint, updater, strategy, block)
+    submission, = submitter.submit_upkeeps(upkeeps)
+    assert submitter.wait(timeout=60, interval=0.1)
+    return journal.append(complete_decision(endpoint, decision, strategy, submission.minedHash))
+
+def test_journal_keeper_rounds(mock_env, tmp_path):
+    endpoint = web3.provider.endpoint_uri
+    submitter = UpkeepSubmitter(endpoint, accounts[0])
+    journal = DecisionJournal(tmp_path / "keeper.journal")
+    mock_env["AToken"].setTotalSupply(100 * 10**27, {"from": accounts[0]})
+    for utilization in (50, 95, 20):
+        mock_env["VariableDebtToken"].setTotalSupply(utilization * 10**27, {"from": accounts[0]})
+        chain.sleep(12*60*60 + 1)
+        chain.mine(1)
+        keeper_round(mock_env, journal, endpoint, submitter)
+    submitter.close()
+
+    assert len(journal) == 3
+    last = journal.decision(2)
+    assert last.updater == mock_env["VariableRateUpdater"].address.lower()
+    assert last.appliedSlope == mock_env["DynamicRateStrategy"].getVariableRateSlope1() == last.newSlope
+    assert last.counter == 2 and last.success and last.gasUsed > 0
+    assert replay(journal) == []
+
+    # reopened, the records and the reserve table are the same
+    journal.close()
+    journal = DecisionJournal(tmp_path / "keeper.journal")
+    assert journal.decision(2) == last
+    assert list(journal.query(last.updater, start=journal.decision(1).timestamp)) == [1, 2]
+    assert len(journal.query(accounts[1].address)) == 0
+
+def test_early_upkeep(mock_env, tmp_path):
+    endpoint = web3.provider.endpoint_uri
+    submitter = UpkeepSubmitter(endpoint, accounts[0])
+    journal = DecisionJournal(tmp_path / "keeper.journal")
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    variable_rate_updater.setEarlyAdjustment(6, 500, {"from": accounts[0]})
+    history = [variable_rate_updater.utilizationHistory(k) for k in range(60)]
+    assert early_adjustment(history, 0, 99 * 10**25, short_horizon=6, early_adjustment_threshold=500)[0]
+
+    # a jump of utilization within the interval
+    mock_env["AToken"].setTotalSupply(100 * 10**27, {"from": accounts[0]})
+    mock_env["VariableDebtToken"].setTotalSupply(99 * 10**27, {"from": accounts[0]})
+    chain.sleep(60)
+    chain.mine(1)
+    decision = journal.decision(keeper_round(mock_env, journal, endpoint, submitter))
+    submitter.close()
+
+    assert decision.timestamp - decision.lastTimeStamp <= 12*60*60
+    assert decision.liveUtilization == 99 * 10**25
+    assert decision.slopeUtilization != decision.avgUtilization
+    assert decision.success and decision.appliedSlope == decision.newSlope
+    assert replay(journal) == []
+
+    # the early upkeep refreshed the latest sample, the rule waits for the next interval
+    after = read_decision_inputs(endpoint, variable_rate_updater.address, mock_env["DynamicRateStrategy"].address)
+    assert after.latestSampleTimestamp > after.lastTimeStamp == decision.lastTimeStamp
+    assert after.slopeUtilization == after.avgUtilization
+    journal.append(after)
+    assert [mismatch.field for mismatch in replay(journal)] == ["success"]
+
+def test_tampered_and_truncated(mock_env, tmp_path):
+    endpoint = web3.provider.endpoint_uri
+    journal = DecisionJournal(tmp_path / "keeper.journal")
+    mock_env["AToken"].setTotalSupply(100 * 10**27, {"from": accounts[0]})
+    mock_env["VariableDebtToken"].setTotalSupply(85 * 10**27, {"from": accounts[0]})
+    decision = read_decision_inputs(
+        endpoint, mock_env["VariableRateUpdater"].address, mock_env["DynamicRateStrategy"].address
+    )
+
+    # an upkeep that never went through, with a slope the model doesn't give
+    decision.newSlope += 1
+    journal.append(decision)
+    mismatches = replay(journal)
+    assert [mismatch.field for mismatch in mismatches] == ["newSlope", "success"]
+
+    with pytest.raises(AssertionError):
+        decision.timestamp -= 1
+        journal.append(decision)
+
+    # a record cut short by a crash is dropped on the next open
+    journal.close()
+    with open(tmp_path / "keeper.journal", "ab") as file:
+        file.write(b"\0" * 100)
+    journal = DecisionJournal(tmp_path / "keeper.journal")
+    assert len(journal) == 1
+    assert journal.decision(0).newSlope == decision.newSlope
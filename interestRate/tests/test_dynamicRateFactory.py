@@ -0,0 +1,114 @@
+import brownie
+from brownie import accounts, MockERC20, DynamicRateStrategyClone
+
+from scripts.setup_mock_env import (
+    deploy_mocks,
+    deploy_dynamic_rate_factory,
+    deploy_dynamic_rate_strategy,
+    default_rate_strategy_parameters,
+    deploy_with_factory,
+    reserve_deployment
+)
+from scripts.constants import (
+    EPSILON,
+    OPTIMAL_USAGE_RATIO,
+    VARIABLE_RATE_SLOPE_1,
+    M_PLUS,
+    M_MINUS
+)
+from conftest import UTILIZATION_HISTORY
+
+'''
+The clones must behave like contracts deployed with the constructor, be wired to each other and land at the
+predicted addresses.
+'''
+
+ASSET = "0x83F20F44975D03b1b09e64809B757c47f942BEeA"
+
+
+def deploy_factory_env():
+    deployer_account = accounts[0]
+    mocks = deploy_mocks(deployer_account)
+    factory = deploy_dynamic_rate_factory(mocks["AddressesProvider"], deployer_account)
+    params = default_rate_strategy_parameters(mocks["AddressesProvider"])
+    return mocks, factory, params
+
+def test_deploy():
+    mocks, factory, params = deploy_factory_env()
+    strategy_address, updater_address = factory.predictAddresses(
+        accounts[0],
+        reserve_deployment(params, ASSET, UTILIZATION_HISTORY)
+    )
+
+    strategy, updater = deploy_with_factory(factory, params, ASSET, UTILIZATION_HISTORY, accounts[0])
+
+    assert strategy.address == strategy_address
+    assert updater.address == updater_address
+
+    assert strategy.EPSILON() == EPSILON
+    assert strategy.OPTIMAL_USAGE_RATIO() == OPTIMAL_USAGE_RATIO
+    assert strategy.MAX_EXCESS_USAGE_RATIO() == 10**27 - OPTIMAL_USAGE_RATIO
+    assert strategy.ADDRESSES_PROVIDER() == mocks["AddressesProvider"].address
+    assert strategy.getVariableRateSlope1() == VARIABLE_RATE_SLOPE_1
+    assert strategy.getMPlus() == M_PLUS
+    assert strategy.getMMinus() == M_MINUS
+    assert strategy.getVariableRateUpdater() == updater.address
+    assert strategy.wards(updater.address)
+    assert not strategy.wards(accounts[0].address)
+
+    assert updater.POOL() == mocks["Pool"].address
+    assert updater.ASSET() == ASSET
+    assert updater.counter() == 0
+    for k in range(60):
+        assert updater.utilizationHistory(k) == UTILIZATION_HISTORY[k]
+
+def test_initialize_once():
+    mocks, factory, params = deploy_factory_env()
+    strategy, updater = deploy_with_factory(factory, params, ASSET, UTILIZATION_HISTORY, accounts[0])
+    deployment = reserve_deployment(params, ASSET, UTILIZATION_HISTORY)
+
+    with brownie.reverts("DRS/initialized"):
+        strategy.initialize(params.variableRateSlope1, params.mPlus, params.mMinus, accounts[1], {"from": accounts[1]})
+    with brownie.reverts("DRS/initialized"):
+        DynamicRateStrategyClone.at(factory.STRATEGY_IMPLEMENTATION()).initialize(
+            params.variableRateSlope1, params.mPlus, params.mMinus, accounts[1], {"from": accounts[1]}
+        )
+    with brownie.reverts("VariableRateUpdate/initialized"):
+        updater.initialize(params.provider, ASSET, UTILIZATION_HISTORY, {"from": accounts[1]})
+    # same deployer, asset and salt
+    with brownie.reverts("Clones/create2-failed"):
+        factory.deploy(deployment, {"from": accounts[0]})
+
+def test_deploy_batch():
+    mocks, factory, params = deploy_factory_env()
+    deployments = [reserve_deployment(params, ASSET, UTILIZATION_HISTORY, salt) for salt in range(3)]
+
+    tx = factory.deployBatch(deployments, {"from": accounts[0]})
+    strategies, updaters = tx.return_value
+    assert len(set(strategies)) == 3
+    for deployment, strategy, updater in zip(deployments, strategies, updaters):
+        assert (strategy, updater) == factory.predictAddresses(accounts[0], deployment)
+
+def test_invalid_multiplier():
+    mocks, factory, params = deploy_factory_env()
+    params.mPlus = 10_000
+    with brownie.reverts("DRS/mPlus"):
+        factory.deploy(reserve_deployment(params, ASSET, UTILIZATION_HISTORY), {"from": accounts[0]})
+
+def test_same_rates_as_constructor():
+    mocks, factory, params = deploy_factory_env()
+    clone, _ = deploy_with_factory(factory, params, ASSET, UTILIZATION_HISTORY, accounts[0])
+    strategy = deploy_dynamic_rate_strategy(params, accounts[0])
+    token = MockERC20.deploy({"from": accounts[0]})
+    a_token = MockERC20.deploy({"from": accounts[0]})
+    token.setBalance(a_token, 100 * 10**18, {"from": accounts[0]})
+
+    # the immutable args of the clone read like the immutables
+    for getter in ("getBaseVariableBorrowRate", "getVariableRateSlope2", "getStableRateSlope1", "getStableRateSlope2",
+                   "getBaseStableBorrowRate", "getStableRateExcessOffset", "getMaxVariableBorrowRate",
+                   "OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO", "MAX_EXCESS_STABLE_TO_TOTAL_DEBT_RATIO"):
+        assert getattr(clone, getter)() == getattr(strategy, getter)()
+    assert clone.getUpkeepParameters() == strategy.getUpkeepParameters()
+    for total_stable_debt, total_variable_debt in [(0, 0), (0, 10 * 10**18), (50 * 10**18, 400 * 10**18)]:
+        inputs = (0, 0, 0, total_stable_debt, total_variable_debt, 5 * 10**25, 1_000, token.address, a_token.address)
+        assert clone.calculateInterestRates(inputs) == strategy.calculateInterestRates(inputs)
@@ -1,15 +1,28 @@
 import logging
-from dataclasses import dataclass
 import pytest
 import brownie
 
 from brownie import (
     accounts,
-    Contract,
-    MockAddressesProvider,
-    MockPool,
-    DynamicRateStrategy
+    MockERC20
 )
+from scripts.constants import (
+    OPTIMAL_USAGE_RATIO,
+    BASE_VARIABLE_BORROW_RATE,
+    VARIABLE_RATE_SLOPE_1,
+    VARIABLE_RATE_SLOPE_2,
+    STABLE_RATE_SLOPE_1,
+    STABLE_RATE_SLOPE_2,
+    BASE_STABLE_RATE_OFFSET,
+    STABLE_RATE_EXCESS_OFFSET,
+    OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO,
+    EPSILON,
+    M_PLUS,
+    M_MINUS
+)
+from scripts.parameters import RateStrategyParameters
+from scripts.setup_mock_env import deploy_dynamic_rate_strategy, deploy_mocks
+from scripts.rate_model import calculate_interest_rates
 
 
 '''
@@ -21,89 +34,6 @@ See notion page to refer to what those are.
 The only things that need to be tested are whether for the new variables the setters and getters work properly.
 '''
 
-# Copying current WETH interest rate strategy's parameters on Spark Protocol
-# See https://etherscan.io/address/0x764b4AB9bCA18eB633d92368F725765Ebb8f047C#readContract
-
-OPTIMAL_USAGE_RATIO = 800000000000000000000000000
-BASE_VARIABLE_BORROW_RATE = 10000000000000000000000000
-VARIABLE_RATE_SLOPE_1 = 38000000000000000000000000
-VARIABLE_RATE_SLOPE_2 = 800000000000000000000000000
-STABLE_RATE_SLOPE_1 = 0
-STABLE_RATE_SLOPE_2 = 0
-BASE_STABLE_RATE_OFFSET =  38000000000000000000000000 - VARIABLE_RATE_SLOPE_1 
-STABLE_RATE_EXCESS_OFFSET = 0
-OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO = 0
-EPSILON = 1_000_000_000_000_000_000_000_000_00 # 10%
-M_PLUS = int(10_000*1.1) # M_PLUS = 1.1
-M_MINUS = int(10_000*0.9) # M_MINUS = 0.9
-
-
-
-
-
-
-def deploy_mock_addresses_provider(
-    deployer_account
-):
-    return MockAddressesProvider.deploy({"from": deployer_account})
-
-def deploy_mock_pool(
-    deployer_account
-):
-    return MockPool.deploy({"from": deployer_account})
-
-@dataclass
-class RateStrategyParameters:
-    provider: Contract
-    optimalUsageRatio: int
-    baseVariableBorrowRate: int
-    variableRateSlope1: int
-    variableRateSlope2: int
-    stableRateSlope1: int
-    stableRateSlope2: int
-    baseStableRateOffset: int
-    stableRateExcessOffset: int
-    optimalStableToTotalDebtRatio: int
-    epsilon: int # the parameter to 
-    mPlus: int
-    mMinus: int
-
-def deploy_dynamic_rate_strategy(
-    rate_strategy_params: RateStrategyParameters,
-    deployer_account
-):
-    rate_strategy = DynamicRateStrategy.deploy(
-        rate_strategy_params.provider,
-        rate_strategy_params.optimalUsageRatio,
-        rate_strategy_params.baseVariableBorrowRate,
-        rate_strategy_params.variableRateSlope1,
-        rate_strategy_params.variableRateSlope2,
-        rate_strategy_params.stableRateSlope1,
-        rate_strategy_params.stableRateSlope2,
-        rate_strategy_params.baseStableRateOffset,
-        rate_strategy_params.stableRateExcessOffset,
-        rate_strategy_params.optimalStableToTotalDebtRatio,
-        rate_strategy_params.epsilon,
-        {"from": deployer_account}
-    )
-
-    # this will work because the deployer is a pool configurator in mock contract
-    rate_strategy.setMPlus(rate_strategy_params.mPlus, {"from": deployer_account})
-    rate_strategy.setMMinus(rate_strategy_params.mMinus, {"from": deployer_account})
-    return rate_strategy
-
-def deploy_mocks(
-    deployer_account
-):
-    addresses_provider = deploy_mock_addresses_provider(deployer_account)
-    pool = deploy_mock_pool(deployer_account)
-
-    addresses_provider.setPool(pool.address, {"from": deployer_account})
-    addresses_provider.setPoolConfigurator(deployer_account.address, {"from": deployer_account})
-
-    return {"Pool": pool, "AddressesProvider": addresses_provider}
-
-
 @pytest.fixture
 def rate_strategy():
     mocks = deploy_mocks(
@@ -156,6 +86,56 @@ def test_changes_and_authorizations(rate_strategy):
     with brownie.reverts('DRS/not-authorized'):
         rate_strategy.setVariableRateSlope1(0, {"from": second_account})
 
+def test_packed_parameters(rate_strategy):
+    assert rate_strategy.getUpkeepParameters() == (
+        OPTIMAL_USAGE_RATIO,
+        EPSILON,
+        VARIABLE_RATE_SLOPE_1,
+        M_PLUS,
+        M_MINUS
+    )
+    assert rate_strategy.OPTIMAL_USAGE_RATIO() == OPTIMAL_USAGE_RATIO
+    assert rate_strategy.MAX_EXCESS_USAGE_RATIO() == 10**27 - OPTIMAL_USAGE_RATIO
+    assert rate_strategy.OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO() == OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO
+    assert rate_strategy.getVariableRateSlope2() == VARIABLE_RATE_SLOPE_2
+
+    # mPlus is stored on 16 bits, slope 1 on 128 bits
+    rate_strategy.setMPlus(2**16 - 1, {"from": accounts[0]})
+    assert rate_strategy.getMPlus() == 2**16 - 1
+    with brownie.reverts('DRS/mPlus'):
+        rate_strategy.setMPlus(2**16, {"from": accounts[0]})
+    with brownie.reverts():
+        rate_strategy.setVariableRateSlope1(2**128, {"from": accounts[0]})
+    # the neighbours in the slot are untouched
+    assert rate_strategy.EPSILON() == EPSILON
+    assert rate_strategy.getMMinus() == M_MINUS
 
-
-
+    # slope 1, mPlus and mMinus share the slot after the wards, the only slot calculateInterestRates reads
+    slot = int.from_bytes(brownie.web3.eth.get_storage_at(rate_strategy.address, 1), "big")
+    assert slot == VARIABLE_RATE_SLOPE_1 | (2**16 - 1) << 128 | M_MINUS << 144
+
+def test_calculate_interest_rates(rate_strategy):
+    token = MockERC20.deploy({"from": accounts[0]})
+    a_token = MockERC20.deploy({"from": accounts[0]})
+    available_liquidity = 100 * 10**18
+    token.setBalance(a_token, available_liquidity, {"from": accounts[0]})
+
+    for total_variable_debt in [0, 10 * 10**18, 400 * 10**18, 10_000 * 10**18]:
+        params = (0, 0, 0, 0, total_variable_debt, 0, 1_000, token.address, a_token.address)
+        expected = calculate_interest_rates(
+            VARIABLE_RATE_SLOPE_1,
+            OPTIMAL_USAGE_RATIO,
+            BASE_VARIABLE_BORROW_RATE,
+            VARIABLE_RATE_SLOPE_2,
+            STABLE_RATE_SLOPE_1,
+            STABLE_RATE_SLOPE_2,
+            BASE_STABLE_RATE_OFFSET,
+            STABLE_RATE_EXCESS_OFFSET,
+            OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO,
+            available_liquidity,
+            0,
+            total_variable_debt,
+            0,
+            1_000
+        )
+        assert rate_strategy.calculateInterestRates(params) == expected
@@ -0,0 +1,24 @@
+from brownie import chain
+
+from scripts.epoch_driver import run_epochs
+from scripts.constants import VARIABLE_RATE_SLOPE_1
+
+'''
+The fast-forwarded epochs must leave the contracts in the state a keeper calling checkUpkeep/performUpkeep would.
+'''
+
+def test_run_epochs(mock_env):
+    utilizations = [(50 + 5 * (k % 9)) * 10**25 for k in range(70)]
+    snapshots = run_epochs(mock_env, utilizations)
+
+    assert snapshots.counter == list(range(1, 71))
+    assert snapshots.lastUtilization == snapshots.utilization == utilizations
+    # one upkeep per block, at the scripted timestamps
+    assert len(set(snapshots.blockNumber)) == 70
+    assert [chain[n].timestamp for n in snapshots.blockNumber] == snapshots.timestamp
+    # the slopes computed off-chain are the ones checkUpkeep recommends
+    assert snapshots.variableRateSlope1 == snapshots.recommendedSlope
+    assert snapshots.variableRateSlope1[0] != VARIABLE_RATE_SLOPE_1
+    assert mock_env["DynamicRateStrategy"].getVariableRateSlope1() == snapshots.variableRateSlope1[-1]
+    assert mock_env["VariableRateUpdater"].lastUtilization() == utilizations[-1]
+    assert all(0 < gas < 1_000_000 for gas in snapshots.performGasUsed)
@@ -0,0 +1,108 @@
+import random
+import brownie
+from brownie import accounts, chain
+
+from scripts.rate_model import horizon_average, upkeep_utilization, early_adjustment, next_variable_rate_slope_1
+from scripts.setup_mock_env import set_utilization
+from conftest import UTILIZATION_HISTORY, deploy_env, perform_upkeep_at_utilization
+
+'''
+The prefix sums must give the mean of every horizon of the ring history, and checkUpkeep must switch to the short
+horizon exactly when the off-chain model does.
+'''
+
+def test_horizon_average(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    history = list(UTILIZATION_HISTORY)
+    for samples in (1, 6, 59, 60):
+        assert variable_rate_updater.horizonAverage(samples) == horizon_average(history, 0, samples)
+    with brownie.reverts("VariableRateUpdate/horizon"):
+        variable_rate_updater.horizonAverage(0)
+    with brownie.reverts("VariableRateUpdate/horizon"):
+        variable_rate_updater.horizonAverage(61)
+
+    # more than a window so the ring of prefix sums wraps
+    rng = random.Random(0)
+    for k in range(70):
+        utilization = rng.randint(0, 10**27)
+        perform_upkeep_at_utilization(mock_env, utilization)
+        history[k % 60] = utilization
+    for samples in range(1, 61):
+        assert variable_rate_updater.horizonAverage(samples) == horizon_average(history, 70, samples)
+    assert variable_rate_updater.aggregatedUtilization() == sum(history) // 60
+
+def test_set_early_adjustment(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    with brownie.reverts():
+        variable_rate_updater.setEarlyAdjustment(6, 500, {"from": accounts[1]})
+    with brownie.reverts("VariableRateUpdate/horizon"):
+        variable_rate_updater.setEarlyAdjustment(60, 500, {"from": accounts[0]})
+    with brownie.reverts("VariableRateUpdate/horizon"):
+        variable_rate_updater.setEarlyAdjustment(0, 500, {"from": accounts[0]})
+    with brownie.reverts("VariableRateUpdate/threshold"):
+        variable_rate_updater.setEarlyAdjustment(6, 10_001, {"from": accounts[0]})
+
+    tx = variable_rate_updater.setEarlyAdjustment(6, 500, {"from": accounts[0]})
+    assert tx.events["EarlyAdjustmentUpdated"]["shortHorizon"] == 6
+    assert variable_rate_updater.earlyAdjustmentThreshold() == 500
+    variable_rate_updater.setEarlyAdjustment(0, 0, {"from": accounts[0]})
+    assert variable_rate_updater.shortHorizon() == 0
+
+def test_early_adjustment(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    dynamic_rate_strategy = mock_env["DynamicRateStrategy"]
+    variable_rate_updater.setEarlyAdjustment(6, 500, {"from": accounts[0]})
+    history = list(UTILIZATION_HISTORY)
+
+    # a jump of utilization reaches the short horizon first
+    triggered = False
+    for k in range(8):
+        perform_upkeep_at_utilization(mock_env, 99 * 10**25)
+        history[k % 60] = 99 * 10**25
+        utilization, early = upkeep_utilization(history, k + 1, short_horizon=6, early_adjustment_threshold=500)
+        assert tuple(variable_rate_updater.upkeepUtilization()) == (utilization, early)
+        triggered |= early
+
+        optimal, epsilon, slope, m_plus, m_minus = dynamic_rate_strategy.getUpkeepParameters()
+        _, data = variable_rate_updater.checkUpkeep("")
+        assert int.from_bytes(bytes(data)[:32], "big") == \
+            next_variable_rate_slope_1(utilization, slope, optimal, epsilon, m_plus, m_minus)
+    assert triggered
+
+def test_early_upkeep_within_interval():
+    deployer_account = accounts[0]
+    env = deploy_env(deployer_account, [45 * 10**25] * 60)
+    variable_rate_updater, dynamic_rate_strategy = env["VariableRateUpdater"], env["DynamicRateStrategy"]
+    variable_rate_updater.setEarlyAdjustment(6, 500, {"from": deployer_account})
+    history = [45 * 10**25] * 60
+    set_utilization(env, 45 * 10**25, deployer_account)
+    upkeep_needed, _ = variable_rate_updater.checkUpkeep("")
+    assert not upkeep_needed
+
+    # a jump of utilization makes the upkeep due before the interval elapsed
+    set_utilization(env, 99 * 10**25, deployer_account)
+    early, short_average = early_adjustment(history, 0, 99 * 10**25, short_horizon=6, early_adjustment_threshold=500)
+    assert early
+    upkeep_needed, data = variable_rate_updater.checkUpkeep("")
+    assert upkeep_needed
+    optimal, epsilon, slope, m_plus, m_minus = dynamic_rate_strategy.getUpkeepParameters()
+    assert int.from_bytes(bytes(data)[:32], "big") == \
+        next_variable_rate_slope_1(short_average, slope, optimal, epsilon, m_plus, m_minus)
+
+    # the early upkeep refreshes the latest sample, the interval keeps counting from the last sample
+    last_time_stamp = variable_rate_updater.lastTimeStamp()
+    variable_rate_updater.performUpkeep(data, {"from": deployer_account})
+    assert dynamic_rate_strategy.getVariableRateSlope1() == int.from_bytes(bytes(data)[:32], "big")
+    assert variable_rate_updater.counter() == 0
+    assert variable_rate_updater.lastTimeStamp() == last_time_stamp
+    assert variable_rate_updater.utilizationHistory(59) == 99 * 10**25
+    history[59] = 99 * 10**25
+    assert variable_rate_updater.horizonAverage(60) == sum(history) // 60
+
+    # a single early upkeep per interval
+    upkeep_needed, _ = variable_rate_updater.checkUpkeep("")
+    assert not upkeep_needed
+    chain.sleep(12*60*60 + 1)
+    chain.mine(1)
+    upkeep_needed, _ = variable_rate_updater.checkUpkeep("")
+    assert upkeep_needed
@@ -0,0 +1,111 @@
+import numpy as np
+from brownie import accounts, chain
+
+from scripts.interest_accrual import accrue_paths, integers, strategy_rates
+from scripts.parameters import default_rate_strategy_parameters
+from scripts.rate_model import RAY, ray_div
+from conftest import CONFIGURATION
+
+'''
+The accrual engine must give the indexes and the treasury share of Aave's ReserveLogic.updateState to the wei.
+'''
+
+LIQUIDITY = 1_000 * 10**18
+PRINCIPAL_STABLE_DEBT = 50 * 10**18
+AVERAGE_STABLE_BORROW_RATE = 7 * 10**25
+RESERVE_FACTOR = (CONFIGURATION >> 64) & 0xFFFF
+
+def reserve_data(env):
+    '''
+    (liquidityIndex, currentLiquidityRate, variableBorrowIndex, currentVariableBorrowRate, lastUpdateTimestamp,
+    accruedToTreasury)
+    '''
+    data = env["Pool"].getReserveData(env["Token"])
+    return data[1], data[2], data[3], data[4], data[6], data[12]
+
+def test_matches_reserve_logic(mock_env):
+    pool, token = mock_env["Pool"], mock_env["Token"]
+    assert RESERVE_FACTOR != 0
+    mock_env["AToken"].setTotalSupply(LIQUIDITY, {"from": accounts[0]})
+    token.setBalance(mock_env["AToken"], LIQUIDITY, {"from": accounts[0]})
+    liquidity_index, _, variable_borrow_index, _, _, accrued_to_treasury = reserve_data(mock_env)
+    pool.setReserveData(
+        token, CONFIGURATION, liquidity_index, 0, variable_borrow_index, 0, chain.time(), {"from": accounts[0]}
+    )
+    initial = reserve_data(mock_env)
+    stable_debt_last_update_timestamp = initial[4] - 30 * 24 * 60 * 60
+
+    timestamps, liquidity_rates, variable_borrow_rates, scaled_debt, expected = [initial[4]], [], [], [], []
+    # borrow (+) or repay (-) before each update, the last updates are 1 and 2 seconds apart
+    for amount, sleep in ((400, 86_400), (450, 3 * 86_400), (-300, 7_200), (0, 1), (0, 2)):
+        if amount > 0:
+            pool.borrow(token, amount * 10**18, {"from": accounts[0]})
+        elif amount < 0:
+            pool.repay(token, -amount * 10**18, {"from": accounts[0]})
+        _, liquidity_rate, variable_borrow_index, variable_borrow_rate, _, _ = reserve_data(mock_env)
+        scaled = ray_div(mock_env["VariableDebtToken"].totalSupply(), variable_borrow_index)
+        chain.sleep(sleep)
+        tx = pool.accrue(
+            token,
+            scaled,
+            PRINCIPAL_STABLE_DEBT,
+            AVERAGE_STABLE_BORROW_RATE,
+            stable_debt_last_update_timestamp,
+            {"from": accounts[0]}
+        )
+        timestamps.append(tx.timestamp)
+        liquidity_rates.append(liquidity_rate)
+        variable_borrow_rates.append(variable_borrow_rate)
+        scaled_debt.append(scaled)
+        liquidity_index, _, variable_borrow_index, _, _, accrued_to_treasury = reserve_data(mock_env)
+        expected.append((liquidity_index, variable_borrow_index, accrued_to_treasury))
+    assert all(rate != 0 for rate in liquidity_rates)
+
+    paths = accrue_paths(
+        timestamps,
+        liquidity_rates,
+        variable_borrow_rates,
+        initial[0],
+        initial[2],
+        RESERVE_FACTOR,
+        scaled_variable_debt=scaled_debt,
+        accrued_to_treasury=initial[5],
+        principal_stable_debt=PRINCIPAL_STABLE_DEBT,
+        average_stable_borrow_rate=AVERAGE_STABLE_BORROW_RATE,
+        stable_debt_last_update_timestamp=stable_debt_last_update_timestamp
+    )
+    assert list(zip(paths.liquidityIndex[1:], paths.variableBorrowIndex[1:], paths.accruedToTreasury[1:])) == expected
+    assert paths.treasury_income() > 0
+
+def test_batch_matches_single_paths():
+    rng = np.random.default_rng(1)
+    params = default_rate_strategy_parameters(None)
+    debt = integers(rng.integers(0, 10**6, (3, 4, 50))) * 10**15
+    timestamps = integers(np.cumsum(rng.integers(1, 86_400, 51)))
+    reserve_factor = integers([0, 1_000, 2_500])[:, None]
+    liquidity_rates, _, variable_borrow_rates = strategy_rates(
+        params, 10**21 - debt, 0, debt, reserve_factor=reserve_factor[..., None]
+    )
+    assert liquidity_rates.shape == (3, 4, 50)
+
+    paths = accrue_paths(
+        timestamps, liquidity_rates, variable_borrow_rates, RAY, RAY, reserve_factor, total_variable_debt=debt
+    )
+    assert paths.liquidityIndex.shape == (3, 4, 51)
+    assert (paths.accruedToTreasury[0] == 0).all()
+    for i in range(3):
+        for j in range(4):
+            single = accrue_paths(
+                timestamps,
+                liquidity_rates[i, j],
+                variable_borrow_rates[i, j],
+                RAY,
+                RAY,
+                int(reserve_factor[i, 0]),
+                total_variable_debt=debt[i, j]
+            )
+            assert list(single.liquidityIndex) == list(paths.liquidityIndex[i, j])
+            assert list(single.variableBorrowIndex) == list(paths.variableBorrowIndex[i, j])
+            assert list(single.accruedToTreasury) == list(paths.accruedToTreasury[i, j])
+    # the suppliers earn what the borrowers pay less the reserve factor
+    assert (paths.supplier_yield()[1:] < paths.borrower_cost()[1:]).all()
@@ -0,0 +1,17 @@
+from scripts.load_test import LoadConfig, run_load
+
+'''
+The rates seen by the pool traffic must always be the ones of the slope in effect when the transaction is executed.
+'''
+
+def test_run_load(mock_env):
+    config = LoadConfig(accounts=3, transactionsPerAccount=10, keeperPeriod=0.1, blockTime=0)
+    report = run_load(mock_env, config)
+
+    assert len(report.transactions) == 30
+    assert report.keeperTransactions
+    assert all(tx.status == 1 for tx in report.keeperTransactions)
+    assert report.mined
+    assert all(tx.rates for tx in report.mined)
+    assert report.inconsistencies == []
+    assert report.throughput() > 0
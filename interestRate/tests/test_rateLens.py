@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from brownie import accounts
+
+from scripts.rate_lens import deploy_rate_lens, quote_points, rate_curve
+from scripts.rate_model import RAY, calculate_interest_rates
+from scripts.constants import (
+    OPTIMAL_USAGE_RATIO,
+    BASE_VARIABLE_BORROW_RATE,
+    VARIABLE_RATE_SLOPE_1,
+    VARIABLE_RATE_SLOPE_2,
+    STABLE_RATE_SLOPE_1,
+    STABLE_RATE_SLOPE_2,
+    BASE_STABLE_RATE_OFFSET,
+    STABLE_RATE_EXCESS_OFFSET,
+    OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO
+)
+
+'''
+The lens quotes must be the rates calculateInterestRates returns for the same reserve state.
+'''
+
+def expected_rates(available_liquidity, total_stable_debt, total_variable_debt, reserve_factor):
+    return calculate_interest_rates(
+        VARIABLE_RATE_SLOPE_1,
+        OPTIMAL_USAGE_RATIO,
+        BASE_VARIABLE_BORROW_RATE,
+        VARIABLE_RATE_SLOPE_2,
+        STABLE_RATE_SLOPE_1,
+        STABLE_RATE_SLOPE_2,
+        BASE_STABLE_RATE_OFFSET,
+        STABLE_RATE_EXCESS_OFFSET,
+        OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO,
+        available_liquidity,
+        total_stable_debt,
+        total_variable_debt,
+        0,
+        reserve_factor
+    )
+
+def test_quote(mock_env):
+    lens = deploy_rate_lens(accounts[0])
+    strategy = mock_env["DynamicRateStrategy"]
+    points = [(100 * 10**18, 0, debt, 0) for debt in (0, 10 * 10**18, 400 * 10**18, 10_000 * 10**18)]
+
+    # an account without code and a contract that isn't a strategy don't fail the call
+    ok, rates = lens.quote([strategy, accounts[1], mock_env["Pool"], strategy], points, 1_000)
+    assert ok == (True, False, False, True)
+    for k, (available_liquidity, stable_debt, variable_debt, _) in enumerate(points):
+        expected = expected_rates(available_liquidity, stable_debt, variable_debt, 1_000)
+        assert tuple(rates[k]) == expected
+        assert tuple(rates[12 + k]) == expected
+        assert tuple(rates[4 + k]) == (0, 0, 0)
+
+def test_numpy_wrapper(mock_env):
+    lens = deploy_rate_lens(accounts[0])
+    strategy = mock_env["DynamicRateStrategy"]
+    usage_ratios = np.linspace(0, 1, 21)
+
+    quotes = rate_curve(lens, [strategy, accounts[1]], usage_ratios, (0.0, 0.5))
+    assert quotes.variableBorrowRate.shape == (2, 21, 2)
+    assert quotes.ok.tolist() == [True, False]
+    assert np.isnan(quotes.variableBorrowRate[1]).all()
+
+    for k, u in enumerate(usage_ratios):
+        debt = int(round(u * RAY))
+        expected = expected_rates(RAY - debt, 0, debt, 0)
+        assert quotes.variableBorrowRate[0, k, 0] == pytest.approx(expected[2] / RAY, rel=1e-12)
+        assert quotes.liquidityRate[0, k, 0] == pytest.approx(expected[0] / RAY, rel=1e-12, abs=1e-18)
+    # kinked at the optimal usage ratio
+    slopes = np.diff(quotes.variableBorrowRate[0, :, 0])
+    assert slopes[-1] > 10 * slopes[0]
+
+    points = quote_points(lens, [strategy], [10**18, 2 * 10**18], 0, 10**18)
+    assert points.variableBorrowRate.shape == (1, 2)
@@ -0,0 +1,161 @@
+import json
+from brownie import accounts, chain, web3
+
+from scripts.client import ContractClient
+from scripts.decision_journal import read_decision_inputs
+from scripts.rpc_cache import CachedReader, ReserveTokens, IMMUTABLE, EVENT, BLOCK
+from scripts.constants import OPTIMAL_USAGE_RATIO, VARIABLE_RATE_SLOPE_1
+
+'''
+Immutables are read once, per block reads are dropped with the block and event invalidated reads are dropped when
+the event is emitted.
+'''
+
+CONTRACTS = {
+    "DynamicRateStrategy": "DynamicRateStrategy",
+    "VariableRateUpdater": "VariableRateUpdater",
+    "AddressesProvider": "MockAddressesProvider",
+    "Pool": "MockPool",
+    "VariableDebtToken": "MockERC20",
+}
+
+def clients(env):
+    endpoint = web3.provider.endpoint_uri
+    return {key: ContractClient.at(endpoint, name, env[key].address) for key, name in CONTRACTS.items()}
+
+def test_policies(mock_env):
+    contracts = clients(mock_env)
+    strategy, variable_debt_token = contracts["DynamicRateStrategy"], contracts["VariableDebtToken"]
+    reader = CachedReader(web3.provider.endpoint_uri)
+
+    for _ in range(3):
+        assert reader.call(strategy, "OPTIMAL_USAGE_RATIO") == OPTIMAL_USAGE_RATIO
+        assert reader.call(strategy, "getVariableRateSlope1") == VARIABLE_RATE_SLOPE_1
+        assert reader.call(variable_debt_token, "totalSupply") == 0
+    assert reader.stats.misses == {IMMUTABLE: 1, EVENT: 1, BLOCK: 1}
+    assert reader.stats.hits == {IMMUTABLE: 2, EVENT: 2, BLOCK: 2}
+
+    mock_env["VariableDebtToken"].setTotalSupply(10**27, {"from": accounts[0]})
+    assert reader.advance() == 0
+    assert reader.call(variable_debt_token, "totalSupply") == 10**27
+    assert reader.call(strategy, "getVariableRateSlope1") == VARIABLE_RATE_SLOPE_1
+    assert reader.stats.misses[BLOCK] == 2
+    assert reader.stats.hits[EVENT] == 3
+
+def test_event_invalidation(mock_env):
+    contracts = clients(mock_env)
+    strategy, provider = contracts["DynamicRateStrategy"], contracts["AddressesProvider"]
+    reader = CachedReader(web3.provider.endpoint_uri)
+    assert reader.call_many([(strategy, "getVariableRateSlope1", ()), (provider, "getPool", ())]) == \
+        [VARIABLE_RATE_SLOPE_1, mock_env["Pool"].address]
+
+    mock_env["AToken"].setTotalSupply(10**27, {"from": accounts[0]})
+    mock_env["VariableRateUpdater"].performUpkeep((2 * VARIABLE_RATE_SLOPE_1).to_bytes(32, "big"), {"from": accounts[0]})
+    chain.mine(3)
+    assert reader.advance() == 1
+    assert reader.call(strategy, "getVariableRateSlope1") == 2 * VARIABLE_RATE_SLOPE_1
+    # the pool didn't change
+    assert reader.call(provider, "getPool") == mock_env["Pool"].address
+    assert reader.stats.misses[EVENT] == 3
+
+    mock_env["AddressesProvider"].setPool(accounts[1], {"from": accounts[0]})
+    assert reader.advance() == 1
+    assert reader.call(provider, "getPool") == accounts[1].address
+
+def test_upkeep_invalidation(mock_env):
+    updater = clients(mock_env)["VariableRateUpdater"]
+    reader = CachedReader(web3.provider.endpoint_uri)
+    calls = [(updater, "counter", ()), (updater, "utilizationHistory", (0,)), (updater, "aggregation", ())]
+    before = reader.call_many(calls)
+    assert before[0] == mock_env["VariableRateUpdater"].counter()
+
+    # kept across blocks until an upkeep sets the slope of the strategy
+    chain.mine(2)
+    assert reader.advance() == 0
+    assert reader.call_many(calls) == before
+    mock_env["AToken"].setTotalSupply(100 * 10**27, {"from": accounts[0]})
+    chain.sleep(12*60*60 + 1)
+    chain.mine(1)
+    _, perform_data = mock_env["VariableRateUpdater"].checkUpkeep("")
+    mock_env["VariableRateUpdater"].performUpkeep(perform_data, {"from": accounts[0]})
+    # the aggregation is only dropped by its own event
+    assert reader.advance() == 2
+    updated = [before[0] + 1, mock_env["VariableRateUpdater"].utilizationHistory(0), before[2]]
+    assert reader.call_many(calls) == updated
+    assert reader.stats.hits[EVENT] == 4
+
+def test_max_variable_borrow_rate(mock_env):
+    strategy = clients(mock_env)["DynamicRateStrategy"]
+    reader = CachedReader(web3.provider.endpoint_uri)
+    assert reader.policy("getMaxVariableBorrowRate") == EVENT
+    before = reader.call(strategy, "getMaxVariableBorrowRate")
+
+    mock_env["AToken"].setTotalSupply(10**27, {"from": accounts[0]})
+    mock_env["VariableRateUpdater"].performUpkeep((2 * VARIABLE_RATE_SLOPE_1).to_bytes(32, "big"), {"from": accounts[0]})
+    assert reader.advance() == 1
+    assert reader.call(strategy, "getMaxVariableBorrowRate") == before + VARIABLE_RATE_SLOPE_1
+
+def test_reserve_tokens(mock_env):
+    pool, token = mock_env["Pool"], mock_env["Token"]
+    pool_client = clients(mock_env)["Pool"]
+    # the mock pool emits the PoolConfigurator events
+    reader = CachedReader(web3.provider.endpoint_uri)
+    expected = ReserveTokens(
+        mock_env["AToken"].address,
+        mock_env["StableDebtToken"].address,
+        mock_env["VariableDebtToken"].address,
+        mock_env["DynamicRateStrategy"].address
+    )
+    assert reader.reserve_tokens(pool_client, token.address, pool.address) == expected
+
+    # the indexes and rates change, the addresses are kept across blocks
+    mock_env["AToken"].setTotalSupply(10**27, {"from": accounts[0]})
+    pool.supply(token, 10**18, {"from": accounts[0]})
+    assert reader.advance() == 0
+    assert reader.reserve_tokens(pool_client, token.address, pool.address) == expected
+    assert reader.stats.misses[EVENT] == 1 and reader.stats.hits[EVENT] == 1
+
+    # a new strategy drops them
+    pool.setReserveData2(
+        token, 3, expected.aToken, expected.stableDebtToken, expected.variableDebtToken, accounts[1], 0, 0, 0,
+        {"from": accounts[0]}
+    )
+    assert reader.advance() == 1
+    assert reader.reserve_tokens(pool_client, token.address, pool.address).interestRateStrategy == accounts[1].address
+
+def test_decision_inputs_through_the_reader(mock_env):
+    endpoint = web3.provider.endpoint_uri
+    updater, strategy = mock_env["VariableRateUpdater"].address, mock_env["DynamicRateStrategy"].address
+    reader = CachedReader(endpoint)
+    first = read_decision_inputs(endpoint, updater, strategy, reader=reader)
+    requests = reader.stats.requests
+
+    # a block later only checkUpkeep and the logs are read again
+    chain.mine(1)
+    second = read_decision_inputs(endpoint, updater, strategy, reader=reader)
+    assert second.utilizationHistory == first.utilizationHistory
+    assert second.blockNumber == first.blockNumber + 1
+    assert reader.stats.requests - requests <= 3
+    assert read_decision_inputs(endpoint, updater, strategy, second.blockNumber).utilizationHistory == \
+        first.utilizationHistory
+
+def test_save_load(mock_env, tmp_path):
+    contracts = clients(mock_env)
+    strategy, updater = contracts["DynamicRateStrategy"], contracts["VariableRateUpdater"]
+    path = tmp_path / "immutables.json"
+    reader = CachedReader(web3.provider.endpoint_uri)
+    reader.call_many([(strategy, "OPTIMAL_USAGE_RATIO", ()), (strategy, "EPSILON", ()), (updater, "POOL", ())])
+    reader.save(path)
+
+    # the storage written by the constructor isn't saved
+    other = CachedReader(web3.provider.endpoint_uri)
+    assert other.load(path) == 2
+    assert other.call(strategy, "OPTIMAL_USAGE_RATIO") == OPTIMAL_USAGE_RATIO
+    assert other.stats.misses[IMMUTABLE] == 0
+
+    # other code at the address, after a restart with other parameters
+    saved = json.loads(path.read_text())
+    for entry in saved["entries"]:
+        entry[1] = "0x" + "00" * 32
+    path.write_text(json.dumps(saved))
+    assert CachedReader(web3.provider.endpoint_uri).load(path) == 0
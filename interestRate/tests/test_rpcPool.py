@@ -0,0 +1,98 @@
+import pytest
+from brownie import chain, web3
+
+from scripts.fault_proxy import FaultProxy
+from scripts.rpc import batch_request, RPCError
+from scripts.rpc_pool import RPCPool, NoHealthyEndpoint, node_state_error
+
+'''
+The pool must route around slow, failing, lagging and forked endpoints. The "nodes" are fault injecting proxies in
+front of the local chain.
+'''
+
+@pytest.fixture
+def proxies():
+    proxies = [FaultProxy(web3.provider.endpoint_uri).start() for _ in range(3)]
+    yield proxies
+    for proxy in proxies:
+        proxy.stop()
+
+def test_routes_to_fastest(proxies):
+    proxies[0].delay = 0.2
+    proxies[2].delay = 0.1
+    with RPCPool([proxy.url for proxy in proxies]) as pool:
+        # every endpoint is measured once, then the fastest one is used
+        for _ in range(6):
+            assert int(pool.request("eth_blockNumber", []), 16) == web3.eth.block_number
+        assert pool.ranked()[0].url == proxies[1].url
+        assert proxies[1].requests >= 4
+
+def test_failover(proxies):
+    with RPCPool([proxy.url for proxy in proxies], timeout=1, cooldown=60) as pool:
+        pool.request("eth_chainId", [])
+        fastest = pool.ranked()[0]
+        failing = next(proxy for proxy in proxies if proxy.url == fastest.url)
+        failing.down = True
+        assert pool.request("eth_chainId", []) == hex(chain.id)
+        assert fastest.failures == 1
+        assert fastest not in pool.ranked()
+
+        failing.down = False
+        for proxy in proxies:
+            proxy.drop = True
+        with pytest.raises(NoHealthyEndpoint):
+            pool.request("eth_chainId", [])
+
+def test_rpc_errors_are_not_retried(proxies):
+    with RPCPool([proxy.url for proxy in proxies]) as pool:
+        with pytest.raises(RPCError):
+            pool.request("eth_notAMethod", [])
+        assert sum(proxy.requests for proxy in proxies) == 1
+        assert all(endpoint.failures == 0 for endpoint in pool.endpoints)
+
+def test_node_state_errors_fail_over(proxies):
+    with RPCPool([proxy.url for proxy in proxies]) as pool:
+        pool.request("eth_chainId", [])
+        fastest = next(proxy for proxy in proxies if proxy.url == pool.ranked()[0].url)
+        fastest.error = "missing trie node 5a4c (path ) <nil>"
+        assert pool.request("eth_blockNumber", []) == hex(web3.eth.block_number)
+        # the node answered, it stays in the rotation
+        assert all(endpoint.failures == 0 for endpoint in pool.endpoints)
+
+        # raised as is when no endpoint has the state
+        for proxy in proxies:
+            proxy.error = "header not found"
+        with pytest.raises(RPCError) as error:
+            pool.request("eth_getBlockByNumber", ["0x1", False])
+        assert node_state_error(error.value)
+
+def test_head_consistency(proxies):
+    chain.mine(10)
+    proxies[1].lag = 5
+    with RPCPool([proxy.url for proxy in proxies]) as pool:
+        report = pool.check_health()
+        assert report.head == web3.eth.block_number
+        assert report.lagging == [proxies[1].url]
+        assert report.healthy == [proxies[0].url, proxies[2].url]
+        assert proxies[1].url not in [endpoint.url for endpoint in pool.ranked()]
+
+        proxies[1].lag = 0
+        proxies[2].fork = True
+        report = pool.check_health()
+        assert report.healthy == [proxies[0].url, proxies[1].url]
+        assert report.forked == [proxies[2].url]
+        assert {endpoint.url for endpoint in pool.ranked()} == {proxies[0].url, proxies[1].url}
+
+def test_fork_tie_goes_to_highest_head(proxies):
+    chain.mine(3)
+    # one endpoint on each side, the forked one listed first and a block behind
+    proxies[0].fork = True
+    proxies[0].lag = 1
+    with RPCPool([proxies[0].url, proxies[1].url]) as pool:
+        report = pool.check_health()
+        assert report.forked == [proxies[0].url]
+        assert report.healthy == [proxies[1].url]
+
+def test_scripts_accept_a_pool(proxies):
+    with RPCPool([proxy.url for proxy in proxies]) as pool:
+        assert batch_request(pool, [("eth_chainId", []), ("eth_blockNumber", [])])[0] == hex(chain.id)
@@ -0,0 +1,42 @@
+from eth_abi import decode
+from brownie import accounts, chain
+
+from scripts.simulate_upkeep import UpkeepScenario, simulate_upkeeps
+from scripts.constants import EPSILON, OPTIMAL_USAGE_RATIO, VARIABLE_RATE_SLOPE_1
+
+'''
+The simulation must agree with checkUpkeep when nothing is overridden, and apply the overrides without touching
+the chain state.
+'''
+
+def test_no_override_matches_check_upkeep(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    dynamic_rate_strategy = mock_env["DynamicRateStrategy"]
+
+    chain.sleep(12*60*60 + 1)
+    chain.mine(1)
+
+    upkeep_needed, data = variable_rate_updater.checkUpkeep("", {"from": accounts[0]})
+    simulation = simulate_upkeeps(variable_rate_updater, dynamic_rate_strategy, [UpkeepScenario()])[0]
+
+    assert simulation.upkeepNeeded == upkeep_needed
+    assert simulation.variableRateSlope1 == decode(['uint256'], data)[0]
+
+def test_overrides(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    dynamic_rate_strategy = mock_env["DynamicRateStrategy"]
+
+    scenarios = [
+        UpkeepScenario(utilizationHistory=[80*10**25]*60, mPlus=12_000),
+        UpkeepScenario(mMinus=5_000, variableRateSlope1=2*VARIABLE_RATE_SLOPE_1),
+    ]
+    in_sweet_spot, under_sweet_spot = simulate_upkeeps(variable_rate_updater, dynamic_rate_strategy, scenarios)
+
+    multiple = 10**27 + 80*10**25 + EPSILON - OPTIMAL_USAGE_RATIO
+    assert in_sweet_spot.variableRateSlope1 == VARIABLE_RATE_SLOPE_1*12_000//10_000*multiple//10**27
+    assert under_sweet_spot.variableRateSlope1 == 2*VARIABLE_RATE_SLOPE_1*5_000//10_000
+
+    # nothing was written
+    assert dynamic_rate_strategy.getMPlus() == 11_000
+    assert dynamic_rate_strategy.getVariableRateSlope1() == VARIABLE_RATE_SLOPE_1
+    assert variable_rate_updater.utilizationHistory(0) == 60*10**25
@@ -0,0 +1,91 @@
+import shutil
+import socket
+import subprocess
+import time
+import pytest
+import requests
+from brownie import web3
+
+from scripts.client import ContractClient
+from scripts.rpc import request, RPCError
+from scripts.state_bundle import ROOT, HASHED, bundle_hash, find_bundle, dump_bundle, load_bundle
+
+'''
+The bundle must be rebuilt exactly when the contracts or the setup change, and load back into a fresh node.
+'''
+
+@pytest.fixture
+def fresh_anvil():
+    # a node of its own, resetting the node of brownie would break its snapshots
+    anvil = shutil.which("anvil")
+    if anvil is None:
+        pytest.skip("state bundles need anvil")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([anvil, "--port", str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    endpoint = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 10
+    while True:
+        try:
+            request(endpoint, "eth_chainId", [])
+            break
+        except requests.ConnectionError:
+            if time.time() > deadline:
+                process.terminate()
+                raise
+            time.sleep(0.1)
+    yield endpoint
+    process.terminate()
+    process.wait()
+
+def copy_hashed(destination):
+    for name in HASHED:
+        source = ROOT / name
+        if source.is_dir():
+            shutil.copytree(source, destination / name, ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            (destination / name).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(source, destination / name)
+
+def test_bundle_hash(tmp_path):
+    copy_hashed(tmp_path)
+    digest = bundle_hash(tmp_path)
+    assert digest == bundle_hash(ROOT)
+
+    # unrelated files don't matter
+    (tmp_path / "scripts" / "notes.txt").write_text("rehearsal")
+    (tmp_path / "contracts" / "__pycache__").mkdir()
+    (tmp_path / "contracts" / "__pycache__" / "x.pyc").write_bytes(b"\0")
+    assert bundle_hash(tmp_path) == digest
+
+    # a contract, a parameter or a renamed file does
+    strategy = tmp_path / "contracts" / "DynamicRateStrategy.sol"
+    strategy.write_text(strategy.read_text() + "\n")
+    changed = bundle_hash(tmp_path)
+    assert changed != digest
+    constants = tmp_path / "scripts" / "constants.py"
+    constants.write_text(constants.read_text().replace("M_PLUS = int(10_000*1.1)", "M_PLUS = int(10_000*1.2)"))
+    assert bundle_hash(tmp_path) not in (digest, changed)
+    strategy.rename(tmp_path / "contracts" / "DynamicRateStrategy2.sol")
+    assert bundle_hash(tmp_path) not in (digest, changed)
+
+def test_dump_and_load(mock_env, tmp_path, fresh_anvil):
+    endpoint = web3.provider.endpoint_uri
+    try:
+        request(endpoint, "anvil_nodeInfo", [])
+    except RPCError:
+        pytest.skip("state bundles need anvil")
+    addresses = {name: mock_env[name].address for name in ("DynamicRateStrategy", "VariableRateUpdater")}
+    assert find_bundle("test", tmp_path) is None
+    bundle = dump_bundle(endpoint, addresses, "test", tmp_path)
+    assert find_bundle("test", tmp_path) == bundle
+    assert bundle.blockNumber == web3.eth.block_number
+
+    # the state loads into a fresh node
+    assert request(fresh_anvil, "eth_getCode", [addresses["VariableRateUpdater"], "latest"]) in ("0x", "0x0")
+    load_bundle(fresh_anvil, bundle, tmp_path)
+    updater = ContractClient.at(fresh_anvil, "VariableRateUpdater", addresses["VariableRateUpdater"])
+    strategy = ContractClient.at(fresh_anvil, "DynamicRateStrategy", addresses["DynamicRateStrategy"])
+    assert updater.call("counter") == mock_env["VariableRateUpdater"].counter()
+    assert strategy.call("getVariableRateUpdater").lower() == addresses["VariableRateUpdater"].lower()
@@ -0,0 +1,178 @@
+from brownie import accounts, chain, web3
+
+from scripts.fault_proxy import FaultProxy
+from scripts.rpc import request, set_automine
+from scripts.tx_submitter import UpkeepSubmitter, check_upkeeps, MINED, PENDING
+from conftest import UTILIZATION_HISTORY, deploy_env
+
+'''
+Upkeeps of many updaters sent from one account must all land, with contiguous nonces, even when a transaction has
+to be replaced or a previous run left a nonce gap.
+'''
+
+def deploy_updaters(count):
+    envs = []
+    for _ in range(count):
+        env = deploy_env(accounts[0], UTILIZATION_HISTORY)
+        env["AToken"].setTotalSupply(100 * 10**27, {"from": accounts[0]})
+        env["VariableDebtToken"].setTotalSupply(50 * 10**27, {"from": accounts[0]})
+        envs.append(env)
+    chain.sleep(12*60*60 + 1)
+    chain.mine(1)
+    return envs
+
+def test_parallel_upkeeps():
+    envs = deploy_updaters(5)
+    endpoint = web3.provider.endpoint_uri
+    submitter = UpkeepSubmitter(endpoint, accounts[0])
+    first_nonce = accounts[0].nonce
+
+    upkeeps = check_upkeeps(endpoint, [env["VariableRateUpdater"].address for env in envs])
+    assert len(upkeeps) == 5
+    submissions = submitter.submit_upkeeps(upkeeps)
+    assert submitter.wait(timeout=60, interval=0.1)
+
+    assert sorted(submission.nonce for submission in submissions) == list(range(first_nonce, first_nonce + 5))
+    assert all(submission.status == MINED and submission.success for submission in submissions)
+    for env, (_, perform_data) in zip(envs, upkeeps):
+        assert env["VariableRateUpdater"].counter() == 1
+        assert env["DynamicRateStrategy"].getVariableRateSlope1() == int.from_bytes(perform_data, "big")
+    assert check_upkeeps(endpoint, [env["VariableRateUpdater"].address for env in envs]) == []
+    assert submitter.throughput()["upkeeps"] == 5
+    submitter.close()
+
+def test_replaces_stuck_transaction():
+    env = deploy_updaters(1)[0]
+    endpoint = web3.provider.endpoint_uri
+    submitter = UpkeepSubmitter(endpoint, accounts[0], stuck_blocks=0)
+
+    set_automine(endpoint, False)
+    try:
+        submission = submitter.submit_upkeeps(check_upkeeps(endpoint, [env["VariableRateUpdater"].address]))[0]
+        fees = submission.maxFeePerGas
+        assert submitter.poll() == 1
+        assert len(submission.hashes) == 2
+        assert submission.maxFeePerGas > fees
+        request(endpoint, "evm_mine", [])
+    finally:
+        set_automine(endpoint, True)
+
+    assert submitter.poll() == 0
+    assert submission.status == MINED
+    assert submission.replacements == 1
+    assert web3.eth.get_transaction_receipt(submission.hashes[-1])["status"] == 1
+    submitter.close()
+
+def test_recover_nonce_gap():
+    endpoint = web3.provider.endpoint_uri
+    nonce = accounts[0].nonce
+    set_automine(endpoint, False)
+    try:
+        # a previous run sent nonce + 1 but nonce never reached the node
+        request(endpoint, "eth_sendTransaction", [{
+            "from": accounts[0].address, "to": accounts[1].address, "value": "0x1", "nonce": hex(nonce + 1)
+        }])
+        submitter = UpkeepSubmitter(endpoint, accounts[0])
+        assert submitter.recover() == [nonce]
+        request(endpoint, "evm_mine", [])
+    finally:
+        set_automine(endpoint, True)
+
+    assert submitter.wait(timeout=30, interval=0.1)
+    assert web3.eth.get_transaction_count(accounts[0].address) == nonce + 2
+    submitter.close()
+
+def test_nonce_taken():
+    env = deploy_updaters(1)[0]
+    endpoint = web3.provider.endpoint_uri
+    submitter = UpkeepSubmitter(endpoint, accounts[0])
+    upkeeps = check_upkeeps(endpoint, [env["VariableRateUpdater"].address])
+
+    # another transaction took the reserved nonce before anything was sent, the upkeep moves to the next one
+    nonce = accounts[0].nonce
+    accounts[0].transfer(accounts[1], 1)
+    submission = submitter.submit_upkeeps(upkeeps)[0]
+    assert submission.nonce == nonce + 1
+    assert submitter.wait(timeout=30, interval=0.1)
+    assert submission.status == MINED
+
+    # a replacement of a mined upkeep finds its own receipt instead of moving
+    mined_hash = submission.minedHash
+    submission.status = PENDING
+    submitter._bump(submission)
+    assert submission.status == MINED
+    assert submission.nonce == nonce + 1 and submission.minedHash == mined_hash
+    submitter.close()
+
+def test_connection_errors_are_retried():
+    env = deploy_updaters(1)[0]
+    with FaultProxy(web3.provider.endpoint_uri) as proxy:
+        submitter = UpkeepSubmitter(proxy.url, accounts[0])
+        upkeeps = check_upkeeps(proxy.url, [env["VariableRateUpdater"].address])
+        max_fee, priority = submitter.fees()
+        submitter.fees = lambda: (max_fee, priority)
+
+        proxy.drop = True
+        submission = submitter.submit_upkeeps(upkeeps)[0]
+        assert submission.status == PENDING and submission.error is not None
+        assert submitter.submissions == [submission]
+
+        proxy.drop = False
+        assert submitter.wait(timeout=30, interval=0.1)
+        assert submission.status == MINED and submission.success
+        submitter.close()
+
+def test_recover_without_txpool():
+    env = deploy_updaters(1)[0]
+    endpoint = web3.provider.endpoint_uri
+    with FaultProxy(endpoint) as proxy:
+        proxy.unsupported = {"txpool_content"}
+        submitter = UpkeepSubmitter(proxy.url, accounts[0])
+        # nothing handed out, nothing is known
+        assert submitter.recover() == []
+
+        set_automine(endpoint, False)
+        try:
+            submission = submitter.submit_upkeeps(check_upkeeps(proxy.url, [env["VariableRateUpdater"].address]))[0]
+            # the in-flight upkeep is not cancelled
+            assert submitter.recover() == []
+            request(endpoint, "evm_mine", [])
+        finally:
+            set_automine(endpoint, True)
+
+        assert submitter.wait(timeout=30, interval=0.1)
+        assert submission.status == MINED and submission.success
+        submitter.close()
+
+def test_fee_bumps():
+    env = deploy_updaters(1)[0]
+    endpoint = web3.provider.endpoint_uri
+    with FaultProxy(endpoint) as proxy:
+        submitter = UpkeepSubmitter(proxy.url, accounts[0], stuck_blocks=0, max_fee_multiple=1.5)
+        set_automine(endpoint, False)
+        try:
+            submission = submitter.submit_upkeeps(check_upkeeps(proxy.url, [env["VariableRateUpdater"].address]))[0]
+            max_fee = submission.maxFeePerGas
+            assert submission.maxFeeCap == int(max_fee * 1.5)
+
+            # the node refuses the sends: the stuck upkeep is bumped once, then resent at the same fees
+            proxy.unsupported = {"eth_sendTransaction"}
+            for _ in range(3):
+                assert submitter.poll() == 1
+            assert submission.replacements == 1 and submission.error is not None
+            assert submission.maxFeePerGas == int(max_fee * 1.125) + 1
+
+            # the bumps stop at the cap
+            proxy.unsupported = set()
+            for _ in range(10):
+                submitter.poll()
+            assert submission.error is None
+            assert submission.replacements == 3
+            assert submission.maxFeePerGas <= submission.maxFeeCap
+            request(endpoint, "evm_mine", [])
+        finally:
+            set_automine(endpoint, True)
+
+        assert submitter.wait(timeout=30, interval=0.1)
+        assert submission.status == MINED and submission.success
+        submitter.close()
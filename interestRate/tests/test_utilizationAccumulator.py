@@ -0,0 +1,54 @@
+from brownie import chain
+
+from scripts.rate_model import UtilizationAccumulator
+from conftest import UTILIZATION_HISTORY, perform_upkeep_at_utilization
+
+'''
+The accumulator is checked against the off-chain model for upkeeps performed at uneven times.
+'''
+
+def test_genesis(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    assert variable_rate_updater.lastUtilization() == UTILIZATION_HISTORY[59]
+    assert variable_rate_updater.observations(59)[1] == 0
+
+    chain.sleep(1000)
+    chain.mine(1)
+    twau, period = variable_rate_updater.timeWeightedAverageUtilization(0)
+    assert twau == UTILIZATION_HISTORY[59]
+    assert period >= 1000
+
+def test_matches_model(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    genesis_timestamp = variable_rate_updater.observations(59)[0]
+    model = UtilizationAccumulator(genesis_timestamp, UTILIZATION_HISTORY[59])
+
+    # late and skipped upkeeps
+    for utilization, delay in [(50, 12*60*60 + 1), (90, 3*12*60*60), (70, 13*60*60), (30, 12*60*60 + 10)]:
+        tx = perform_upkeep_at_utilization(mock_env, utilization * 10**25, delay)
+        model.sample(tx.timestamp, utilization * 10**25)
+
+    assert variable_rate_updater.counter() == 4
+    for k in range(4):
+        assert variable_rate_updater.observations(k) == model.observations[k]
+
+    chain.sleep(600)
+    chain.mine(1)
+    for observations_ago in range(5):
+        assert variable_rate_updater.timeWeightedAverageUtilization(observations_ago) == \
+            model.time_weighted_average(chain[-1].timestamp, observations_ago)
+
+def test_latest_interval_consistent(mock_env):
+    variable_rate_updater = mock_env["VariableRateUpdater"]
+    perform_upkeep_at_utilization(mock_env, 50 * 10**25, 12*60*60 + 1)
+    chain.sleep(3600)
+    chain.mine(1)
+    extrapolated = variable_rate_updater.currentUtilizationCumulative()
+    extrapolated_at = chain[-1].timestamp
+
+    # the next sample doesn't rewrite the time already accumulated
+    tx = perform_upkeep_at_utilization(mock_env, 90 * 10**25, 12*60*60)
+    assert variable_rate_updater.observations(1) == (
+        tx.timestamp,
+        extrapolated + 50 * 10**25 * (tx.timestamp - extrapolated_at)
+    )
@@ -6,14 +6,26 @@ import time
 from eth_abi import decode
 from brownie import (
     accounts,
-    Contract,
     chain,
-    MockAddressesProvider,
-    MockPool,
     MockERC20,
-    DynamicRateStrategy,
     VariableRateUpdater
 )
+from scripts.constants import (
+    OPTIMAL_USAGE_RATIO,
+    BASE_VARIABLE_BORROW_RATE,
+    VARIABLE_RATE_SLOPE_1,
+    VARIABLE_RATE_SLOPE_2,
+    STABLE_RATE_SLOPE_1,
+    STABLE_RATE_SLOPE_2,
+    BASE_STABLE_RATE_OFFSET,
+    STABLE_RATE_EXCESS_OFFSET,
+    OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO,
+    EPSILON,
+    M_PLUS,
+    M_MINUS
+)
+from scripts.parameters import RateStrategyParameters
+from scripts.setup_mock_env import deploy_dynamic_rate_strategy, deploy_mocks
 
 
 '''
@@ -25,23 +37,6 @@ See notion page to refer to what those are.
 The only things that need to be tested are whether for the new variables the setters and getters work properly.
 '''
 
-# Copying current WETH interest rate strategy's parameters on Spark Protocol
-# See https://etherscan.io/address/0x764b4AB9bCA18eB633d92368F725765Ebb8f047C#readContract
-
-OPTIMAL_USAGE_RATIO = 800000000000000000000000000
-BASE_VARIABLE_BORROW_RATE = 10000000000000000000000000
-VARIABLE_RATE_SLOPE_1 = 38000000000000000000000000
-VARIABLE_RATE_SLOPE_2 = 800000000000000000000000000
-STABLE_RATE_SLOPE_1 = 0
-STABLE_RATE_SLOPE_2 = 0
-BASE_STABLE_RATE_OFFSET =  38000000000000000000000000 - VARIABLE_RATE_SLOPE_1 
-STABLE_RATE_EXCESS_OFFSET = 0
-OPTIMAL_STABLE_TO_TOTAL_DEBT_RATIO = 0
-EPSILON = 1_000_000_000_000_000_000_000_000_00 # 10%
-M_PLUS = int(10_000*1.1) # M_PLUS = 1.1
-M_MINUS = int(10_000*0.9) # M_MINUS = 0.9
-
-
 # Copying current WETH reserve data, can be used for sDAI later on.
 
 CONFIGURATION =379853409927534986586068957228306619304257013817152
@@ -66,73 +61,12 @@ ISOLATION_MODE_DEBT = 0
 UTILIZATION_HISTORY = [(60-k)*10**25 for k in range(30)] + [(30+k)*10**25 for k in range(30)]
 UTILIZATION_HISTORY_2 = [80*10**25]*60
 
-def deploy_mock_addresses_provider(
-    deployer_account
-):
-    return MockAddressesProvider.deploy({"from": deployer_account})
-
-def deploy_mock_pool(
-    deployer_account
-):
-    return MockPool.deploy({"from": deployer_account})
-
 def deploy_mock_erc20(
     deployer_account
 ):
     return MockERC20.deploy({"from": deployer_account})
 
 
-@dataclass
-class RateStrategyParameters:
-    provider: Contract
-    optimalUsageRatio: int
-    baseVariableBorrowRate: int
-    variableRateSlope1: int
-    variableRateSlope2: int
-    stableRateSlope1: int
-    stableRateSlope2: int
-    baseStableRateOffset: int
-    stableRateExcessOffset: int
-    optimalStableToTotalDebtRatio: int
-    epsilon: int # the parameter to 
-    mPlus: int
-    mMinus: int
-
-def deploy_dynamic_rate_strategy(
-    rate_strategy_params: RateStrategyParameters,
-    deployer_account
-):
-    rate_strategy = DynamicRateStrategy.deploy(
-        rate_strategy_params.provider,
-        rate_strategy_params.optimalUsageRatio,
-        rate_strategy_params.baseVariableBorrowRate,
-        rate_strategy_params.variableRateSlope1,
-        rate_strategy_params.variableRateSlope2,
-        rate_strategy_params.stableRateSlope1,
-        rate_strategy_params.stableRateSlope2,
-        rate_strategy_params.baseStableRateOffset,
-        rate_strategy_params.stableRateExcessOffset,
-        rate_strategy_params.optimalStableToTotalDebtRatio,
-        rate_strategy_params.epsilon,
-        {"from": deployer_account}
-    )
-
-    # this will work because the deployer is a pool configurator in mock contract
-    rate_strategy.setMPlus(rate_strategy_params.mPlus, {"from": deployer_account})
-    rate_strategy.setMMinus(rate_strategy_params.mMinus, {"from": deployer_account})
-    return rate_strategy
-
-def deploy_mocks(
-    deployer_account
-):
-    addresses_provider = deploy_mock_addresses_provider(deployer_account)
-    pool = deploy_mock_pool(deployer_account)
-
-    addresses_provider.setPool(pool.address, {"from": deployer_account})
-    addresses_provider.setPoolConfigurator(deployer_account.address, {"from": deployer_account})
-
-    return {"Pool": pool, "AddressesProvider": addresses_provider}
-
 def deploy_rate_strategy(
     mocks: dict,
     deployer_account